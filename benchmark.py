@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+import wikimap
+from wikimap import Benchmarks
+from wikimap.Paths import AbstractPaths as P
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure the throughput of dump imports on synthetic "
+                    "dumps.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument(
+        '--pages',
+        type=int,
+        default=Benchmarks.DEFAULT_PAGE_COUNT,
+        help="Choose a number of pages in generated dumps.")
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=0,
+        help="Choose a seed of the dump generator.")
+    parser.add_argument(
+        '--dumps',
+        type=str,
+        default=None,
+        help=("Choose a directory with dumps. If it has no dumps, generated "
+              "ones are written there. By default they are generated in a "
+              "temporary directory."))
+    parser.add_argument(
+        '--generate-only',
+        action='store_true',
+        help="Generate dumps in the directory chosen by '--dumps' and quit.")
+    parser.add_argument(
+        '--no-jobs',
+        action='store_true',
+        help="Benchmark only table importers, without import jobs.")
+    parser.add_argument(
+        '--lookups',
+        action='store_true',
+        help=("Measure the latency of table lookups instead of imports, "
+              "with and without pooled connections."))
+    parser.add_argument(
+        '--edge-formats',
+        action='store_true',
+        help=("Measure the size and the loading time of saved link edges in "
+              "each format instead of imports."))
+    parser.add_argument(
+        '--sequential',
+        action='store_true',
+        help="Parse dumps in a single thread.")
+
+    args = parser.parse_args()
+
+    if args.generate_only and not args.dumps:
+        sys.exit("Choose a directory for generated dumps with --dumps.")
+
+    wikimap.Utils.config_logging(verbose=False)
+    temp_dir = tempfile.mkdtemp(prefix='wikimap-benchmark-')
+    try:
+        if args.lookups:
+            print Benchmarks.format_latencies(
+                Benchmarks.benchmark_lookups(temp_dir, row_count=args.pages))
+            return
+        if args.edge_formats:
+            print Benchmarks.format_edge_formats(
+                Benchmarks.benchmark_edge_formats(temp_dir))
+            return
+
+        dumps_dir = args.dumps or temp_dir
+        if not os.path.isdir(dumps_dir):
+            os.makedirs(dumps_dir)
+        if not os.path.isfile(P.pages_dump(dumps_dir)):
+            print 'Generating dumps of {} pages in {}'.format(args.pages, dumps_dir)
+            Benchmarks.DumpGenerator(args.pages, args.seed).write(dumps_dir)
+        if args.generate_only:
+            return
+
+        results = Benchmarks.benchmark_importers(dumps_dir, parallel=not args.sequential)
+        if not args.no_jobs:
+            dump_rows = dict((r.name.split(':')[1], r.rows) for r in results)
+            results += Benchmarks.benchmark_jobs(
+                dumps_dir, os.path.join(temp_dir, 'build'), dump_rows)
+
+        print Benchmarks.format_results(results)
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    main()
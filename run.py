@@ -124,6 +124,12 @@ def main():
         '--print-jobs',
         action='store_true',
         help="Print a list of jobs included in the build and quit.")
+    parser.add_argument(
+        '--migrate-lists',
+        action='store_true',
+        help=("Rewrite lists stored as text by older versions in databases of "
+              "the base build in a smaller binary format and quit. Builds "
+              "can be read without it."))
     parser.add_argument(
         '--ldnn.neighbors_count',
         type=wikimap.Utils.parse_comma_separated_ints,
@@ -236,6 +242,8 @@ def main():
             build.print_jobs()
         elif args.print_config:
             build.print_config()
+        elif args.migrate_lists:
+            build.migrate_lists()
         else:
             logger.important(wikimap.Utils.thick_line_separator)
             format_str = 'STARTING BUILD [{{:{}}}/{{}}]'.format(
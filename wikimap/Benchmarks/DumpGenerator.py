@@ -0,0 +1,208 @@
+import gzip
+import random
+import bisect
+from ..Paths import AbstractPaths as P
+
+ARTICLE_NAMESPACE = 0
+TEMPLATE_NAMESPACE = 10
+CATEGORY_NAMESPACE = 14
+
+DEFAULT_PAGE_COUNT = 100000
+DEFAULT_LINKS_PER_PAGE = 20
+DEFAULT_CATEGORIES_PER_PAGE = 3
+DEFAULT_STATEMENT_SIZE = 1024 * 1024 # bytes, like mysqldump's net_buffer_length
+
+WORDS = [
+    'History', 'of', 'the', 'List', 'United', 'Kingdom', 'Battle', 'River',
+    'John', 'Smith', 'Station', 'Church', 'Saint', 'Football', 'Club', 'Album',
+    'County', 'School', 'New', 'York', 'Paris', 'Party', 'Election', 'Game',
+    # utf8 encoded words with 2, 3 and 4 byte sequences
+    '\xc5\xbb\xc3\xb3\xc5\x82w', 'Krak\xc3\xb3w', '\xc3\x89cole', 'M\xc3\xbcnchen',
+    '\xe6\x9d\xb1\xe4\xba\xac', '\xd0\x9c\xd0\xbe\xd1\x81\xd0\xba\xd0\xb2\xd0\xb0',
+    '\xf0\x9f\x98\x80']
+
+# words with characters that have to be escaped in dumps
+SPECIAL_WORDS = ["O'Brien", 'Rock\'n\'roll', 'C:\\Windows', '"Quoted"', 'A&B',
+                 '100%', 'Under_score']
+
+# words of titles stored in legacy single byte encodings, the importer decodes
+# them as cp1252
+LEGACY_WORDS = ['caf\xe9', 'na\xefve', '\xc6sir']
+
+ESCAPES = {
+    '\\': '\\\\',
+    '\'': '\\\'',
+    '"': '\\"',
+    '\n': '\\n',
+    '\0': '\\0'
+}
+
+
+def escape(text):
+    """Escape a text like mysqldump does."""
+    return ''.join(ESCAPES.get(c, c) for c in text)
+
+
+class DumpGenerator(object):
+    """
+    Generator of synthetic Wikipedia dumps.
+
+    The dumps have the layout of the real ones (page, pagelinks,
+    categorylinks, page_props and redirect tables). The number of links of a
+    page and the popularity of a link target follow power laws, titles contain
+    escaped characters and a few of them are not encoded in utf8.
+    """
+
+    def __init__(self, page_count=DEFAULT_PAGE_COUNT, seed=0,
+                 links_per_page=DEFAULT_LINKS_PER_PAGE,
+                 categories_per_page=DEFAULT_CATEGORIES_PER_PAGE,
+                 statement_size=DEFAULT_STATEMENT_SIZE):
+        self._random = random.Random(seed)
+        self._links_per_page = links_per_page
+        self._categories_per_page = categories_per_page
+        self._statement_size = statement_size
+        self._pages = self._make_pages(page_count)
+        self._articles = [p for p in self._pages if p[1] == ARTICLE_NAMESPACE]
+        self._categories = [p for p in self._pages if p[1] == CATEGORY_NAMESPACE]
+        self._redirects = self._make_redirects()
+
+    def write(self, output_dir):
+        """Write all dumps to `output_dir`, named like the downloaded ones."""
+        self.write_pages(P.pages_dump(output_dir))
+        self.write_links(P.links_dump(output_dir))
+        self.write_category_links(P.category_links_dump(output_dir))
+        self.write_page_properties(P.page_properties_dump(output_dir))
+        self.write_redirects(P.redirects_dump(output_dir))
+
+    def write_pages(self, path):
+        def records():
+            for id_, ns, title in self._pages:
+                yield "({},{},'{}','',0,{},0,{:.12f},'20170601000000','20170601000000',{},{},'wikitext',NULL)".format(
+                    id_, ns, escape(title), int(id_ in self._redirects), self._random.random(),
+                    self._random.randint(1, 10**8), self._random.randint(100, 200000))
+
+        return self._write(path, 'page', records())
+
+    def write_links(self, path):
+        weights = self._popularity(len(self._pages))
+        targets = list(self._pages)
+        self._random.shuffle(targets)
+
+        def records():
+            for id_, ns, _ in self._pages:
+                for _ in xrange(self._degree(self._links_per_page)):
+                    if self._random.random() < 0.05:
+                        # links to missing pages
+                        to_ns, to_title = ARTICLE_NAMESPACE, self._make_title(self._random.randint(1, 3))
+                    elif self._random.random() < 0.05:
+                        to_ns, to_title = TEMPLATE_NAMESPACE, 'Infobox_' + self._random.choice(WORDS)
+                    else:
+                        _, to_ns, to_title = targets[self._pick(weights)]
+                    yield "({},{},'{}',{})".format(id_, to_ns, escape(to_title), ns)
+
+        return self._write(path, 'pagelinks', records())
+
+    def write_category_links(self, path):
+        if not self._categories:
+            return self._write(path, 'categorylinks', [])
+
+        weights = self._popularity(len(self._categories))
+
+        def records():
+            for id_, _, title in self._pages:
+                for _ in xrange(self._degree(self._categories_per_page)):
+                    category = self._categories[self._pick(weights)][2]
+                    yield "({},'{}','{}','2017-06-01 00:00:00','','uca-default-u-kn','page')".format(
+                        id_, escape(category), escape(title.upper()))
+
+        return self._write(path, 'categorylinks', records())
+
+    def write_page_properties(self, path):
+        def records():
+            for id_, ns, _ in self._pages:
+                if ns == CATEGORY_NAMESPACE and self._random.random() < 0.1:
+                    yield "({},'hiddencat','',NULL)".format(id_)
+                yield "({},'wikibase_item','Q{}',NULL)".format(id_, id_)
+
+        return self._write(path, 'page_props', records())
+
+    def write_redirects(self, path):
+        def records():
+            for id_ in sorted(self._redirects):
+                _, ns, title = self._redirects[id_]
+                yield "({},{},'{}','','')".format(id_, ns, escape(title))
+
+        return self._write(path, 'redirect', records())
+
+    def _write(self, path, table, records):
+        """Write `records` as INSERT statements of `table` and return their
+        number."""
+        count = 0
+        prefix = 'INSERT INTO `{}` VALUES '.format(table)
+        with gzip.open(path, 'wb') as dump:
+            dump.write('-- MySQL dump 10.16  Distrib 10.1.23-MariaDB\n')
+            dump.write('/*!40101 SET NAMES binary */;\n')
+            dump.write('DROP TABLE IF EXISTS `{}`;\n'.format(table))
+            dump.write('CREATE TABLE `{}` ();\n'.format(table))
+            dump.write('LOCK TABLES `{}` WRITE;\n'.format(table))
+
+            statement, size = [], 0
+            for record in records:
+                statement.append(record)
+                size += len(record) + 1
+                count += 1
+                if size >= self._statement_size:
+                    dump.write(prefix + ','.join(statement) + ';\n')
+                    statement, size = [], 0
+            if statement:
+                dump.write(prefix + ','.join(statement) + ';\n')
+
+            dump.write('UNLOCK TABLES;\n')
+        return count
+
+    def _make_pages(self, page_count):
+        pages = []
+        titles = set()
+        for id_ in xrange(1, page_count + 1):
+            ns = CATEGORY_NAMESPACE if self._random.random() < 0.1 else ARTICLE_NAMESPACE
+            title = self._make_title(self._random.randint(1, 4))
+            while (ns, title) in titles:
+                title = '{}_({})'.format(title, self._random.choice(WORDS))
+            titles.add((ns, title))
+            pages.append((id_, ns, title))
+        return pages
+
+    def _make_redirects(self):
+        redirects = {}
+        if not self._articles:
+            return redirects
+        for id_, ns, _ in self._random.sample(self._articles, len(self._articles) / 10):
+            redirects[id_] = self._random.choice(self._articles)
+        return redirects
+
+    def _make_title(self, length):
+        words = []
+        for _ in xrange(length):
+            r = self._random.random()
+            if r < 0.01:
+                words.append(self._random.choice(LEGACY_WORDS))
+            elif r < 0.1:
+                words.append(self._random.choice(SPECIAL_WORDS))
+            else:
+                words.append(self._random.choice(WORDS))
+        return '_'.join(words)
+
+    def _degree(self, mean):
+        # pareto distribution with shape 2 has a mean of 2 * scale
+        return int(self._random.paretovariate(2.0) * mean / 2.0)
+
+    def _popularity(self, count):
+        """Cumulative weights of a zipf distribution over `count` items."""
+        cumulative, total = [], 0.0
+        for rank in xrange(1, count + 1):
+            total += 1.0 / rank
+            cumulative.append(total)
+        return cumulative
+
+    def _pick(self, cumulative):
+        return bisect.bisect_left(cumulative, self._random.random() * cumulative[-1])
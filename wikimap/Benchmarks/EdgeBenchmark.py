@@ -0,0 +1,86 @@
+import os
+import numpy
+from .. import Tables
+from .. import Utils
+
+DEFAULT_EDGE_COUNT = 10000000
+DEFAULT_NODE_COUNT = 1000000
+
+# formats of saved edges, with whether edges are sorted by end nodes within
+# start nodes and whether they are compressed
+FORMATS = [
+    ('edges:raw', False, False),
+    ('edges:compressed', False, True),
+    ('edges:compressed:sorted', True, True)
+]
+
+
+class FormatResult(object):
+    def __init__(self, name, edges, size, save_seconds, load_seconds):
+        self.name = name
+        self.edges = edges
+        self.size = size # in bytes
+        self.save_seconds = save_seconds
+        self.load_seconds = load_seconds
+
+    def edges_per_second(self):
+        return self.edges / self.load_seconds if self.load_seconds > 0 else float('inf')
+
+    def __str__(self):
+        return '{:<24} {:>12} {:>10.1f} {:>10.2f} {:>10.2f} {:>10.2f} {:>14.0f}'.format(
+            self.name, self.edges, self.size / 1024.0 ** 2,
+            float(self.size) / max(self.edges, 1), self.save_seconds,
+            self.load_seconds, self.edges_per_second())
+
+
+def format_edge_formats(results):
+    header = '{:<24} {:>12} {:>10} {:>10} {:>10} {:>10} {:>14}'.format(
+        'BENCHMARK', 'EDGES', 'SIZE [MB]', 'BYTES/EDGE', 'SAVE [s]',
+        'LOAD [s]', 'EDGES/SEC')
+    return '\n'.join([header] + [str(r) for r in results])
+
+
+def generate_edges(edge_count=DEFAULT_EDGE_COUNT,
+                   node_count=DEFAULT_NODE_COUNT, seed=0):
+    """Return a (N, 2) int32 array of links sorted by start nodes. End nodes
+    follow a power law, like links to popular articles."""
+    generator = numpy.random.RandomState(seed)
+    starts = numpy.sort(generator.randint(0, node_count, size=edge_count))
+    ends = numpy.minimum(generator.zipf(1.5, size=edge_count) - 1, node_count - 1)
+    # popular articles are spread over the ids
+    ends = generator.permutation(node_count)[ends]
+    return numpy.stack([starts, ends], axis=1).astype(numpy.int32)
+
+
+def benchmark_edge_formats(work_dir, edges=None):
+    """
+    Save edges in every format and measure the size of the files, and the
+    time of saving and of loading them into memory (from the page cache).
+
+    `edges` - (N, 2) int32 array of edges sorted by start nodes, generated by
+    default
+    """
+    if edges is None:
+        edges = generate_edges()
+
+    results = []
+    for name, sort, compressed in FORMATS:
+        path = os.path.join(work_dir, name.replace(':', '_') + '.bin')
+        edge_table = Tables.EdgeTable(log=False)
+        edge_table.extend(edges)
+        if sort:
+            edge_table.sortByStartNode(thenByEndNode=True)
+
+        timer = Utils.SimpleTimer()
+        edge_table.save(path, compressed=compressed)
+        save_seconds = timer()
+
+        timer = Utils.SimpleTimer()
+        loaded = Tables.EdgeTable(path, log=False)
+        edge_count = len(loaded.asNumpy())
+        load_seconds = timer()
+
+        results.append(FormatResult(
+            name, edge_count, os.path.getsize(path), save_seconds, load_seconds))
+        os.unlink(path)
+    return results
@@ -0,0 +1,115 @@
+import os
+import resource
+import multiprocessing
+from .. import Tables
+from .. import Utils
+from .. import Jobs
+from ..Paths import AbstractPaths as P
+
+# table importers with the dumps they read
+IMPORTERS = [
+    ('page', Tables.Import.PageTable, P.pages_dump),
+    ('pagelinks', Tables.Import.LinksTable, P.links_dump),
+    ('categorylinks', Tables.Import.CategoryLinksTable, P.category_links_dump),
+    ('page_props', Tables.Import.PagePropertiesTable, P.page_properties_dump),
+    ('redirect', Tables.Import.RedirectsTable, P.redirects_dump)
+]
+
+# aliases of import jobs in the order of their dependencies, with the tables
+# of the dumps they read
+JOBS = [
+    ('pages', 'page'),
+    ('props', 'page_props'),
+    ('reds', 'redirect'),
+    ('clinks', 'categorylinks'),
+    ('edges', 'pagelinks')
+]
+
+
+class Result(object):
+    def __init__(self, name, rows, seconds, peak_rss):
+        self.name = name
+        self.rows = rows
+        self.seconds = seconds
+        self.peak_rss = peak_rss # in kilobytes
+
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds > 0 else float('inf')
+
+    def __str__(self):
+        return '{:<24} {:>12} {:>10.2f} {:>14.0f} {:>10.1f}'.format(
+            self.name, self.rows, self.seconds, self.rows_per_second(),
+            self.peak_rss / 1024.0)
+
+
+def format_results(results):
+    header = '{:<24} {:>12} {:>10} {:>14} {:>10}'.format(
+        'BENCHMARK', 'ROWS', 'SECONDS', 'ROWS/SEC', 'RSS [MB]')
+    return '\n'.join([header] + [str(r) for r in results])
+
+
+def benchmark_importers(dumps_dir, parallel=True):
+    """
+    Read every dump in `dumps_dir` with its table importer and measure the
+    throughput and the peak memory usage.
+    """
+    results = []
+    for table, importer, dump in IMPORTERS:
+        def read(importer=importer, path=dump(dumps_dir)):
+            rows = 0
+            for columns in importer(path, parallel=parallel).readColumns():
+                rows += len(columns[0])
+            return rows
+
+        results.append(_measure('import:' + table, read))
+    return results
+
+
+def benchmark_jobs(dumps_dir, work_dir, dump_rows):
+    """
+    Run the import jobs on the dumps in `dumps_dir` and measure the throughput
+    and the peak memory usage of each.
+
+    `work_dir` - build directory of the jobs, it should not exist
+
+    `dump_rows` - number of rows of each dump table, the throughput of a job
+    is measured in rows of the dump it reads
+    """
+    os.makedirs(work_dir)
+    for _, _, dump in IMPORTERS:
+        os.symlink(os.path.abspath(dump(dumps_dir)), dump(work_dir))
+
+    jobs = dict((job.alias, job) for job in Jobs.get_jobs())
+    results = []
+    for alias, table in JOBS:
+        def run(job=jobs[alias], table=table):
+            job.run(work_dir)
+            return dump_rows[table]
+
+        results.append(_measure('job:' + alias, run))
+    return results
+
+
+def _measure(name, function):
+    """Run `function` in a separate process, so that its peak memory usage is
+    not affected by other benchmarks. `function` returns a number of rows."""
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+
+    def target():
+        timer = Utils.SimpleTimer()
+        rows = function()
+        seconds = timer()
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        sender.send((rows, seconds, peak_rss))
+
+    process = multiprocessing.Process(target=target)
+    process.start()
+    sender.close()
+    try:
+        rows, seconds, peak_rss = receiver.recv()
+    except EOFError:
+        process.join()
+        raise RuntimeError('Benchmark {} failed with exit code {}'.format(
+            name, process.exitcode))
+    process.join()
+    return Result(name, rows, seconds, peak_rss)
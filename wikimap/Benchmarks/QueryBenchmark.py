@@ -0,0 +1,61 @@
+import random
+from .. import Tables
+from .. import Utils
+from ..Paths import AbstractPaths as P
+
+DEFAULT_ROW_COUNT = 100000
+DEFAULT_LOOKUP_COUNT = 10000
+
+
+class LatencyResult(object):
+    def __init__(self, name, latencies):
+        self.name = name
+        self.latencies = sorted(latencies)
+
+    def percentile(self, p):
+        index = min(int(len(self.latencies) * p / 100.0), len(self.latencies) - 1)
+        return self.latencies[index]
+
+    def mean(self):
+        return sum(self.latencies) / len(self.latencies)
+
+    def __str__(self):
+        return '{:<24} {:>10} {:>10.1f} {:>10.1f} {:>10.1f}'.format(
+            self.name, len(self.latencies), self.mean() * 1e6,
+            self.percentile(50) * 1e6, self.percentile(99) * 1e6)
+
+
+def format_latencies(results):
+    header = '{:<24} {:>10} {:>10} {:>10} {:>10}'.format(
+        'BENCHMARK', 'QUERIES', 'MEAN [us]', 'P50 [us]', 'P99 [us]')
+    return '\n'.join([header] + [str(r) for r in results])
+
+
+def benchmark_lookups(work_dir, row_count=DEFAULT_ROW_COUNT,
+                      lookup_count=DEFAULT_LOOKUP_COUNT, seed=0):
+    """
+    Measure the latency of looking up points of the map by title, with a new
+    connection for every query and with pooled connections.
+    """
+    path = P.wikimap_points(work_dir)
+    table = Tables.WikimapPointsTable(path)
+    table.create()
+    table.populate(
+        (i, u'Title_{}'.format(i), 0.5, 0.5, 1.0, [i], [0.0], [i], [0.0])
+        for i in xrange(row_count))
+
+    generator = random.Random(seed)
+    titles = [u'Title_{}'.format(generator.randrange(row_count))
+              for _ in xrange(lookup_count)]
+
+    results = []
+    for name, pooled in [('lookup:unpooled', False), ('lookup:pooled', True)]:
+        table = Tables.WikimapPointsTable(path, pooled=pooled)
+        latencies = []
+        for title in titles:
+            timer = Utils.SimpleTimer()
+            list(table.selectByTitle(title))
+            latencies.append(timer())
+        table.close()
+        results.append(LatencyResult(name, latencies))
+    return results
@@ -0,0 +1,4 @@
+from DumpGenerator import DumpGenerator, DEFAULT_PAGE_COUNT
+from ImportBenchmark import benchmark_importers, benchmark_jobs, format_results
+from QueryBenchmark import benchmark_lookups, format_latencies
+from EdgeBenchmark import benchmark_edge_formats, format_edge_formats
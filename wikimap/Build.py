@@ -1,4 +1,7 @@
+import os
 import Jobs
+import Utils
+import Tables
 import Builder
 
 
@@ -52,6 +55,20 @@ class Build(object):
     def print_config(self):
         self._manager.print_config()
 
+    def migrate_lists(self):
+        """Rewrite LIST columns stored as text by older versions in databases
+        of the base build in the binary format."""
+        logger = Utils.get_logger(__name__)
+        build_dir = self._explorer.get_base_build_dir()
+        if build_dir is None:
+            logger.info('There is no base build to migrate')
+            return
+
+        for name in sorted(os.listdir(build_dir)):
+            if name.endswith('.db'):
+                migrated = Tables.migrateLists(os.path.join(build_dir, name))
+                logger.info('Migrated {} lists of {}'.format(migrated, name))
+
     def _get_jobs(self, config):
         jobs = Jobs.get_jobs()
 
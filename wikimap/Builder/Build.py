@@ -60,9 +60,30 @@ class Build(object):
         rows = [make_summary_row(job) for job in self]
         return Utils.make_table(('#', 'JOB NAME', 'OUTCOME', 'DURATION'), rows, ('r', 'l', 'c', 'c'))
 
+    def get_metrics_str(self, queries_per_job=3):
+        """Return a table of the slowest queries of each job."""
+        def shorten(text, length=60):
+            return text if len(text) <= length else text[:length-3] + '...'
+
+        rows = [
+            (job.alias,
+                shorten(metrics.name()),
+                str(metrics.executions),
+                str(metrics.rows),
+                Utils.format_duration(metrics.seconds),
+                ', '.join(metrics.fullScans))
+            for job in self
+            for metrics in job.metrics[:queries_per_job]]
+        return Utils.make_table(('JOB', 'QUERY', 'RUNS', 'ROWS', 'DURATION', 'FULL SCANS'), rows, ('l', 'l', 'r', 'r', 'c', 'l'))
+
+    def has_metrics(self):
+        return any(job.metrics for job in self)
+
     def get_job_list_str(self):
         return Utils.make_table(['#', 'ALIAS', 'JOB NAME'], [[str(job.number), job.alias, job.name] for job in self], ['r', 'l', 'l'])
 
     def save_summary(self, path):
         with open(path, 'w') as output:
             output.write(self.get_summary_str()+'\n')
+            if self.has_metrics():
+                output.write(self.get_metrics_str()+'\n')
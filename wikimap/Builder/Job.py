@@ -1,7 +1,9 @@
 import os
+from pprint import pformat
 from .. import Utils
+from .. import Tables
 from ..Data import Data
-from ..Paths import CheckedPaths, AbstractPathGroup
+from ..Paths import CheckedPaths, ConcretePaths, AbstractPathGroup, AbstractPaths
 from abc import ABCMeta, abstractmethod
 
 class InvalidConfig(Exception):
@@ -23,7 +25,9 @@ class CompletionGuard(object):
     def __exit__(self, _1, _2, _3):
         if not self._completed:
             for f in self._files:
-                if os.path.isfile(f):
+                # outputs with a checkpoint are kept, so that the next build
+                # can resume them
+                if os.path.isfile(f) and not Utils.Checkpoint.exists(f):
                     os.remove(f)
 
     def complete(self):
@@ -51,8 +55,11 @@ class Job(object):
         self.outcome = Job.NOT_RUN
         self.properties = []
         self.logs = []
+        self.metrics = []
 
         self.data = None
+        # data of the base build, None without one
+        self.base_data = None
 
         self._logger = Utils.get_logger(__name__)
 
@@ -60,11 +67,16 @@ class Job(object):
     def __call__(self, *args, **kwargs):
         pass
 
-    def run(self, base):
+    def run(self, base, prev_base=None):
+        """Run the job in the build directory `base`. Outputs of the build in
+        `prev_base` may be read through `base_data`."""
         timer = Utils.SimpleTimer()
+        recorder = Tables.startRecording()
         try:
             paths = CheckedPaths(base, (self.inputs + self.outputs)(base))
             self.data = Data(paths)
+            if prev_base:
+                self.base_data = Data(ConcretePaths(prev_base))
             with CompletionGuard(self.outputs(base)) as guard:
                 self()
                 self.outcome = Job.SUCCESS
@@ -88,8 +100,22 @@ class Job(object):
             self.outcome = Job.FAILURE
             raise
         finally:
+            # pooled connections would keep caches and files of the job open
+            Tables.closeConnections()
+            self.metrics = Tables.stopRecording(recorder)
+            self._save_metrics(base)
             self.duration = timer()
 
+    def _save_metrics(self, base):
+        """Save metrics of the queries of the job to a file in `base`."""
+        if not self.metrics:
+            return
+        metrics_dir = AbstractPaths.metrics(base)
+        if not os.path.isdir(metrics_dir):
+            os.makedirs(metrics_dir)
+        with open(os.path.join(metrics_dir, self.alias + '.txt'), 'w') as output:
+            output.write(pformat([m.asDict() for m in self.metrics]) + '\n')
+
     def skip(self):
         self.outcome = Job.SKIPPED
 
@@ -51,6 +51,8 @@ class BuildRunner(object):
                 else:
                     self._log_job_action('SKIPPING', i, job.name)
                     self._skip_job(job)
+            # dumps streamed to later jobs may still be downloading
+            Utils.wait_for_downloads()
         except KeyboardInterrupt:
             raise
         except Exception, e:
@@ -61,12 +63,17 @@ class BuildRunner(object):
             raise
         finally:
             self._logger.info('\n\n'+self._build.get_summary_str()+'\n')
+            if self._build.has_metrics():
+                self._logger.info('QUERIES:\n'+self._build.get_metrics_str()+'\n')
             self._build.save_summary(Paths.summary(self._new_build_dir))
             self._print_job_logs()
 
     def _run_job(self, job):
+        if self._can_resume(job):
+            self._logger.info('Resuming {} from checkpoints'.format(job.name))
+            self._move_checkpointed_outputs(job)
         self._changed_files.update(job.outputs(self._new_build_dir))
-        job.run(self._new_build_dir)
+        job.run(self._new_build_dir, self._prev_build_dir)
 
     def _skip_job(self, job):
         job.skip()
@@ -83,7 +90,27 @@ class BuildRunner(object):
                 or not self._outputs_computed(job)
 
     def _outputs_computed(self, job):
-        return self._prev_build_dir and all(os.path.exists(o) for o in job.outputs(self._prev_build_dir))
+        return self._prev_build_dir and all(os.path.exists(o) for o in job.outputs(self._prev_build_dir))\
+            and not self._has_checkpoints(job)
+
+    def _has_checkpoints(self, job):
+        return any(Utils.Checkpoint.exists(o) for o in job.outputs(self._prev_build_dir))
+
+    def _can_resume(self, job):
+        # partial outputs of a failed build are only valid for the same inputs
+        # and config
+        return self._prev_build_dir\
+            and not job.is_forced()\
+            and not self._inputs_changed(job)\
+            and not self._config_changed(job)\
+            and self._has_checkpoints(job)
+
+    def _move_checkpointed_outputs(self, job):
+        for prev, new in zip(job.outputs(self._prev_build_dir), job.outputs(self._new_build_dir)):
+            if Utils.Checkpoint.exists(prev):
+                Utils.move_files([
+                    (prev, new),
+                    (Utils.Checkpoint.path_of(prev), Utils.Checkpoint.path_of(new))])
 
     def _inputs_changed(self, job):
         return any(input_ in self._changed_files for input_ in job.inputs(self._new_build_dir))
@@ -1,48 +1,80 @@
 import Tables
+import os
+import numpy
 import shelve
+import logging
 import Utils
 import DataHelpers as Helpers
 from common.Zoom import ZoomIndex
 from DataHelpers import pipe, ColumnIt, LogIt, NotEqualIt, GroupIt, NotInIt, \
-    FlipIt, InIt, LongerThanIt
-from itertools import imap, izip
+    FlipIt, InIt, LongerThanIt, RowIt
+from itertools import imap, izip, chain
+from functools import partial
+
+ARTICLE_NAMESPACES = (Tables.Import.ARTICLE_NAMESPACE,)
+ARTICLE_AND_CATEGORY_NAMESPACES = (Tables.Import.ARTICLE_NAMESPACE,
+                                   Tables.Import.CATEGORY_NAMESPACE)
 
 
 class Data(object):
     def __init__(self, paths):
         self.P = paths
 
-    def download_pages_dump(self, url):
-        Utils.download(url, self.P.pages_dump)
+    def download_pages_dump(self, url, background=False):
+        Utils.download(url, self.P.pages_dump, background)
 
-    def download_links_dump(self, url):
-        Utils.download(url, self.P.links_dump)
+    def download_links_dump(self, url, background=False):
+        Utils.download(url, self.P.links_dump, background)
 
-    def download_category_links_dump(self, url):
-        Utils.download(url, self.P.category_links_dump)
+    def download_category_links_dump(self, url, background=False):
+        Utils.download(url, self.P.category_links_dump, background)
 
-    def download_page_properties_dump(self, url):
-        Utils.download(url, self.P.page_properties_dump)
+    def download_page_properties_dump(self, url, background=False):
+        Utils.download(url, self.P.page_properties_dump, background)
 
-    def download_redirects_dump(self, url):
-        Utils.download(url, self.P.redirects_dump)
+    def download_redirects_dump(self, url, background=False):
+        Utils.download(url, self.P.redirects_dump, background)
 
     def download_evaluation_datasets(self, url):
         Utils.download_and_extract(url, self.P.evaluation_datasets_dir)
 
-    def import_pages(self):
-        """Import pages table from compressed dump."""
-        return Tables.Import.PageTable(self.P.pages_dump).read()
+    def import_pages(self, checkpoint=None):
+        """Import pages table from compressed dump as chunks of columns,
+        starting after the chunks of the checkpoint if given."""
+        return Tables.Import.PageTable(
+            self.P.pages_dump,
+            namespaces=ARTICLE_AND_CATEGORY_NAMESPACES
+        ).readColumns(checkpoint.chunks if checkpoint else 0)
+
+    def import_link_edges(self, checkpoint=None):
+        """
+        Import links between articles from compressed dump straight into the
+        EdgeTable.
 
-    def import_links(self):
-        """Import links table from compressed dump."""
-        return Tables.Import.LinksTable(self.P.links_dump).read()
+        Titles are resolved to ids natively, so links never pass through
+        Python. If a checkpoint is given, the import continues after it.
+        """
+        logger = logging.getLogger(__name__)
+        timer = Utils.SimpleTimer()
+        pages_table = Tables.PageTable(self.P.pages)
+        edges = Tables.Import.LinksTable(
+            self.P.links_dump,
+            namespaces=ARTICLE_NAMESPACES,
+            fromNamespaces=ARTICLE_NAMESPACES
+        ).writeEdges(
+            pages_table.select_id_namespace_title_of_articles(),
+            self.P.link_edges,
+            checkpoint)
+        if checkpoint:
+            checkpoint.remove()
+        logger.info(Utils.format_rate('link edges', edges, timer()))
 
     def import_category_links(self):
-        """Import category links table from compressed dump."""
+        """Import category links table from compressed dump as chunks of
+        columns."""
         return Tables.Import.CategoryLinksTable(
             self.P.category_links_dump
-        ).read()
+        ).readColumns()
 
     def import_page_properties(self):
         """Import page properties table from compressed dump."""
@@ -52,7 +84,10 @@ class Data(object):
 
     def import_redirects(self):
         """Import redirects table from compressed dump."""
-        return Tables.Import.RedirectsTable(self.P.redirects_dump).read()
+        return Tables.Import.RedirectsTable(
+            self.P.redirects_dump,
+            namespaces=ARTICLE_AND_CATEGORY_NAMESPACES
+        ).read()
 
     def select_hidden_categories(self):
         """Select hidden categories by joining other tables."""
@@ -76,82 +111,82 @@ class Data(object):
             NotInIt(hidden_categories, 1))
 
     def get_article_title_2_id(self):
-        """Get a dict mapping title to id for articles (namespace 0)."""
+        """Get a dict mapping utf8 encoded title to id for articles
+        (namespace 0)."""
         pages_table = Tables.PageTable(self.P.pages)
-        return dict(FlipIt(pages_table.select_id_title_of_articles()))
+        return dict(
+            (title.encode('utf8'), id_)
+            for (id_, title)
+            in pages_table.select_id_title_of_articles())
 
     def get_category_title_2_id(self):
-        """Get a dict mapping title to id for categories (namespace 14)."""
+        """Get a dict mapping utf8 encoded title to id for categories
+        (namespace 14)."""
         pages_table = Tables.PageTable(self.P.pages)
-        return dict(FlipIt(pages_table.select_id_title_of_categories()))
+        return dict(
+            (title.encode('utf8'), id_)
+            for (id_, title)
+            in pages_table.select_id_title_of_categories())
 
     def get_category_id_2_title(self):
         """Get a dict mapping id to title for categories (namespace 14)."""
         pages_table = Tables.PageTable(self.P.pages)
         return dict(pages_table.select_id_title_of_categories())
 
-    def map_links_to_link_edges(self, links):
+    def map_category_links_to_link_edges(self, category_links):
         """
-        Map tuples from dump to edges.
+        Map category links from (id_from, title_to) to (id_from, id_to).
 
-        Original links are tuples consisting of 4 fields:
-        - id of a page where link originates
-        - namespace of said page
-        - title of a linked page
-        - its namespace
-        This function replaces it with simple (id_from, id_to) pairs that are
-        easy to store and operate on.
-
-        `links` - links in dump format
+        `category_links` - category links in dump format, as chunks of columns
         """
-        title_2_id = self.get_article_title_2_id()
-        valid_links = pipe(links, ColumnIt(0, 2), InIt(title_2_id, 1))
-        return imap(
-            lambda (from_, to_): (from_, title_2_id[to_]),
-            valid_links)
-
-    def map_category_links_to_link_edges(self, category_links):
-        """Map category links from (id_from, title_to) to (id_from, id_to)."""
         title_2_id = self.get_category_title_2_id()
-        valid_links = pipe(category_links, InIt(title_2_id, 1))
-        return imap(
-            lambda (from_, to_): (from_, title_2_id[to_]),
-            valid_links)
-
-    def get_link_edges(self):
-        """Get (load) the EdgeTable."""
-        edge_table = Tables.EdgeTable(self.P.link_edges)
-        return edge_table
 
-    def filter_edges_by_node_count(self, edge_table, min_count=1,
-                                   endpoints='both'):
-        """
-        Filter the EdgeTable.
+        def map_chunk((from_ids, titles)):
+            return izip(from_ids, imap(title_2_id.get, titles.encoded()))
 
-        Filter the EdgeTable so that it only contains edges between nodes that
-        occur at least the specified number of times.
+        edges = chain.from_iterable(imap(map_chunk, category_links))
+        return pipe(edges, NotEqualIt(None, 1))
 
-        `edge_table` is an EdgeTable to filter
+    def get_pages_checkpoint(self, interval):
+        """Get the checkpoint of importing pages, saved every `interval`
+        chunks."""
+        return Utils.Checkpoint(self.P.pages, interval,
+                                chunk_size=Tables.Import.DEFAULT_CHUNK_SIZE)
 
-        `min_count` is a minimum number of times a node has to occur as an
-        endpoint of an edge to be included in the returned table.
+    def compress_link_edges(self):
+        """Replace link edges with their compressed copy, readers of the
+        EdgeTable detect the format."""
+        edges_table = Tables.EdgeTable(self.P.link_edges)
+        compressed_path = self.P.link_edges + '.tmp'
+        edges_table.save(compressed_path, compressed=True)
+        os.rename(compressed_path, self.P.link_edges)
 
-        `endpoints` allows to apply filtering conditions only to start/end/both
-        endpoints of an edge.
+    def get_link_edges_checkpoint(self, interval):
+        """Get the checkpoint of importing link edges, saved every `interval`
+        chunks."""
+        return Utils.Checkpoint(self.P.link_edges, interval,
+                                chunk_size=Tables.Import.DEFAULT_CHUNK_SIZE)
+
+    def get_link_graph(self):
+        """Get the LinkGraph of link edges, mapped into memory."""
+        return Tables.LinkGraph(self.P.link_graph)
+
+    def get_links_between_nodes_of_degree(self, min_degree=1):
         """
-        if min_count > 1:
-            counts = edge_table.countNodes()
-            nodes = [n for (n, c) in counts.iteritems() if c >= min_count]
-            if endpoints == 'both':
-                edge_table.filterByNodes(nodes)
-            elif endpoints == 'start':
-                edge_table.filterByStartNodes(nodes)
-            elif endpoints == 'end':
-                edge_table.filterByEndNodes(nodes)
-            else:
-                raise ValueError(('`endpoints` argument should be one of '
-                                  'these: `start`, `end`, `both`.'))
-        return edge_table
+        Get an EdgeTable with links between nodes that occur at least
+        `min_degree` times as an endpoint of a link, sorted by start nodes.
+        """
+        link_graph = self.get_link_graph()
+        return link_graph.edgesBetween(link_graph.nodesWithDegree(min_degree))
+
+    def get_links_between_highest_ranked_nodes(self, node_count):
+        """
+        Get an EdgeTable with links between `node_count` highest ranked (by
+        pagerank) nodes, sorted by start nodes.
+        """
+        pagerank_array = Tables.PagerankArray(self.P.pagerank_array)
+        return self.get_link_graph().edgesBetween(
+            pagerank_array.topIds(node_count))
 
     def filter_edges_by_highest_pagerank(self, edge_table, node_count,
                                          endpoints='both'):
@@ -168,10 +203,7 @@ class Data(object):
         `endpoints` allows to apply filtering conditions only to start/end/both
         endpoints of an edge.
         """
-        pagerank_table = Tables.PagerankTable(self.P.pagerank)
-        ids = pipe(
-            pagerank_table.select_ids_by_descending_rank(node_count),
-            ColumnIt(0))
+        ids = Tables.PagerankArray(self.P.pagerank_array).topIds(node_count)
 
         if endpoints == 'both':
             edge_table.filterByNodes(ids)
@@ -236,8 +268,8 @@ class Data(object):
         return ColumnIt(0)(ids_titles), ColumnIt(1)(ids_titles)
 
     def get_ids_embeddings_of_highest_ranked_points(self, point_count):
-        pagerank_table = Tables.PagerankTable(self.P.pagerank)
-        ids = pipe(pagerank_table.select_ids_by_descending_rank(point_count), ColumnIt(0), list)
+        pagerank_array = Tables.PagerankArray(self.P.pagerank_array)
+        ids = pagerank_array.topIds(point_count).tolist()
         embeddings_table = Tables.EmbeddingsTable()
         embeddings_table.load(self.P.embeddings)
         embeddings = imap(embeddings_table.__getitem__, ids)
@@ -263,17 +295,14 @@ class Data(object):
         return ColumnIt(0)(tsne_table.selectAll())
 
     def get_outlinks_of_points(self, ids):
-        edges_table = Tables.EdgeTable(self.P.link_edges)
-        edges_table.filterByNodes(ids)
-        edges_table.sortByStartNode()
-        return edges_table
+        """Get pairs of an id and a list of ids it links to, only links
+        between `ids` are included."""
+        return self.get_link_graph().linkLists(ids)
 
     def get_inlinks_of_points(self, ids):
-        edges_table = Tables.EdgeTable(self.P.link_edges)
-        edges_table.filterByNodes(ids)
-        edges_table.inverseEdges()
-        edges_table.sortByStartNode()
-        return edges_table
+        """Get pairs of an id and a list of ids that link to it, only links
+        between `ids` are included."""
+        return self.get_link_graph().linkLists(ids, reverse=True)
 
     def get_wikimap_points(self):
         joined_table = Tables.Join(
@@ -288,7 +317,8 @@ class Data(object):
         """Get links category -> category."""
         joined_table = Tables.Join(self.P.category_links, self.P.pages)
         edges = Tables.EdgeTable()
-        edges.populate(joined_table.select_links_between_categories())
+        for block in joined_table.select_links_between_categories().blocks():
+            edges.extend(block)
         return edges
 
     def get_reversed_edges_between_categories(self):
@@ -297,10 +327,21 @@ class Data(object):
         edges.inverseEdges()
         return edges
 
-    def get_edges_between_articles_and_categories(self):
-        """Get links article -> category."""
+    def get_edges_between_articles_and_categories(self, memory_budget=None):
+        """
+        Get links article -> category.
+
+        `memory_budget` - if set, links are kept in temporary files next to
+        the category links table instead of memory, and operations on them
+        keep at most about this many megabytes of links in memory.
+        """
         joined_table = Tables.Join(self.P.category_links, self.P.pages)
-        edges = Tables.EdgeTable()
+        if memory_budget is None:
+            edges = Tables.EdgeTable()
+        else:
+            edges = Tables.EdgeTable(
+                memoryBudget=memory_budget * 2**20,
+                tempDir=os.path.dirname(self.P.category_links))
         edges.populate(
             joined_table.select_links_between_articles_and_categories())
         return edges
@@ -326,9 +367,14 @@ class Data(object):
         return FlipIt(joined_table.select_id_category_id_of_tsne_points())
 
     def get_coords_ids_of_points(self):
-        joined_table = Tables.Join(self.P.wikimap_points, self.P.pagerank)
-        data = list(joined_table.select_id_x_y_byRank())
-        return ColumnIt(1, 2)(data), ColumnIt(0)(data)
+        """Get coordinates and ids of points with ranks, by decreasing
+        ranks."""
+        points_table = Tables.WikimapPointsTable(self.P.wikimap_points)
+        data = list(points_table.selectCoordsAndIds())
+        ids = numpy.fromiter(ColumnIt(2)(data), dtype=numpy.int32, count=len(data))
+        positions = Tables.PagerankArray(self.P.pagerank_array).positionsOf(ids)
+        order = [i for i in numpy.argsort(positions, kind='mergesort') if positions[i] >= 0]
+        return [data[i][:2] for i in order], ids[order].tolist()
 
     def get_similarity_datasets(self):
         title_index = Tables.TitleIndex(self.P.title_index)
@@ -381,10 +427,29 @@ class Data(object):
     def get_evaluation_test_names(self):
         return Tables.EvaluationReport(self.P.evaluation_report).get_test_names()
 
-    def set_pages(self, pages):
+    def set_pages(self, pages, checkpoint):
+        """
+        Populate the pages table with chunks of columns.
+
+        Chunks are appended to the rows held by the checkpoint by a background
+        writer, while next chunks are parsed. Progress is recorded in the
+        checkpoint once a chunk is committed.
+        """
+        logger = logging.getLogger(__name__)
+        timer = Utils.SimpleTimer()
         pages_table = Tables.PageTable(self.P.pages)
-        pages_table.create()
-        pages_table.populate(LogIt(1000000)(pages))
+        if checkpoint.chunks == 0:
+            pages_table.create()
+
+        rows = resumed_rows = checkpoint.rows
+        with pages_table.openInserter() as inserter:
+            for (chunk, columns) in enumerate(pages, checkpoint.chunks + 1):
+                rows += len(columns[0])
+                inserter.write(RowIt([columns]), partial(checkpoint.update, chunk, rows))
+                logger.info('Imported {} pages'.format(rows))
+        pages_table.create_index()
+        checkpoint.remove()
+        logger.info(Utils.format_rate('pages', rows - resumed_rows, timer()))
 
     def set_category_links(self, category_links):
         category_links_table = Tables.CategoryLinksTable(self.P.category_links)
@@ -405,13 +470,40 @@ class Data(object):
         edges_table = Tables.EdgeTable(self.P.link_edges)
         edges_table.populate(LogIt(1000000)(edges))
 
-    def set_pagerank(self, pagerank):
+    def set_link_graph(self):
+        """Save the LinkGraph of link edges."""
+        edges_table = Tables.EdgeTable(self.P.link_edges, mapped=True)
+        edges_table.saveCSR(self.P.link_graph)
+
+    def get_pagerank(self):
+        """Return a PagerankArray, or pairs of a node and its rank for builds
+        without it, or None if there are no ranks."""
+        if os.path.exists(self.P.pagerank_array):
+            return Tables.PagerankArray(self.P.pagerank_array)
+        if os.path.exists(self.P.pagerank):
+            pagerank_table = Tables.PagerankTable(self.P.pagerank)
+            return list(pagerank_table.select_id_rank_of_all())
+        return None
+
+    def get_pagerank_iterations(self):
+        """Return iterations of computing ranks and of computing them from
+        uniform ranks, or None if they are unknown."""
+        if not os.path.exists(self.P.pagerank):
+            return None
+        pagerank_table = Tables.PagerankTable(self.P.pagerank)
+        return pagerank_table.select_iterations()
+
+    def set_pagerank(self, ranking, iterations=None, cold_iterations=None):
+        """Save a Ranking of Graph.compute_pagerank and, if both are given,
+        iterations of computing it and of computing it from uniform ranks."""
+        ranking.save(self.P.pagerank_array)
+
         pagerank_table = Tables.PagerankTable(self.P.pagerank)
         pagerank_table.create()
         pagerank_table.populate(
-            imap(
-                lambda (order, (page, rank)): (page, rank, order),
-                enumerate(pagerank)))
+            izip(ranking.ids().tolist(), ranking.ranks().tolist(), xrange(len(ranking))))
+        if iterations is not None and cold_iterations is not None:
+            pagerank_table.set_iterations(iterations, cold_iterations)
 
     def set_embeddings(self, embeddings):
         embeddings.save(self.P.embeddings)
@@ -437,11 +529,11 @@ class Data(object):
 
     def set_outlinks(self, outlinks):
         outlinks_table = Tables.AggregatedLinksTable(self.P.aggregated_outlinks)
-        outlinks_table.create(pipe(outlinks, LogIt(1000000), GroupIt))
+        outlinks_table.create(LogIt(1000000)(outlinks))
 
     def set_inlinks(self, inlinks):
         inlinks_table = Tables.AggregatedLinksTable(self.P.aggregated_inlinks)
-        inlinks_table.create(pipe(inlinks, LogIt(1000000), GroupIt))
+        inlinks_table.create(LogIt(1000000)(inlinks))
 
     def set_wikimap_points(self, points):
         wikimap_points_table = Tables.WikimapPointsTable(self.P.wikimap_points)
@@ -1,4 +1,4 @@
-from itertools import imap, groupby, ifilter
+from itertools import imap, izip, groupby, ifilter, chain
 from operator import itemgetter
 import logging
 import Utils
@@ -100,6 +100,14 @@ class ColumnIt(object):
     def __iter__(self):
         return imap(itemgetter(*self.columns), self.iterator)
 
+class RowIt(object):
+    """Turn an iterator over chunks of columns into an iterator over rows."""
+    def __init__(self, iterator):
+        self.iterator = iterator
+
+    def __iter__(self):
+        return chain.from_iterable(izip(*columns) for columns in self.iterator)
+
 class FlipIt(object):
     def __init__(self, iterator):
         self.iterator = iterator
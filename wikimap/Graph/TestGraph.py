@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from Graph import compute_pagerank, personalized_pagerank
+
+DAMPING_FACTOR = 0.85
+
+# 4 and 9 are sinks, 7 only links to itself and ids between them and up to
+# 1000 have no nodes
+EDGES = numpy.array([
+    (0, 1),
+    (0, 2),
+    (1, 2),
+    (2, 0),
+    (2, 4),
+    (3, 2),
+    (3, 9),
+    (1000, 3),
+    (1000, 0),
+    (7, 7)
+], dtype=numpy.int32)
+
+
+def check(message, condition):
+    if condition:
+        print "[PASS] ", message
+    else:
+        print "[FAIL] ", message
+
+
+def densePagerank(edges, teleport=None, initial=None, iterations=1000):
+    """Return ids of nodes of `edges` and their pageranks computed by a power
+    iteration of the dense transition matrix. Ranks teleport (and mass of
+    sinks moves) by the distribution `teleport` over the ids, uniform by
+    default. The iteration starts from `initial` ranks, by default from
+    `teleport`."""
+    ids = numpy.unique(edges)
+    index = dict((id_, n) for (n, id_) in enumerate(ids))
+    transitions = numpy.zeros((len(ids), len(ids)))
+    for (source, target) in edges:
+        transitions[index[target], index[source]] += 1
+    degrees = transitions.sum(axis=0)
+    sinks = degrees == 0
+    transitions[:, ~sinks] /= degrees[~sinks]
+
+    if teleport is None:
+        teleport = numpy.full(len(ids), 1. / len(ids))
+    ranks = teleport.copy() if initial is None else initial
+    for _ in range(iterations):
+        ranks = DAMPING_FACTOR * (transitions.dot(ranks) + ranks[sinks].sum() * teleport) \
+            + (1 - DAMPING_FACTOR) * teleport
+    return ids, ranks
+
+
+def ranksById(ranking):
+    return dict(zip(ranking.ids().tolist(), ranking.ranks().tolist()))
+
+
+def testPagerank():
+    ids, expected = densePagerank(EDGES)
+    for (name, singlePrecision, tolerance) in [('double', False, 1e-5), ('single', True, 1e-4)]:
+        ranking, _ = compute_pagerank(EDGES, single_precision=singlePrecision)
+        ranks = ranksById(ranking)
+        check(
+            "Pagerank in {} precision".format(name),
+            sorted(ranks) == ids.tolist()
+            and numpy.allclose([ranks[i] for i in ids], expected, rtol=tolerance, atol=0)
+            and abs(sum(ranks.values()) - 1) < tolerance
+        )
+        check(
+            "Pagerank in {} precision sorted by ranks".format(name),
+            (numpy.diff(ranking.ranks()) <= 0).all()
+        )
+
+
+def testInitialRanks():
+    ids = numpy.unique(EDGES)
+    # ranks of a previous graph, of some of the nodes and of a removed one
+    initial = numpy.full(len(ids), 1. / len(ids))
+    initial[ids == 0] = 0.5
+    initial[ids == 1] = 0.3
+    _, expected = densePagerank(EDGES, initial=initial / initial.sum(), iterations=1)
+    ranking, iterations = compute_pagerank(
+        EDGES, tolerance=0, max_iterations=1,
+        initial_ranks=[(0, 0.5), (1, 0.3), (5000, 0.2)])
+    ranks = ranksById(ranking)
+    check(
+        "Pagerank from initial ranks",
+        iterations == 1
+        and numpy.allclose([ranks[i] for i in ids], expected, rtol=1e-12, atol=0)
+    )
+
+
+def testMaxIterations():
+    ids, expected = densePagerank(EDGES, iterations=5)
+    ranking, iterations = compute_pagerank(EDGES, tolerance=0, max_iterations=5)
+    ranks = ranksById(ranking)
+    check(
+        "Maximum iterations of pagerank",
+        iterations == 5
+        and numpy.allclose([ranks[i] for i in ids], expected, rtol=1e-12, atol=0)
+    )
+
+
+def testPersonalizedPagerank():
+    seeds = [[0, 3], [9], [], [5, 2000], [0, 1, 2, 3, 4, 7, 9, 1000]]
+    ids, ranks = personalized_pagerank(EDGES, seeds, tolerance=1e-10)
+    # nodes are numbered in the order of their first occurrence, dense ranks
+    # are by sorted ids
+    sortedIds = numpy.unique(EDGES)
+    positions = numpy.searchsorted(sortedIds, ids)
+    expected = []
+    for seed in seeds[:2]:
+        teleport = numpy.in1d(sortedIds, seed).astype(numpy.float64)
+        _, columnRanks = densePagerank(EDGES, teleport / teleport.sum())
+        expected.append(columnRanks[positions])
+    check(
+        "Personalized pagerank",
+        ranks.shape == (len(ids), len(seeds))
+        and numpy.allclose(ranks[:, :2].sum(axis=0), 1)
+        and numpy.allclose(ranks[:, :2], numpy.transpose(expected), rtol=0, atol=1e-8)
+    )
+    check(
+        "Personalized pagerank of empty and unknown seeds",
+        not ranks[:, 2].any() and not ranks[:, 3].any()
+    )
+    _, globalRanks = densePagerank(EDGES)
+    check(
+        "Personalized pagerank of all nodes",
+        numpy.allclose(ranks[:, 4], globalRanks[positions], rtol=0, atol=1e-8)
+    )
+
+    _, noRanks = personalized_pagerank(EDGES, [])
+    check("Personalized pagerank without seeds", noRanks.shape == (len(ids), 0))
+
+    # seeds of 7, which only links to itself, converge in an iteration, the
+    # other set keeps iterating
+    _, alone = personalized_pagerank(EDGES, [[0, 3]], tolerance=1e-10)
+    _, together = personalized_pagerank(EDGES, [[7], [0, 3]], tolerance=1e-10)
+    check(
+        "Finished personalized sets don't change the rest",
+        (together[:, 1] == alone[:, 0]).all()
+        and together[ids.tolist().index(7), 0] == 1
+    )
+
+
+def main():
+    print "Testing graph algorithms:"
+    testPagerank()
+    testInitialRanks()
+    testMaxIterations()
+    testPersonalizedPagerank()
+
+
+if __name__ == "__main__":
+    main()
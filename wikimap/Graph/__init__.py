@@ -1,11 +1,89 @@
 import graph
+import numpy
 
 
 DEFAULT_AGGREGATION_DEPTH = 1
+DEFAULT_PAGERANK_TOLERANCE = 1e-7
+DEFAULT_PAGERANK_MAX_ITERATIONS = 200
+DEFAULT_PERSONALIZED_PAGERANK_TOLERANCE = 1e-6
 
 
-def pagerank(edges):
-    return graph.pagerank(edges)
+def pagerank(edges, single_precision=False,
+             tolerance=DEFAULT_PAGERANK_TOLERANCE,
+             max_iterations=DEFAULT_PAGERANK_MAX_ITERATIONS,
+             initial_ranks=None):
+    """
+    Return pairs of a node and its pagerank, by decreasing ranks.
+
+    `edges` - an EdgeArray, a (N, 2) int32 array or buffer, which are read
+    without converting edges to Python objects, or an iterable of pairs
+
+    `single_precision` - if True, ranks are stored as float32, which speeds
+    up iterations of big graphs, but limits their precision
+
+    `tolerance` - iterations stop when no rank changes relatively more
+
+    `initial_ranks` - pairs of a node and its rank, or an object with arrays
+    `ids` and `ranks` like Tables.PagerankArray, to start from, like ranks of
+    a previous version of the graph, uniform ranks by default
+    """
+    ranking, _ = compute_pagerank(edges, single_precision, tolerance,
+                                  max_iterations, initial_ranks)
+    return zip(ranking.ids().tolist(), ranking.ranks().tolist())
+
+def compute_pagerank(edges, single_precision=False,
+                     tolerance=DEFAULT_PAGERANK_TOLERANCE,
+                     max_iterations=DEFAULT_PAGERANK_MAX_ITERATIONS,
+                     initial_ranks=None):
+    """
+    Like pagerank, but return a Ranking and the number of iterations.
+
+    The Ranking has arrays `ids()` of nodes by decreasing ranks and their
+    `ranks()`, viewing it without copies, and is saved by `save(path)` to a
+    file read by Tables.PagerankArray.
+    """
+    initial_ids = None
+    if hasattr(initial_ranks, 'ids'):
+        initial_ids, initial_ranks = initial_ranks.ids, initial_ranks.ranks
+    elif initial_ranks is not None:
+        initial_ranks = numpy.array(list(initial_ranks), dtype=numpy.float64).reshape(-1, 2)
+        initial_ids = initial_ranks[:, 0].astype(numpy.int32)
+        initial_ranks = initial_ranks[:, 1]
+
+    if hasattr(edges, 'asNumpy'):
+        edges = edges.asNumpy()
+    if isinstance(edges, (numpy.ndarray, memoryview)):
+        return graph.pagerank_from_buffer(
+            numpy.asarray(edges), single_precision, tolerance, max_iterations,
+            initial_ids, initial_ranks)
+    return graph.pagerank(edges, single_precision, tolerance, max_iterations,
+                          initial_ids, initial_ranks)
+
+def personalized_pagerank(edges, seeds, single_precision=False,
+                          tolerance=DEFAULT_PERSONALIZED_PAGERANK_TOLERANCE,
+                          max_iterations=DEFAULT_PAGERANK_MAX_ITERATIONS):
+    """
+    Return ids of nodes and a (nodes, K) float array of their pageranks
+    personalized to each of K sets of seed nodes, like articles of a
+    category, which jumps only to the seeds of the set.
+
+    Sets are computed together, each iteration passes over edges once for
+    all of them. A set stops iterating when the sum of changes of its ranks
+    is less than `tolerance`.
+
+    `edges` - like in pagerank
+
+    `seeds` - K iterables of ids, ids of nodes without edges are ignored and
+    sets without nodes get zero ranks
+    """
+    if hasattr(edges, 'asNumpy'):
+        edges = edges.asNumpy()
+    if not isinstance(edges, (numpy.ndarray, memoryview)):
+        edges = numpy.array(list(edges), dtype=numpy.int32).reshape(-1, 2)
+    ids, ranks, _ = graph.personalized_pagerank_from_buffer(
+        numpy.asarray(edges), [list(s) for s in seeds], single_precision,
+        tolerance, max_iterations)
+    return ids, ranks
 
 def aggregate(nodes, edges, depth=DEFAULT_AGGREGATION_DEPTH):
     return graph.aggregate(nodes, edges, depth)
@@ -0,0 +1,575 @@
+#pragma once
+
+#include <cmath>
+#include <string>
+#include <vector>
+#include <cstdint>
+#include <cstring>
+#include <fstream>
+#include <utility>
+#include <iostream>
+#include <iomanip>
+#include <algorithm>
+#include <stdexcept>
+
+#include <omp.h>
+
+// Ids of nodes sorted by decreasing ranks, with their ranks.
+//
+// Layout of a saved file, each section starts at a multiple of 8 bytes:
+//   header (magic, node count, size of the index)
+//   int32 ids sorted by decreasing ranks
+//   double ranks of the ids
+//   int32 index, the position of each id in the ids or -1, for ids smaller
+//   than the size of the index
+struct Ranking {
+    struct Header {
+        char magic[8];
+        std::uint64_t count;
+        std::uint64_t index_size;
+    };
+
+    static constexpr char MAGIC[8] = {'W', 'M', 'R', 'A', 'N', 'K', '0', '1'};
+
+    std::vector<int> ids;
+    std::vector<double> ranks;
+
+    size_t size() const { return ids.size(); }
+
+    void save(const std::string& path) const;
+};
+
+constexpr char Ranking::MAGIC[8];
+
+inline void Ranking::save(const std::string& path) const {
+    int max_id = -1;
+    #pragma omp parallel for schedule(static) reduction(max: max_id)
+    for (long i = 0; i < (long)ids.size(); ++i) {
+        max_id = std::max(max_id, ids[i]);
+    }
+    std::vector<int> index(max_id + 1, -1);
+    #pragma omp parallel for schedule(static)
+    for (long i = 0; i < (long)ids.size(); ++i) {
+        index[ids[i]] = i;
+    }
+
+    Header header;
+    std::memcpy(header.magic, MAGIC, sizeof(MAGIC));
+    header.count = ids.size();
+    header.index_size = index.size();
+
+    const char padding[8] = {0};
+    std::ofstream outfile(path.c_str(), std::ios::out | std::ios::binary);
+    if (!outfile) {
+        throw std::runtime_error("Cannot open " + path + " for writing.");
+    }
+    outfile.write((const char*)&header, sizeof(header));
+    outfile.write((const char*)ids.data(), sizeof(int) * ids.size());
+    outfile.write(padding, sizeof(int) * (ids.size() % 2));
+    outfile.write((const char*)ranks.data(), sizeof(double) * ranks.size());
+    outfile.write((const char*)index.data(), sizeof(int) * index.size());
+    if (!outfile) {
+        throw std::runtime_error("Cannot write " + path + ".");
+    }
+}
+
+// Pagerank of a graph given by its edges, stored as a compact CSR of inbound
+// edges over nodes numbered in the order of their first occurrence.
+//
+// An iteration pulls the ranks of the sources of inbound edges of each node,
+// so every rank is written by one thread only. The contribution of a node to
+// each of its outbound edges (its rank times its precomputed inverse out
+// degree) and the mass of sinks are computed in a first pass. Ranks are kept
+// in two buffers which are swapped after each iteration.
+//
+// `Real` is the type of stored ranks. With float the arrays read in each
+// iteration take half the memory, sums are still computed in double, but
+// relative changes below about 1e-6 are not reliable.
+template<class Real = double>
+class CsrPagerank {
+public:
+    typedef std::pair<int, int> Edge;
+
+    CsrPagerank(
+        const Edge* edges,
+        size_t count,
+        bool verbose = true,
+        double convergence_condition = 1e-7,
+        int max_iterations = 200,
+        double damping_factor = 0.85);
+
+    // Starts the next computation from ranks of nodes with ids `ids` (of
+    // another graph) instead of uniform ranks. Nodes without ranks get
+    // uniform ones and ranks are normalized to sum to 1.
+    void set_initial_ranks(const int* ids, const double* ranks, size_t count);
+
+    void compute();
+
+    // iterations of the last computation
+    int iterations() const { return iterations_; }
+
+    Ranking ranking() const;
+
+    // Computes pagerank personalized to each of K sets of seed ids, which
+    // teleports (and moves the mass of sinks) uniformly to the seeds of the
+    // set. Ids without nodes are ignored, sets without nodes get zero ranks.
+    //
+    // Sets are iterated together, so that each pass over the edges computes
+    // ranks of all of them. A set stops iterating when its ranks change less
+    // than `convergence_condition` in total (ranks of nodes not reachable
+    // from seeds are 0, so changes are not relative), the rest go on.
+    //
+    // Returns ranks of nodes by set, row-major node_count() x K, nodes in
+    // the order of nodes(). Sets the iterations of each set.
+    std::vector<double> personalized_ranks(
+        const std::vector<std::vector<int>>& seeds,
+        std::vector<int>& iterations) const;
+
+    // ids of nodes by their numbers
+    const std::vector<int>& nodes() const { return nodes_; }
+
+    size_t node_count() const { return nodes_.size(); }
+    size_t edge_count() const { return in_sources_.size(); }
+
+    bool verbose;
+    double convergence_condition;
+    int max_iterations;
+    double damping_factor;
+
+private:
+    void build(const Edge* edges, size_t count);
+    void initialize();
+    double do_iteration();
+    // numbers of nodes by ids, -1 for ids without nodes
+    std::vector<int> id_index() const;
+
+    // ids of nodes
+    std::vector<int> nodes_;
+    // inbound edges of node n are sources in_sources_[in_offsets_[n]] to
+    // in_sources_[in_offsets_[n + 1] - 1]
+    std::vector<size_t> in_offsets_;
+    std::vector<int> in_sources_;
+    // zero for sinks
+    std::vector<Real> inverse_out_degrees_;
+
+    std::vector<Real> ranks_;
+    std::vector<Real> next_ranks_;
+    std::vector<Real> contributions_;
+
+    bool seeded_ = false;
+    int iterations_ = 0;
+};
+
+template<class Real>
+CsrPagerank<Real>::CsrPagerank(
+        const Edge* edges,
+        size_t count,
+        bool verbose,
+        double convergence_condition,
+        int max_iterations,
+        double damping_factor)
+: verbose(verbose),
+  convergence_condition(convergence_condition),
+  max_iterations(max_iterations),
+  damping_factor(damping_factor)
+{
+    double start = omp_get_wtime();
+    build(edges, count);
+    if (verbose) {
+        std::cerr << "Built graph of " << node_count() << " nodes and "
+            << edge_count() << " edges in " << std::setprecision(3)
+            << omp_get_wtime() - start << "s.\n";
+    }
+}
+
+template<class Real>
+void CsrPagerank<Real>::build(const Edge* edges, size_t count) {
+    long max_id = -1;
+    long min_id = 0;
+    #pragma omp parallel for schedule(static) reduction(max: max_id) reduction(min: min_id)
+    for (long i = 0; i < (long)count; ++i) {
+        max_id = std::max(max_id, (long)std::max(edges[i].first, edges[i].second));
+        min_id = std::min(min_id, (long)std::min(edges[i].first, edges[i].second));
+    }
+    if (min_id < 0) {
+        throw std::invalid_argument("Ids of nodes must not be negative.");
+    }
+
+    // internal nodes of ids, -1 for ids without nodes
+    std::vector<int> index(max_id + 1, -1);
+    for (size_t i = 0; i < count; ++i) {
+        for (int id : {edges[i].first, edges[i].second}) {
+            if (index[id] < 0) {
+                index[id] = nodes_.size();
+                nodes_.push_back(id);
+            }
+        }
+    }
+
+    const long nodes = nodes_.size();
+    std::vector<size_t> out_degrees(nodes, 0);
+    in_offsets_.assign(nodes + 1, 0);
+    #pragma omp parallel for schedule(static)
+    for (long i = 0; i < (long)count; ++i) {
+        #pragma omp atomic
+        ++out_degrees[index[edges[i].first]];
+        #pragma omp atomic
+        ++in_offsets_[index[edges[i].second] + 1];
+    }
+    for (long n = 0; n < nodes; ++n) {
+        in_offsets_[n + 1] += in_offsets_[n];
+    }
+
+    // inbound edges of a node keep the order of `edges`
+    std::vector<size_t> positions(in_offsets_.begin(), in_offsets_.end() - 1);
+    in_sources_.resize(count);
+    for (size_t i = 0; i < count; ++i) {
+        in_sources_[positions[index[edges[i].second]]++] = index[edges[i].first];
+    }
+
+    inverse_out_degrees_.resize(nodes);
+    #pragma omp parallel for schedule(static)
+    for (long n = 0; n < nodes; ++n) {
+        inverse_out_degrees_[n] = out_degrees[n] > 0 ? Real(1) / out_degrees[n] : Real(0);
+    }
+}
+
+template<class Real>
+void CsrPagerank<Real>::set_initial_ranks(
+        const int* ids,
+        const double* ranks,
+        size_t count) {
+
+    const long nodes = node_count();
+    const std::vector<int> index = id_index();
+
+    ranks_.assign(nodes, Real(1. / nodes));
+    size_t known = 0;
+    #pragma omp parallel for schedule(static) reduction(+: known)
+    for (long i = 0; i < (long)count; ++i) {
+        if (ids[i] >= 0 && ids[i] < (long)index.size() && index[ids[i]] >= 0) {
+            ranks_[index[ids[i]]] = Real(ranks[i]);
+            ++known;
+        }
+    }
+
+    double sum = 0.;
+    #pragma omp parallel for schedule(static) reduction(+: sum)
+    for (long n = 0; n < nodes; ++n) {
+        sum += ranks_[n];
+    }
+    #pragma omp parallel for schedule(static)
+    for (long n = 0; n < nodes; ++n) {
+        ranks_[n] = Real(ranks_[n] / sum);
+    }
+    seeded_ = true;
+
+    if (verbose) {
+        std::cerr << "Starting from given ranks of " << known << " of "
+            << nodes << " nodes.\n";
+    }
+}
+
+template<class Real>
+void CsrPagerank<Real>::compute() {
+    if (verbose) {
+        std::cerr << "COMPUTING PAGERANK\n";
+        std::cerr << "Iterating until relative change less than "
+            << convergence_condition << " or max " << max_iterations
+            << " iterations.\n";
+    }
+
+    if (!seeded_) {
+        initialize();
+    }
+    next_ranks_.resize(node_count());
+    contributions_.resize(node_count());
+    seeded_ = false;
+
+    double start = omp_get_wtime();
+    int iteration = 0;
+    for (; ; ++iteration) {
+        double iteration_start = omp_get_wtime();
+        double convergence = do_iteration();
+
+        if (verbose) {
+            std::cerr << "Iteration " << std::setw(3) << iteration << ": "
+                << "relative change: " << std::setprecision(3) << convergence
+                << " (" << omp_get_wtime() - iteration_start << "s)\n";
+        }
+
+        if (convergence < convergence_condition) {
+            if (verbose) {
+                std::cerr << "Reached convergence, stopping.\n";
+            }
+            break;
+        } else if (iteration + 1 >= max_iterations) {
+            if (verbose) {
+                std::cerr << "Reached maximum number of iterations, stopping."
+                    << std::endl;
+            }
+            break;
+        }
+    }
+
+    iterations_ = iteration + 1;
+    if (verbose) {
+        double seconds = omp_get_wtime() - start;
+        std::cerr << "Iterations took " << std::setprecision(3) << seconds
+            << "s (" << seconds / iterations_ << "s per iteration).\n";
+    }
+}
+
+template<class Real>
+Ranking CsrPagerank<Real>::ranking() const {
+    typedef std::pair<int, double> Pair;
+
+    std::vector<Pair> res(ranks_.size());
+
+    #pragma omp parallel for schedule(static)
+    for (long i = 0; i < (long)ranks_.size(); ++i) {
+        res[i] = std::make_pair(nodes_[i], (double)ranks_[i]);
+    }
+
+    std::sort(res.begin(), res.end(), [] (const Pair& lhs, const Pair& rhs) {
+        return lhs.second > rhs.second;
+    });
+
+    Ranking ranking;
+    ranking.ids.resize(res.size());
+    ranking.ranks.resize(res.size());
+    #pragma omp parallel for schedule(static)
+    for (long i = 0; i < (long)res.size(); ++i) {
+        ranking.ids[i] = res[i].first;
+        ranking.ranks[i] = res[i].second;
+    }
+    return ranking;
+}
+
+template<class Real>
+std::vector<double> CsrPagerank<Real>::personalized_ranks(
+        const std::vector<std::vector<int>>& seeds,
+        std::vector<int>& iterations) const {
+
+    const long nodes = node_count();
+    const size_t sets = seeds.size();
+    const std::vector<int> index = id_index();
+
+    // seed nodes of sets
+    std::vector<std::vector<int>> seed_nodes(sets);
+    for (size_t k = 0; k < sets; ++k) {
+        for (int id : seeds[k]) {
+            if (id >= 0 && id < (long)index.size() && index[id] >= 0) {
+                seed_nodes[k].push_back(index[id]);
+            }
+        }
+        std::sort(seed_nodes[k].begin(), seed_nodes[k].end());
+        seed_nodes[k].erase(
+            std::unique(seed_nodes[k].begin(), seed_nodes[k].end()),
+            seed_nodes[k].end());
+    }
+
+    std::vector<double> result(nodes * sets, 0.);
+    iterations.assign(sets, 0);
+
+    // sets still iterating, ranks of node n and the j-th of them are at
+    // n * active.size() + j
+    std::vector<size_t> active;
+    for (size_t k = 0; k < sets; ++k) {
+        if (!seed_nodes[k].empty()) {
+            active.push_back(k);
+        }
+    }
+    size_t width = active.size();
+    std::vector<Real> ranks(nodes * width, Real(0));
+    for (size_t j = 0; j < width; ++j) {
+        for (int n : seed_nodes[active[j]]) {
+            ranks[n * width + j] = Real(1. / seed_nodes[active[j]].size());
+        }
+    }
+    std::vector<Real> next_ranks;
+    std::vector<Real> contributions;
+
+    if (verbose) {
+        std::cerr << "COMPUTING PERSONALIZED PAGERANK\n";
+        std::cerr << "Iterating " << width << " sets of seeds until change less than "
+            << convergence_condition << " or max " << max_iterations
+            << " iterations.\n";
+    }
+
+    double start = omp_get_wtime();
+    for (int iteration = 0; width > 0; ++iteration) {
+        double iteration_start = omp_get_wtime();
+        next_ranks.resize(nodes * width);
+        contributions.resize(nodes * width);
+
+        std::vector<double> sink_mass(width, 0.);
+        #pragma omp parallel
+        {
+            std::vector<double> thread_sink_mass(width, 0.);
+            #pragma omp for schedule(static)
+            for (long n = 0; n < nodes; ++n) {
+                const Real* rank = &ranks[n * width];
+                Real* contribution = &contributions[n * width];
+                const Real inverse_out_degree = inverse_out_degrees_[n];
+                for (size_t j = 0; j < width; ++j) {
+                    contribution[j] = rank[j] * inverse_out_degree;
+                }
+                if (inverse_out_degree == 0) {
+                    for (size_t j = 0; j < width; ++j) {
+                        thread_sink_mass[j] += rank[j];
+                    }
+                }
+            }
+            #pragma omp critical
+            for (size_t j = 0; j < width; ++j) {
+                sink_mass[j] += thread_sink_mass[j];
+            }
+        }
+
+        // one pass over inbound edges updates ranks of all sets
+        #pragma omp parallel
+        {
+            std::vector<double> sums(width);
+            #pragma omp for schedule(dynamic, 1024)
+            for (long n = 0; n < nodes; ++n) {
+                std::fill(sums.begin(), sums.end(), 0.);
+                for (size_t e = in_offsets_[n]; e < in_offsets_[n + 1]; ++e) {
+                    const Real* contribution = &contributions[in_sources_[e] * width];
+                    for (size_t j = 0; j < width; ++j) {
+                        sums[j] += contribution[j];
+                    }
+                }
+                Real* next_rank = &next_ranks[n * width];
+                for (size_t j = 0; j < width; ++j) {
+                    next_rank[j] = Real(damping_factor * sums[j]);
+                }
+            }
+        }
+
+        for (size_t j = 0; j < width; ++j) {
+            const auto& set_nodes = seed_nodes[active[j]];
+            const double teleport = (1. - damping_factor + damping_factor * sink_mass[j]) / set_nodes.size();
+            for (int n : set_nodes) {
+                next_ranks[n * width + j] += Real(teleport);
+            }
+        }
+
+        std::vector<double> changes(width, 0.);
+        #pragma omp parallel
+        {
+            std::vector<double> thread_changes(width, 0.);
+            #pragma omp for schedule(static)
+            for (long i = 0; i < nodes * (long)width; ++i) {
+                thread_changes[i % width] += std::fabs((double)next_ranks[i] - ranks[i]);
+            }
+            #pragma omp critical
+            for (size_t j = 0; j < width; ++j) {
+                changes[j] += thread_changes[j];
+            }
+        }
+        ranks.swap(next_ranks);
+
+        // finished sets are copied to the result and removed from ranks
+        std::vector<size_t> remaining;
+        for (size_t j = 0; j < width; ++j) {
+            if (changes[j] < convergence_condition || iteration + 1 >= max_iterations) {
+                iterations[active[j]] = iteration + 1;
+                #pragma omp parallel for schedule(static)
+                for (long n = 0; n < nodes; ++n) {
+                    result[n * sets + active[j]] = ranks[n * width + j];
+                }
+            } else {
+                remaining.push_back(j);
+            }
+        }
+
+        if (verbose) {
+            std::cerr << "Iteration " << std::setw(3) << iteration << ": "
+                << "max change: " << std::setprecision(3)
+                << *std::max_element(changes.begin(), changes.end())
+                << ", " << width - remaining.size() << " of " << width
+                << " sets finished (" << omp_get_wtime() - iteration_start << "s)\n";
+        }
+
+        if (remaining.size() < width) {
+            std::vector<Real> remaining_ranks(nodes * remaining.size());
+            #pragma omp parallel for schedule(static)
+            for (long n = 0; n < nodes; ++n) {
+                for (size_t j = 0; j < remaining.size(); ++j) {
+                    remaining_ranks[n * remaining.size() + j] = ranks[n * width + remaining[j]];
+                }
+            }
+            ranks.swap(remaining_ranks);
+            for (size_t j = 0; j < remaining.size(); ++j) {
+                remaining[j] = active[remaining[j]];
+            }
+            active.swap(remaining);
+            width = active.size();
+        }
+    }
+
+    if (verbose) {
+        std::cerr << "Iterations took " << std::setprecision(3)
+            << omp_get_wtime() - start << "s.\n";
+    }
+    return result;
+}
+
+template<class Real>
+std::vector<int> CsrPagerank<Real>::id_index() const {
+    const long nodes = node_count();
+    int max_id = -1;
+    #pragma omp parallel for schedule(static) reduction(max: max_id)
+    for (long n = 0; n < nodes; ++n) {
+        max_id = std::max(max_id, nodes_[n]);
+    }
+    std::vector<int> index(max_id + 1, -1);
+    #pragma omp parallel for schedule(static)
+    for (long n = 0; n < nodes; ++n) {
+        index[nodes_[n]] = n;
+    }
+    return index;
+}
+
+template<class Real>
+void CsrPagerank<Real>::initialize() {
+    ranks_.assign(node_count(), Real(1. / node_count()));
+}
+
+template<class Real>
+double CsrPagerank<Real>::do_iteration() {
+    const long nodes = node_count();
+
+    double sink_mass = 0.;
+    #pragma omp parallel for schedule(static) reduction(+: sink_mass)
+    for (long n = 0; n < nodes; ++n) {
+        contributions_[n] = ranks_[n] * inverse_out_degrees_[n];
+        if (inverse_out_degrees_[n] == 0) {
+            sink_mass += ranks_[n];
+        }
+    }
+
+    const double damping = (1. - damping_factor + damping_factor * sink_mass) / nodes;
+    double worst_conv = 0.;
+
+    // chunks even out nodes with many inbound edges
+    #pragma omp parallel for schedule(dynamic, 1024) reduction(max: worst_conv)
+    for (long n = 0; n < nodes; ++n) {
+        double sum = 0.;
+        for (size_t e = in_offsets_[n]; e < in_offsets_[n + 1]; ++e) {
+            sum += contributions_[in_sources_[e]];
+        }
+        next_ranks_[n] = Real(damping + damping_factor * sum);
+
+        // because of damping ranks are never 0
+        double conv = std::fabs((double)next_ranks_[n] / ranks_[n] - 1.);
+        if (conv > worst_conv) {
+            worst_conv = conv;
+        }
+    }
+
+    ranks_.swap(next_ranks_);
+
+    return worst_conv;
+}
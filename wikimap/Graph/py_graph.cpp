@@ -1,16 +1,80 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
+#include <pybind11/numpy.h>
 
 #include <algorithm>
 #include <iterator>
 
 #include "category_aggregator.hpp"
-#include "graph.hpp"
-#include "algorithms.hpp"
+#include "pagerank.hpp"
 
 
 namespace py = pybind11;
 
+typedef std::pair<Page, Page> Link;
+
+typedef py::array_t<Page, py::array::c_style | py::array::forcecast> IdArray;
+typedef py::array_t<double, py::array::c_style | py::array::forcecast> RankArray;
+
+// Returns the ranking of nodes and the number of iterations.
+template<class Real>
+std::pair<Ranking, int> compute_pagerank(
+        const Link* links, size_t count, double convergence_condition,
+        int max_iterations, py::object initial_ids, py::object initial_ranks) {
+
+    CsrPagerank<Real> pagerank(links, count, true, convergence_condition, max_iterations);
+    if (!initial_ids.is_none()) {
+        auto ids = initial_ids.cast<IdArray>();
+        auto ranks = initial_ranks.cast<RankArray>();
+        if (ids.size() != ranks.size()) {
+            throw std::runtime_error("Initial ids and ranks must have the same size.");
+        }
+        pagerank.set_initial_ranks(ids.data(), ranks.data(), ids.size());
+    }
+    pagerank.compute();
+    return std::make_pair(pagerank.ranking(), pagerank.iterations());
+}
+
+std::pair<Ranking, int> compute_pagerank(
+        const Link* links, size_t count, bool single_precision,
+        double convergence_condition, int max_iterations,
+        py::object initial_ids, py::object initial_ranks) {
+    if (single_precision) {
+        return compute_pagerank<float>(links, count, convergence_condition,
+            max_iterations, initial_ids, initial_ranks);
+    }
+    return compute_pagerank<double>(links, count, convergence_condition,
+        max_iterations, initial_ids, initial_ranks);
+}
+
+// Moves `values` to an array of the given shape, which owns them.
+template<class T>
+py::array_t<T> as_array(std::vector<T>&& values, std::vector<size_t> shape) {
+    auto owned = new std::vector<T>(std::move(values));
+    py::capsule owner(owned, [] (void* pointer) {
+        delete (std::vector<T>*)pointer;
+    });
+    return py::array_t<T>(shape, owned->data(), owner);
+}
+
+// Returns ids of nodes, a (nodes, sets) array of ranks of nodes personalized
+// to each set of seeds and iterations of sets.
+template<class Real>
+py::tuple compute_personalized_pagerank(
+        const Link* links, size_t count,
+        const std::vector<std::vector<Page>>& seeds,
+        double convergence_condition, int max_iterations) {
+
+    CsrPagerank<Real> pagerank(links, count, true, convergence_condition, max_iterations);
+    std::vector<int> iterations;
+    auto ranks = pagerank.personalized_ranks(seeds, iterations);
+    std::vector<Page> ids(pagerank.nodes());
+    return py::make_tuple(
+        as_array(std::move(ids), {pagerank.node_count()}),
+        as_array(std::move(ranks), {pagerank.node_count(), seeds.size()}),
+        iterations);
+}
+
 PYBIND11_PLUGIN(graph) {
     py::module m("graph");
 
@@ -41,19 +105,80 @@ PYBIND11_PLUGIN(graph) {
         return aggregator.aggregate(max_depth);
     });
 
-    m.def("pagerank", [] (py::iterable links) {
-        typedef std::pair<Page, Page> Link;
-        // const std::vector<std::pair<Page, Page>>& links)
-        Graph<Page> graph;
+    py::class_<Ranking>(m, "Ranking")
+        .def("__len__", &Ranking::size)
+        .def("save", &Ranking::save)
+        // arrays viewing the ranking keep it alive
+        .def("ids", [] (py::object self) {
+            const auto& ranking = self.cast<const Ranking&>();
+            return py::array(ranking.ids.size(), ranking.ids.data(), self);
+        })
+        .def("ranks", [] (py::object self) {
+            const auto& ranking = self.cast<const Ranking&>();
+            return py::array(ranking.ranks.size(), ranking.ranks.data(), self);
+        });
+
+    m.def("pagerank", [] (
+            py::iterable links,
+            bool single_precision,
+            double convergence_condition,
+            int max_iterations,
+            py::object initial_ids,
+            py::object initial_ranks) {
+
+        std::vector<Link> links_v;
         for (const auto& link_handle : links) {
-            auto link = link_handle.cast<Link>();
-            graph.checked_add_edge(link.first, link.second);
+            links_v.push_back(link_handle.cast<Link>());
         }
 
-        Pagerank<decltype(graph)> pagerank(graph);
-        pagerank.compute();
-        return pagerank.sorted_by_decreasing_ranks();
-    });
+        return compute_pagerank(links_v.data(), links_v.size(),
+            single_precision, convergence_condition, max_iterations,
+            initial_ids, initial_ranks);
+    }, py::arg("links"), py::arg("single_precision") = false,
+       py::arg("convergence_condition") = 1e-7, py::arg("max_iterations") = 200,
+       py::arg("initial_ids") = py::none(), py::arg("initial_ranks") = py::none());
+
+    // links as a (N, 2) array, read without converting them to Python objects
+    m.def("pagerank_from_buffer", [] (
+            IdArray links,
+            bool single_precision,
+            double convergence_condition,
+            int max_iterations,
+            py::object initial_ids,
+            py::object initial_ranks) {
+
+        if (links.ndim() != 2 || links.shape(1) != 2) {
+            throw std::runtime_error("Links must be a (N, 2) array.");
+        }
+
+        return compute_pagerank((const Link*)links.data(), links.shape(0),
+            single_precision, convergence_condition, max_iterations,
+            initial_ids, initial_ranks);
+    }, py::arg("links"), py::arg("single_precision") = false,
+       py::arg("convergence_condition") = 1e-7, py::arg("max_iterations") = 200,
+       py::arg("initial_ids") = py::none(), py::arg("initial_ranks") = py::none());
+
+    m.def("personalized_pagerank_from_buffer", [] (
+            IdArray links,
+            const std::vector<std::vector<Page>>& seeds,
+            bool single_precision,
+            double convergence_condition,
+            int max_iterations) {
+
+        if (links.ndim() != 2 || links.shape(1) != 2) {
+            throw std::runtime_error("Links must be a (N, 2) array.");
+        }
+
+        if (single_precision) {
+            return compute_personalized_pagerank<float>(
+                (const Link*)links.data(), links.shape(0), seeds,
+                convergence_condition, max_iterations);
+        }
+        return compute_personalized_pagerank<double>(
+            (const Link*)links.data(), links.shape(0), seeds,
+            convergence_condition, max_iterations);
+    }, py::arg("links"), py::arg("seeds"), py::arg("single_precision") = false,
+       py::arg("convergence_condition") = 1e-6, py::arg("max_iterations") = 200);
 
     return m.ptr();
 }
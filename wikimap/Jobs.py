@@ -28,14 +28,15 @@ class DownloadPagesDump(Job):
             outputs=[P.pages_dump])
 
         self.config = {
-            'language': 'en'
+            'language': 'en',
+            'streaming': False
         }
 
     def __call__(self):
         url = 'https://dumps.wikimedia.org/{}wiki/latest/{}wiki-latest-page.sql.gz'.format(
             self.config['language'],
             self.config['language'])
-        self.data.download_pages_dump(url)
+        self.data.download_pages_dump(url, background=self.config['streaming'])
 
 
 class DownloadLinksDump(Job):
@@ -47,14 +48,15 @@ class DownloadLinksDump(Job):
             outputs=[P.links_dump])
 
         self.config = {
-            'language': 'en'
+            'language': 'en',
+            'streaming': False
         }
 
     def __call__(self):
         url = 'https://dumps.wikimedia.org/{}wiki/latest/{}wiki-latest-pagelinks.sql.gz'.format(
             self.config['language'],
             self.config['language'])
-        self.data.download_links_dump(url)
+        self.data.download_links_dump(url, background=self.config['streaming'])
 
 
 class DownloadCategoryLinksDump(Job):
@@ -66,14 +68,15 @@ class DownloadCategoryLinksDump(Job):
             outputs=[P.category_links_dump])
 
         self.config = {
-            'language': 'en'
+            'language': 'en',
+            'streaming': False
         }
 
     def __call__(self):
         url = 'https://dumps.wikimedia.org/{}wiki/latest/{}wiki-latest-categorylinks.sql.gz'.format(
             self.config['language'],
             self.config['language'])
-        self.data.download_category_links_dump(url)
+        self.data.download_category_links_dump(url, background=self.config['streaming'])
 
 
 class DownloadPagePropertiesDump(Job):
@@ -85,14 +88,15 @@ class DownloadPagePropertiesDump(Job):
             outputs=[P.page_properties_dump])
 
         self.config = {
-            'language': 'en'
+            'language': 'en',
+            'streaming': False
         }
 
     def __call__(self):
         url = 'https://dumps.wikimedia.org/{}wiki/latest/{}wiki-latest-page_props.sql.gz'.format(
             self.config['language'],
             self.config['language'])
-        self.data.download_page_properties_dump(url)
+        self.data.download_page_properties_dump(url, background=self.config['streaming'])
 
 
 class DownloadRedirectsDump(Job):
@@ -104,14 +108,15 @@ class DownloadRedirectsDump(Job):
             outputs=[P.redirects_dump])
 
         self.config = {
-            'language': 'en'
+            'language': 'en',
+            'streaming': False
         }
 
     def __call__(self):
         url = 'https://dumps.wikimedia.org/{}wiki/latest/{}wiki-latest-redirect.sql.gz'.format(
             self.config['language'],
             self.config['language'])
-        self.data.download_redirects_dump(url)
+        self.data.download_redirects_dump(url, background=self.config['streaming'])
 
 
 class DownloadEvaluationDatasets(Job):
@@ -137,9 +142,16 @@ class ImportPageTable(Job):
             inputs=[P.pages_dump],
             outputs=[P.pages])
 
+        self.config = {
+            'checkpoint_interval': 4
+        }
+
     def __call__(self):
-        pages = self.data.import_pages()
-        self.data.set_pages(pages)
+        checkpoint = self.data.get_pages_checkpoint(
+            self.config['checkpoint_interval'])
+        pages = self.data.import_pages(checkpoint)
+        self.data.set_pages(pages, checkpoint)
+        self.logs.append(checkpoint.get_summary())
 
 
 class ImportPagePropertiesTable(Job):
@@ -193,10 +205,30 @@ class CreateLinkEdgesTable(Job):
             inputs=[P.links_dump, P.pages],
             outputs=[P.link_edges])
 
+        self.config = {
+            'checkpoint_interval': 4,
+            'compress': False
+        }
+
     def __call__(self):
-        links = self.data.import_links()
-        links = self.data.map_links_to_link_edges(links)
-        self.data.set_link_edges(links)
+        checkpoint = self.data.get_link_edges_checkpoint(
+            self.config['checkpoint_interval'])
+        self.data.import_link_edges(checkpoint)
+        self.logs.append(checkpoint.get_summary())
+        if self.config['compress']:
+            self.data.compress_link_edges()
+
+
+class CreateLinkGraph(Job):
+    def __init__(self):
+        super(CreateLinkGraph, self).__init__(
+            'CREATE LINK GRAPH',
+            alias='graph',
+            inputs=[P.link_edges],
+            outputs=[P.link_graph])
+
+    def __call__(self):
+        self.data.set_link_graph()
 
 
 class ComputePagerank(Job):
@@ -204,14 +236,45 @@ class ComputePagerank(Job):
         super(ComputePagerank, self).__init__(
             'COMPUTE PAGERANK',
             alias='prank',
-            inputs=[P.link_edges],
-            outputs=[P.pagerank])
+            inputs=[P.link_graph],
+            outputs=[P.pagerank, P.pagerank_array])
+
+        self.config = {
+            # store ranks as float32 while iterating
+            'single_precision': False,
+            'tolerance': Graph.DEFAULT_PAGERANK_TOLERANCE,
+            'max_iterations': Graph.DEFAULT_PAGERANK_MAX_ITERATIONS,
+            # start from ranks of the base build
+            'warm_start': False
+        }
 
     def __call__(self):
-        edges = self.data.get_link_edges()
-        edges = self.data.filter_edges_by_node_count(edges, min_count=10)
-        pagerank = Graph.pagerank(edges)
-        self.data.set_pagerank(pagerank)
+        edges = self.data.get_links_between_nodes_of_degree(min_degree=10)
+
+        initial_ranks = None
+        if self.config['warm_start'] and self.base_data:
+            initial_ranks = self.base_data.get_pagerank()
+
+        ranking, iterations = Graph.compute_pagerank(
+            edges,
+            single_precision=self.config['single_precision'],
+            tolerance=self.config['tolerance'],
+            max_iterations=self.config['max_iterations'],
+            initial_ranks=initial_ranks)
+
+        cold_iterations = iterations
+        if initial_ranks is not None:
+            cold_iterations = None
+            base_iterations = self.base_data.get_pagerank_iterations()
+            message = 'Pagerank started from ranks of the base build and took {} iterations'.format(iterations)
+            if base_iterations is not None:
+                cold_iterations = base_iterations[1]
+                message += ', {} fewer than from uniform ranks ({})'.format(
+                    cold_iterations - iterations, cold_iterations)
+            self.logs.append(message)
+            self._logger.info(message)
+
+        self.data.set_pagerank(ranking, iterations, cold_iterations)
 
 
 class ComputeEmbeddingsUsingLinks(Job):
@@ -219,7 +282,7 @@ class ComputeEmbeddingsUsingLinks(Job):
         super(ComputeEmbeddingsUsingLinks, self).__init__(
             'COMPUTE EMBEDDINGS',
             alias='embed',
-            inputs=[P.link_edges, P.pagerank],
+            inputs=[P.link_graph, P.pagerank_array],
             outputs=[P.embeddings])
 
         self.config = {
@@ -237,9 +300,7 @@ class ComputeEmbeddingsUsingLinks(Job):
         }
 
     def __call__(self):
-        data = self.data.get_link_edges()
-        data = self.data.filter_edges_by_highest_pagerank(
-            data,
+        data = self.data.get_links_between_highest_ranked_nodes(
             self.config['node_count'])
 
         if self.config['method'] == 'neighbor_list':
@@ -264,7 +325,7 @@ class ComputeEmbeddingsUsingLinksAndCategories(Job):
         super(ComputeEmbeddingsUsingLinksAndCategories, self).__init__(
             'COMPUTE EMBEDDINGS',
             alias='embed',
-            inputs=[P.link_edges, P.pagerank, P.category_links],
+            inputs=[P.link_graph, P.pagerank_array, P.category_links],
             outputs=[P.embeddings])
 
         self.config = {
@@ -278,16 +339,17 @@ class ComputeEmbeddingsUsingLinksAndCategories(Job):
             'negative_samples': Embeddings.DEFAULT_NEGATIVE_SAMPLES,
             'epoch_count': Embeddings.DEFAULT_EPOCH_COUNT,
             'walk_length': Embeddings.DEFAULT_WALK_LENGTH,
-            'categories': Embeddings.DEFAULT_USE_CATEGORIES
+            'categories': Embeddings.DEFAULT_USE_CATEGORIES,
+            # megabytes of category edges kept in memory, all if None
+            'memory_budget': None
         }
 
     def __call__(self):
-        edges = self.data.get_link_edges()
-        edges = self.data.filter_edges_by_highest_pagerank(
-            edges,
+        edges = self.data.get_links_between_highest_ranked_nodes(
             self.config['node_count'])
 
-        category_edges = self.data.get_edges_between_articles_and_categories()
+        category_edges = self.data.get_edges_between_articles_and_categories(
+            self.config['memory_budget'])
         category_edges = self.data.filter_edges_by_highest_pagerank(
             category_edges,
             self.config['node_count'],
@@ -359,7 +421,7 @@ class ComputeTSNE(Job):
         super(ComputeTSNE, self).__init__(
             'COMPUTE TSNE',
             alias='tsne',
-            inputs=[P.embeddings, P.pagerank],
+            inputs=[P.embeddings, P.pagerank_array],
             outputs=[P.tsne])
 
         self.config = {
@@ -413,7 +475,7 @@ class CreateAggregatedLinksTables(Job):
         super(CreateAggregatedLinksTables, self).__init__(
             'CREATE AGGREGATED LINKS TABLES',
             alias='agg',
-            inputs=[P.link_edges, P.tsne],
+            inputs=[P.link_graph, P.tsne],
             outputs=[P.aggregated_inlinks, P.aggregated_outlinks])
 
     def __call__(self):
@@ -465,7 +527,7 @@ class CreateZoomIndex(Job):
         super(CreateZoomIndex, self).__init__(
             'CREATE ZOOM INDEX',
             alias='zoom',
-            inputs=[P.wikimap_points, P.pagerank],
+            inputs=[P.wikimap_points, P.pagerank_array],
             outputs=[P.zoom_index, P.wikimap_points, P.metadata])
 
         self.config = {
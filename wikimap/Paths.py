@@ -30,6 +30,7 @@ class AbstractPathGroup(object):
 class AbstractPaths(object):
     config = AbstractPath('config')
     summary = AbstractPath('summary.txt')
+    metrics = AbstractPath('metrics')
     pages_dump = AbstractPath('page.sql.gz')
     links_dump = AbstractPath('pagelinks.sql.gz')
     category_links_dump = AbstractPath('categorylinks.sql.gz')
@@ -40,6 +41,7 @@ class AbstractPaths(object):
     page_properties = AbstractPath('page_properties.db')
     redirects = AbstractPath('redirects.db')
     pagerank = AbstractPath('pagerank.db')
+    pagerank_array = AbstractPath('pagerank.bin')
     tsne = AbstractPath('tsne.db')
     high_dimensional_neighbors = AbstractPath('hdnn.db')
     low_dimensional_neighbors = AbstractPath('ldnn.db')
@@ -48,6 +50,7 @@ class AbstractPaths(object):
     metadata = AbstractPath('metadata.db')
     zoom_index = AbstractPath('zoom_index.idx')
     link_edges = AbstractPath('link_edges.bin')
+    link_graph = AbstractPath('link_graph.csr')
     embeddings = AbstractPath('embeddings.bin')
     aggregated_inlinks = AbstractPath('aggregated_inlinks.cdb')
     aggregated_outlinks = AbstractPath('aggregated_outlinks.cdb')
@@ -1,60 +1,194 @@
 from edgearrayext import *
+import os
+import numpy
 import logging
+import tempfile
 import collections
 
+# bytes of an edge in memory and in files
+EDGE_SIZE = 8
+
+
+def asNodeIds(nodes):
+    """Return ids of nodes given as an iterable, a numpy array or a buffer of
+    int32 values as a contiguous int32 array. Contiguous int32 arrays are not
+    copied."""
+    if isinstance(nodes, buffer):
+        return numpy.frombuffer(nodes, dtype=numpy.int32)
+    if isinstance(nodes, (numpy.ndarray, memoryview)):
+        return numpy.ascontiguousarray(
+            numpy.asarray(nodes).ravel(), dtype=numpy.int32)
+    return numpy.fromiter(nodes, dtype=numpy.int32)
+
 class EdgeArray(object):
-    def __init__(self, path=None, log=True):
+    def __init__(self, path=None, log=True, mapped=False, memoryBudget=None,
+                 tempDir=None):
+        """
+        `mapped` - if True, the file at `path` is mapped into memory instead
+        of being read. It is shared with other processes mapping it and only
+        copied when the array is modified (filtering copies only the remaining
+        edges).
+
+        `memoryBudget` - if set, edges are kept in files instead of memory and
+        every modification streams them to a new temporary file, keeping
+        about this many bytes of edges in memory. The file at `path` is only
+        written by populate.
+
+        `tempDir` - directory of temporary files, by default the directory of
+        `path`. They are removed with the array.
+        """
         self._path = path
         self._array = EdgeArrayExt()
         self._log = log
+        self._mapped = mapped
+        self._memoryBudget = memoryBudget
+        self._tempDir = tempDir
+        if tempDir is None and path:
+            self._tempDir = os.path.dirname(os.path.abspath(path))
+        # temporary file with edges of an external array, once modified
+        self._tempPath = None
+        # whether edges are read from `path` (or replaced)
+        self._loaded = False
 
     def populate(self, iterator):
         logger = logging.getLogger(__name__)
         if self._log:
             logger.info("EdgeArray: populating...")
 
+        if self._isExternal():
+            self._array = EdgeArrayExt()
+            path = self._path or self._newTempFile()
+            externalWrite(path, iter(iterator), self._blockSize(), False)
+            self._replaceFile(path)
+            return
+
+        self._loaded = True
         self._array.populate(iter(iterator))
         if self._path:
             self._array.save(self._path)
 
+    def save(self, path, compressed=False):
+        """
+        Save edges to `path`, which may be the file of the array.
+
+        `compressed` - if True, edges are saved in blocks of delta and varint
+        encoded edges, which take a few bytes per edge when they are sorted by
+        start nodes. Loading and mapping detect the format, compressed edges
+        are decoded into memory in parallel.
+        """
+        self._ensureLoaded()
+
+        logger = logging.getLogger(__name__)
+        if self._log:
+            logger.info("EdgeArray: saving{}...".format(" compressed" if compressed else ""))
+
+        self._array.save(path, compressed)
+
+    def loadStartNodeRange(self, first, last):
+        """Load only edges with start nodes between `first` and `last`
+        (inclusive) from the file at `path`. Only blocks of compressed edges
+        sorted by start nodes that may contain them are decoded."""
+        logger = logging.getLogger(__name__)
+        if self._log:
+            logger.info("EdgeArray: loading start nodes from {} to {}...".format(first, last))
+
+        self._loaded = True
+        self._array.loadStartNodeRange(self._path, first, last)
+
+        if self._log:
+            logger.info("EdgeArray: new size: {}".format(self._array.size()))
+
+    def saveCSR(self, path):
+        """Save outbound and inbound links of every node as a graph read by
+        LinkGraph."""
+        self._ensureLoaded()
+
+        logger = logging.getLogger(__name__)
+        if self._log:
+            logger.info("EdgeArray: saving CSR graph...")
+
+        self._array.saveCSR(path)
+
     def append(self, edge):
         self._ensureLoaded()
 
-        self._array.append(edge)
+        if self._isExternal():
+            self.extend([edge])
+        else:
+            self._array.append(edge)
 
     def extend(self, edges):
+        """Append edges from an iterable, a (N, 2) numpy array or another
+        EdgeArray."""
         self._ensureLoaded()
 
-        self._array.extend(edges)
-
-    def sortByStartNode(self):
+        if isinstance(edges, EdgeArray):
+            edges = edges.asNumpy()
+
+        if not self._isExternal():
+            if isinstance(edges, numpy.ndarray):
+                self._array.extendFromBuffer(edges)
+            else:
+                self._array.extend(edges)
+            return
+
+        # only a temporary file may be appended to
+        path = self._tempPath
+        if path is None:
+            path = self._newTempFile()
+            externalCopy(self._filePath(), path, False, False, self._blockSize())
+        if isinstance(edges, numpy.ndarray):
+            externalAppendBuffer(path, edges)
+        else:
+            externalWrite(path, edges, self._blockSize(), True)
+        self._replaceFile(path)
+
+    def sortByStartNode(self, thenByEndNode=False):
+        """Sort edges by start nodes, keeping the order of edges with the same
+        start node unless `thenByEndNode` is True."""
         self._ensureLoaded()
 
         logger = logging.getLogger(__name__)
         if self._log:
             logger.info('EdgeArray: sorting by start node...')
 
-        self._array.sortByColumn(0)
+        if self._isExternal():
+            self._rewrite(lambda source, target: externalSort(
+                source, target, 0, thenByEndNode, self._blockSize(copies=2),
+                target + '.run'))
+        else:
+            self._array.sortByColumn(0, thenByEndNode)
 
-    def sortByEndNode(self):
+    def sortByEndNode(self, thenByStartNode=False):
+        """Sort edges by end nodes, keeping the order of edges with the same
+        end node unless `thenByStartNode` is True."""
         self._ensureLoaded()
 
         logger = logging.getLogger(__name__)
         if self._log:
             logger.info('EdgeArray: sorting by end node...')
 
-        self._array.sortByColumn(1)
+        if self._isExternal():
+            self._rewrite(lambda source, target: externalSort(
+                source, target, 1, thenByStartNode, self._blockSize(copies=2),
+                target + '.run'))
+        else:
+            self._array.sortByColumn(1, thenByStartNode)
 
     def filterByNodes(self, nodes):
         self._ensureLoaded()
 
-        nodes = list(nodes)
+        nodes = asNodeIds(nodes)
 
         logger = logging.getLogger(__name__)
         if self._log:
             logger.info("EdgeArray: filtering by nodes (allowing {} nodes)...".format(len(nodes)))
 
-        self._array.filterByNodes(nodes)
+        if self._isExternal():
+            self._rewrite(lambda source, target: externalFilter(
+                source, target, nodes, -1, self._blockSize()))
+        else:
+            self._array.filterByNodes(nodes)
 
         if self._log:
             logger.info("EdgeArray: new size: {}".format(self._array.size()))
@@ -62,13 +196,17 @@ class EdgeArray(object):
     def filterByStartNodes(self, nodes):
         self._ensureLoaded()
 
-        nodes = list(nodes)
+        nodes = asNodeIds(nodes)
 
         logger = logging.getLogger(__name__)
         if self._log:
             logger.info("EdgeArray: filtering by start nodes (allowing {} nodes)...".format(len(nodes)))
 
-        self._array.filterColumnByNodes(nodes, 0)
+        if self._isExternal():
+            self._rewrite(lambda source, target: externalFilter(
+                source, target, nodes, 0, self._blockSize()))
+        else:
+            self._array.filterColumnByNodes(nodes, 0)
 
         if self._log:
             logger.info("EdgeArray: new size: {}".format(self._array.size()))
@@ -76,13 +214,17 @@ class EdgeArray(object):
     def filterByEndNodes(self, nodes):
         self._ensureLoaded()
 
-        nodes = list(nodes)
+        nodes = asNodeIds(nodes)
 
         logger = logging.getLogger(__name__)
         if self._log:
             logger.info("EdgeArray: filtering by end nodes (allowing {} nodes)...".format(len(nodes)))
 
-        self._array.filterColumnByNodes(nodes, 1)
+        if self._isExternal():
+            self._rewrite(lambda source, target: externalFilter(
+                source, target, nodes, 1, self._blockSize()))
+        else:
+            self._array.filterColumnByNodes(nodes, 1)
 
         if self._log:
             logger.info("EdgeArray: new size: {}".format(self._array.size()))
@@ -94,7 +236,11 @@ class EdgeArray(object):
         if self._log:
             logger.info("EdgeArray: inversing edges...")
 
-        self._array.inverseEdges()
+        if self._isExternal():
+            self._rewrite(lambda source, target: externalCopy(
+                source, target, True, False, self._blockSize()))
+        else:
+            self._array.inverseEdges()
 
     def __iter__(self):
         self._ensureLoaded()
@@ -111,6 +257,17 @@ class EdgeArray(object):
 
         return [e for (_, e) in self]
 
+    def asNumpy(self):
+        """Return a (N, 2) int32 array viewing the edges, without copying
+        them. It is read-only for a mapped array and keeps its file mapped,
+        otherwise it is valid until the array is modified."""
+        self._ensureLoaded()
+
+        view = self._array.view()
+        if self._array.isMapped():
+            view.flags.writeable = False
+        return view
+
     def countNodes(self):
         self._ensureLoaded()
 
@@ -127,10 +284,70 @@ class EdgeArray(object):
     def _ensureLoaded(self):
         logger = logging.getLogger(__name__)
 
-        if self._array.size() == 0 and self._path:
-            if self._log:
-                logger.info("EdgeArray: loading...")
-            self._array.load(self._path)
+        if self._isExternal():
+            if not self._array.isMapped():
+                if self._path and isCompressed(self._path):
+                    path = self._newTempFile()
+                    decompress(self._path, path)
+                    self._replaceFile(path)
+                elif self._path and os.path.exists(self._path):
+                    self._array.map(self._path)
+                else:
+                    path = self._newTempFile()
+                    externalWrite(path, [], 1, False)
+                    self._replaceFile(path)
+            return
+
+        if not self._loaded and self._path:
+            if self._mapped:
+                if self._log:
+                    logger.info("EdgeArray: mapping...")
+                self._array.map(self._path)
+            else:
+                if self._log:
+                    logger.info("EdgeArray: loading...")
+                self._array.load(self._path)
+            self._loaded = True
 
             if self._log:
                 logger.info("EdgeArray: new size: {}".format(self._array.size()))
+
+    def __del__(self):
+        if getattr(self, '_tempPath', None):
+            os.unlink(self._tempPath)
+
+    def _isExternal(self):
+        return self._memoryBudget is not None
+
+    def _blockSize(self, copies=1):
+        """Return the number of edges that fit in the memory budget
+        `copies` times."""
+        return max(1, self._memoryBudget // (EDGE_SIZE * copies))
+
+    def _filePath(self):
+        """Return the file with edges of an external array."""
+        return self._tempPath or self._path
+
+    def _newTempFile(self):
+        handle, path = tempfile.mkstemp(prefix='edges-', suffix='.bin', dir=self._tempDir)
+        os.close(handle)
+        return path
+
+    def _replaceFile(self, path):
+        """Map edges of an external array from `path`, removing the previous
+        temporary file."""
+        self._array.map(path)
+        if self._tempPath and self._tempPath != path:
+            os.unlink(self._tempPath)
+        self._tempPath = path if path != self._path else None
+
+    def _rewrite(self, write):
+        """Replace edges of an external array with the ones written by
+        `write(source, target)` to a new temporary file."""
+        target = self._newTempFile()
+        try:
+            write(self._filePath(), target)
+        except:
+            os.unlink(target)
+            raise
+        self._replaceFile(target)
@@ -0,0 +1,82 @@
+from edgearrayext import LinkGraphExt
+from EdgeArray import EdgeArray, asNodeIds
+import numpy
+import logging
+
+class LinkGraph(object):
+    """
+    Outbound and inbound links of every node in compressed sparse row format,
+    mapped from a file saved by EdgeArray.saveCSR.
+
+    Nodes are numbered by increasing id. Links of the node number i are
+    `targets[offsets[i]:offsets[i + 1]]`, sorted numbers of linked nodes.
+    Arrays are read-only views of the file, shared by all processes mapping it.
+    """
+
+    def __init__(self, path, log=True):
+        self._graph = LinkGraphExt(path)
+        self._log = log
+        self.nodes = self._readOnly(self._graph.nodes())
+        self.outOffsets = self._readOnly(self._graph.offsets(False))
+        self.outTargets = self._readOnly(self._graph.targets(False))
+        self.inOffsets = self._readOnly(self._graph.offsets(True))
+        self.inTargets = self._readOnly(self._graph.targets(True))
+
+    def nodeCount(self):
+        return self._graph.nodeCount()
+
+    def edgeCount(self):
+        return self._graph.edgeCount()
+
+    def degrees(self):
+        """Return the number of links from and to each node (a self-link is
+        counted twice)."""
+        return numpy.diff(self.outOffsets) + numpy.diff(self.inOffsets)
+
+    def nodesWithDegree(self, minDegree):
+        """Return ids of nodes with at least `minDegree` links."""
+        return self.nodes[self.degrees() >= minDegree]
+
+    def select(self, ids):
+        """Return a mask of nodes with the given ids, ids without links are
+        ignored."""
+        ids = asNodeIds(ids)
+        indices = numpy.minimum(numpy.searchsorted(self.nodes, ids), max(self.nodeCount() - 1, 0))
+        selected = numpy.zeros(self.nodeCount(), dtype=numpy.uint8)
+        if self.nodeCount() > 0:
+            selected[indices[self.nodes[indices] == ids]] = 1
+        return selected
+
+    def edgesBetween(self, ids):
+        """Return an EdgeArray with links between nodes with the given ids,
+        sorted by start nodes."""
+        logger = logging.getLogger(__name__)
+        selected = self.select(ids)
+        if self._log:
+            logger.info("LinkGraph: selecting links between {} nodes...".format(int(selected.sum())))
+
+        edges = EdgeArray(log=self._log)
+        self._graph.edgesBetween(selected, edges._array)
+
+        if self._log:
+            logger.info("LinkGraph: selected {} links".format(edges._array.size()))
+        return edges
+
+    def linkLists(self, ids, reverse=False):
+        """
+        Yield pairs of an id and a list of ids it links to (or that link to it
+        if `reverse` is True), for the given ids by increasing id. Only links
+        between the given ids are listed and nodes without them are skipped.
+        """
+        selected = self.select(ids).view(numpy.bool_)
+        offsets = self.inOffsets if reverse else self.outOffsets
+        targets = self.inTargets if reverse else self.outTargets
+        for node in numpy.flatnonzero(selected):
+            linked = targets[offsets[node]:offsets[node + 1]]
+            linked = linked[selected[linked]]
+            if len(linked) > 0:
+                yield int(self.nodes[node]), self.nodes[linked].tolist()
+
+    def _readOnly(self, array):
+        array.flags.writeable = False
+        return array
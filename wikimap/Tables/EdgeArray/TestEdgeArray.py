@@ -1,7 +1,9 @@
 #!/usr/bin/env python
 
 from EdgeArray import EdgeArray
+from LinkGraph import LinkGraph
 import os
+import numpy
 
 
 class TestArray(object):
@@ -66,6 +68,18 @@ def testSortByEndNode():
             "Sort by end node",
             [node[1] for node in ea] == [0, 1, 1, 1, 2, 2, 2, 3, 4, 6]
         )
+        check(
+            "Sort by end node is stable",
+            list(ea)[1:4] == [(0, 1), (3, 1), (2, 1)]
+        )
+
+    with TestArray() as ea:
+        ea.sortByEndNode(thenByStartNode=True)
+        check(
+            "Sort by end node then by start node",
+            list(ea) == [(6, 0), (0, 1), (2, 1), (3, 1), (0, 2), (0, 2),
+                         (1, 2), (3, 3), (3, 4), (4, 6)]
+        )
 
 
 def testFilterByNodes():
@@ -76,6 +90,13 @@ def testFilterByNodes():
             list(ea) == [(3, 1), (3, 3), (1, 2), (2, 1), (4, 6), (3, 4)]
         )
 
+    with TestArray() as ea:
+        ea.filterByNodes(numpy.array([[6, 1], [2, 3]], dtype=numpy.int64))
+        check(
+            "Filter by nodes in numpy array",
+            list(ea) == [(3, 1), (3, 3), (1, 2), (2, 1)]
+        )
+
 
 def testFilterByStartNodes():
     with TestArray() as ea:
@@ -113,6 +134,111 @@ def testCountNodes():
         )
 
 
+def testMapped():
+    with TestArray():
+        ea = EdgeArray(TestArray.storage, mapped=True)
+        view = ea.asNumpy()
+        check(
+            "Mapped array",
+            list(ea) == TestArray.edges
+            and view.shape == (10, 2)
+            and view[3].tolist() == [3, 1]
+            and not view.flags.writeable
+        )
+
+        del view
+        ea.filterByStartNodes(range(2, 5))
+        check(
+            "Filter mapped array",
+            list(ea) == [(3, 1), (3, 3), (2, 1), (4, 6), (3, 4)]
+            and list(EdgeArray(TestArray.storage)) == TestArray.edges
+        )
+
+        ea = EdgeArray(TestArray.storage, mapped=True)
+        view = ea.asNumpy()
+        ea.extend(ea)
+        check(
+            "Extend mapped array with itself",
+            list(ea) == TestArray.edges * 2
+            and view.tolist() == [list(e) for e in TestArray.edges]
+        )
+
+
+def testLinkGraph():
+    with TestArray() as ea:
+        graphStorage = TestArray.storage + '.csr'
+        ea.saveCSR(graphStorage)
+        graph = LinkGraph(graphStorage)
+        check(
+            "CSR graph",
+            graph.nodeCount() == 6
+            and graph.edgeCount() == 10
+            and graph.nodes.tolist() == [0, 1, 2, 3, 4, 6]
+            and graph.outOffsets.tolist() == [0, 3, 4, 5, 8, 9, 10]
+            and graph.outTargets.tolist() == [1, 2, 2, 2, 1, 1, 3, 4, 5, 0]
+            and graph.degrees().tolist() == [4, 4, 4, 4, 2, 2]
+        )
+        check(
+            "Edges between nodes of CSR graph",
+            list(graph.edgesBetween(graph.nodesWithDegree(4)))
+            == [(0, 1), (0, 2), (0, 2), (1, 2), (2, 1), (3, 1), (3, 3)]
+        )
+        check(
+            "Link lists of CSR graph",
+            list(graph.linkLists([6, 5, 4, 3])) == [(3, [3, 4]), (4, [6])]
+            and list(graph.linkLists([6, 5, 4, 3], reverse=True))
+            == [(3, [3]), (4, [3]), (6, [4])]
+        )
+        del graph
+        os.unlink(graphStorage)
+
+
+def testExternal():
+    # blocks of 2 edges
+    with TestArray(memoryBudget=16) as ea:
+        ea.sortByStartNode(thenByEndNode=True)
+        check(
+            "External sort",
+            list(ea) == sorted(TestArray.edges)
+        )
+
+        ea.filterByNodes(range(1, 7))
+        ea.inverseEdges()
+        ea.extend([(7, 7)])
+        check(
+            "External filter, inverse and extend",
+            list(ea) == [(2, 1), (1, 2), (1, 3), (3, 3), (4, 3), (6, 4),
+                         (7, 7)]
+            and list(EdgeArray(TestArray.storage)) == TestArray.edges
+        )
+
+        storageDir = os.path.dirname(os.path.abspath(TestArray.storage))
+        tempFiles = set(os.listdir(storageDir))
+        del ea
+        check(
+            "External temporary files removed",
+            len(tempFiles - set(os.listdir(storageDir))) == 1
+        )
+
+
+def testCompressed():
+    with TestArray() as ea:
+        compressedStorage = TestArray.storage + '.gz'
+        ea.sortByStartNode(thenByEndNode=True)
+        ea.save(compressedStorage, compressed=True)
+        check(
+            "Compressed array",
+            list(EdgeArray(compressedStorage, mapped=True)) == sorted(TestArray.edges)
+        )
+
+        ranged = EdgeArray(compressedStorage)
+        ranged.loadStartNodeRange(1, 3)
+        check(
+            "Start node range of compressed array",
+            list(ranged) == [(1, 2), (2, 1), (3, 1), (3, 3), (3, 4)]
+        )
+        os.unlink(compressedStorage)
+
 def main():
     print "Testing python bindings:"
     testBasics()
@@ -123,6 +249,10 @@ def main():
     testFilterByEndNodes()
     testInverseEdges()
     testCountNodes()
+    testMapped()
+    testLinkGraph()
+    testExternal()
+    testCompressed()
 
 
 if __name__ == "__main__":
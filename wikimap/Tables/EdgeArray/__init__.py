@@ -1 +1,2 @@
 from EdgeArray import *
+from LinkGraph import *
@@ -7,6 +7,11 @@
 #include <iostream>
 #include <functional>
 #include <algorithm>
+#include <stdexcept>
+#include <unistd.h>
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
 #include <omp.h>
 #include <parallel/algorithm>
 
@@ -40,9 +45,17 @@ public:
 
     size_type size() const { return data_.size(); }
 
+    T* data() { return data_.data(); }
+    const T* data() const { return data_.data(); }
+
     std::ostream& print(std::ostream& out) const;
 
-    void filter(std::function<bool(const T&)> predicate);
+    template<class Predicate>
+    void filter(Predicate predicate);
+
+    template<class Predicate>
+    void assign_filtered(const T* values, size_type size, Predicate predicate);
+
     void shuffle();
     void sort(std::function<bool(const T&, const T&)> comparator = std::less<T>());
     void reverse();
@@ -108,21 +121,81 @@ bool Array<T>::operator == (const Array<T>& other) const {
 }
 
 template<class T>
-void Array<T>::filter(std::function<bool(const T&)> predicate) {
-    std::vector<short> mask(data_.size(), 0);
+template<class Predicate>
+void Array<T>::filter(Predicate predicate) {
+    assign_filtered(data_.data(), data_.size(), predicate);
+}
 
-#pragma omp parallel for schedule(static)
-    for (int i = 0; i < data_.size(); ++i) {
-        mask[i] = (short)predicate(data_[i]);
+// Replaces the values with the ones of `values` satisfying `predicate`.
+// `values` may be (a part of) the values of this array.
+//
+// Values are split into one range per thread. Each thread evaluates the
+// predicate over its range and counts the satisfying values, then they are
+// moved to the position given by the prefix sum of the counts of preceding
+// ranges. Values of this array are filtered in place: each thread compacts
+// its range to the start of it, then the ranges are moved in order, since a
+// range is never moved after its start. Other values are copied into the
+// current buffer of the array.
+template<class T>
+template<class Predicate>
+void Array<T>::assign_filtered(const T* values, size_type size, Predicate predicate) {
+    const int range_count = omp_get_max_threads();
+    std::vector<size_type> positions(range_count + 1, 0);
+    auto range_begin = [size, range_count] (int range) {
+        return size * range / range_count;
+    };
+
+    if (values >= data_.data() && values < data_.data() + data_.size()) {
+        T* begin = data_.data() + (values - data_.data());
+#pragma omp parallel for schedule(static, 1)
+        for (int range = 0; range < range_count; ++range) {
+            size_type next = range_begin(range);
+            for (size_type i = range_begin(range); i < range_begin(range + 1); ++i) {
+                if (predicate(begin[i])) {
+                    begin[next++] = begin[i];
+                }
+            }
+            positions[range + 1] = next - range_begin(range);
+        }
+
+        for (int range = 0; range < range_count; ++range) {
+            T* first = begin + range_begin(range);
+            T* target = data_.data() + positions[range];
+            if (target != first) {
+                std::move(first, first + positions[range + 1], target);
+            }
+            positions[range + 1] += positions[range];
+        }
+        data_.resize(positions[range_count]);
+        return;
     }
 
-    int next = 0;
-    for (int i = 0; i < data_.size(); ++i) {
-        if (mask[i]) {
-            data_[next++] = data_[i];
+    std::vector<unsigned char> mask(size);
+#pragma omp parallel for schedule(static, 1)
+    for (int range = 0; range < range_count; ++range) {
+        size_type count = 0;
+        for (size_type i = range_begin(range); i < range_begin(range + 1); ++i) {
+            mask[i] = predicate(values[i]) ? 1 : 0;
+            count += mask[i];
+        }
+        positions[range + 1] = count;
+    }
+
+    for (int range = 0; range < range_count; ++range) {
+        positions[range + 1] += positions[range];
+    }
+
+    data_.clear();
+    data_.resize(positions[range_count]);
+#pragma omp parallel for schedule(static, 1)
+    for (int range = 0; range < range_count; ++range) {
+        size_type next = positions[range];
+        for (size_type i = range_begin(range); i < range_begin(range + 1); ++i) {
+            if (mask[i]) {
+                data_[next++] = values[i];
+            }
         }
     }
-    data_.resize(next);
 }
 
 template<class T>
@@ -182,3 +255,189 @@ std::ostream& Array<T>::print(std::ostream& out) const {
     out << "]";
     return out;
 }
+
+// Writes a file in the format of Array<T>::save incrementally, so that the
+// values do not have to be kept in memory. The size is written on close.
+// Writing can be resumed after the first `resumeAt` values of an existing
+// file, values after them are discarded. Failed writes throw, so a full disk
+// is not found only when the file is read.
+template<class T>
+class ArrayWriter {
+public:
+    typedef typename Array<T>::size_type size_type;
+
+public:
+    explicit ArrayWriter(const std::string& path, size_type resumeAt = 0);
+    ~ArrayWriter();
+
+    void extend(const std::vector<T>& values);
+    void extend(const T* values, size_type count);
+    void flush();
+    void close();
+
+    size_type size() const { return size_; }
+
+private:
+    void check();
+
+private:
+    std::string path_;
+    std::ofstream outfile_;
+    size_type size_;
+};
+
+template<class T>
+ArrayWriter<T>::ArrayWriter(const std::string& path, size_type resumeAt)
+: path_(path), outfile_(), size_(resumeAt)
+{
+    if (resumeAt > 0) {
+        off_t length = sizeof(size_) + sizeof(T) * resumeAt;
+        std::ifstream infile(path.c_str(), std::ios::in | std::ios::binary | std::ios::ate);
+        if (!infile || infile.tellg() < length || truncate(path.c_str(), length) != 0) {
+            throw std::runtime_error("Cannot resume writing " + path + ".");
+        }
+        outfile_.open(path.c_str(), std::ios::in | std::ios::out | std::ios::binary | std::ios::ate);
+    } else {
+        outfile_.open(path.c_str(), std::ios::out | std::ios::binary);
+    }
+
+    if (!outfile_) {
+        throw std::runtime_error("Cannot open " + path + " for writing.");
+    }
+
+    if (resumeAt == 0) {
+        outfile_.write((char*)&size_, sizeof(size_));
+        check();
+    }
+}
+
+template<class T>
+ArrayWriter<T>::~ArrayWriter() {
+    // destructors must not throw, errors are reported by an explicit close
+    try {
+        close();
+    } catch (const std::runtime_error&) {
+    }
+}
+
+template<class T>
+void ArrayWriter<T>::extend(const std::vector<T>& values) {
+    extend(values.data(), values.size());
+}
+
+template<class T>
+void ArrayWriter<T>::extend(const T* values, size_type count) {
+    if (count > 0) {
+        outfile_.write((const char*)values, sizeof(T) * count);
+        check();
+    }
+    size_ += count;
+}
+
+template<class T>
+void ArrayWriter<T>::flush() {
+    outfile_.flush();
+    check();
+}
+
+template<class T>
+void ArrayWriter<T>::close() {
+    if (outfile_.is_open()) {
+        outfile_.seekp(0);
+        outfile_.write((char*)&size_, sizeof(size_));
+        outfile_.close();
+        check();
+    }
+}
+
+template<class T>
+void ArrayWriter<T>::check() {
+    if (!outfile_) {
+        if (outfile_.is_open()) {
+            outfile_.close();
+        }
+        throw std::runtime_error("Cannot write " + path_ + ".");
+    }
+}
+
+// Read-only memory mapping of a whole file. Its pages are shared with the
+// page cache and with other processes mapping the file, so nothing is read
+// until it is accessed.
+class MappedFile {
+public:
+    explicit MappedFile(const std::string& path);
+    ~MappedFile();
+
+    MappedFile(const MappedFile&) = delete;
+    MappedFile& operator = (const MappedFile&) = delete;
+
+    const char* data() const { return (const char*)mapping_; }
+    size_t size() const { return length_; }
+
+private:
+    void* mapping_;
+    size_t length_;
+};
+
+inline MappedFile::MappedFile(const std::string& path)
+: mapping_(nullptr), length_(0)
+{
+    int fd = open(path.c_str(), O_RDONLY);
+    struct stat info;
+    if (fd < 0 || fstat(fd, &info) != 0) {
+        if (fd >= 0) {
+            close(fd);
+        }
+        throw std::runtime_error("Cannot open " + path + ".");
+    }
+
+    length_ = info.st_size;
+    if (length_ > 0) {
+        mapping_ = mmap(nullptr, length_, PROT_READ, MAP_SHARED, fd, 0);
+    }
+    close(fd);
+    if (mapping_ == MAP_FAILED) {
+        throw std::runtime_error("Cannot map " + path + ".");
+    }
+}
+
+inline MappedFile::~MappedFile() {
+    if (length_ > 0) {
+        munmap(mapping_, length_);
+    }
+}
+
+// Read-only view of a file in the format of Array<T>::save mapped into
+// memory.
+template<class T>
+class MappedArray {
+public:
+    typedef typename Array<T>::size_type size_type;
+
+public:
+    explicit MappedArray(const std::string& path);
+
+    const T* data() const { return data_; }
+    size_type size() const { return size_; }
+
+    const T* begin() const { return data_; }
+    const T* end() const { return data_ + size_; }
+
+private:
+    MappedFile file_;
+    const T* data_;
+    size_type size_;
+};
+
+template<class T>
+MappedArray<T>::MappedArray(const std::string& path)
+: file_(path), data_(nullptr), size_(0)
+{
+    if (file_.size() >= sizeof(size_type)) {
+        size_ = *(const size_type*)file_.data();
+    }
+    if (file_.size() < sizeof(size_type) + sizeof(T) * size_) {
+        throw std::runtime_error("File " + path + " is truncated.");
+    }
+    data_ = (const T*)(file_.data() + sizeof(size_type));
+}
@@ -0,0 +1,46 @@
+#pragma once
+
+#include <vector>
+#include <cstdint>
+#include <algorithm>
+#include <omp.h>
+
+// Set of non-negative ints stored as a dense bitmap up to the largest one, so
+// that a lookup is a single memory access. Negative values are never
+// contained.
+class Bitmap {
+public:
+    Bitmap(const int* values, size_t count);
+
+    bool contains(int value) const {
+        return value >= 0 && (size_t)value < size_
+            && (words_[value >> 6] >> (value & 63)) & 1;
+    }
+
+private:
+    std::vector<std::uint64_t> words_;
+    size_t size_;
+};
+
+inline Bitmap::Bitmap(const int* values, size_t count)
+: words_(), size_(0)
+{
+    int max_value = -1;
+#pragma omp parallel for schedule(static) reduction(max: max_value)
+    for (long i = 0; i < (long)count; ++i) {
+        max_value = std::max(max_value, values[i]);
+    }
+
+    size_ = (size_t)(max_value + 1);
+    words_.assign((size_ + 63) / 64, 0);
+
+#pragma omp parallel for schedule(static)
+    for (long i = 0; i < (long)count; ++i) {
+        int value = values[i];
+        if (value >= 0) {
+            std::uint64_t bit = std::uint64_t(1) << (value & 63);
+#pragma omp atomic
+            words_[value >> 6] |= bit;
+        }
+    }
+}
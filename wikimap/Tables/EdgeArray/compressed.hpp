@@ -0,0 +1,247 @@
+#pragma once
+
+#include <string>
+#include <vector>
+#include <cstdint>
+#include <cstring>
+#include <fstream>
+#include <utility>
+#include <algorithm>
+#include <stdexcept>
+#include <omp.h>
+
+#include "array.hpp"
+
+// Edges compressed in independent blocks, so that they are encoded and
+// decoded in parallel and a range of start nodes can be decoded alone.
+//
+// An edge is stored as varints of the zigzag encoded difference of its start
+// node from the previous one, and of its end node, or the difference of it
+// from the previous end node if both have the same start node. Edges sorted
+// by start node (and then by end node) take a few bytes each.
+//
+// Layout of a file, each section starts at a multiple of 8 bytes:
+//   header (magic, edge count, edges per block, block count, sorted flag)
+//   uint64 offsets of blocks (and of the end) in the data section
+//   int32 start nodes of the first edges of blocks
+//   data section
+namespace compressed {
+
+typedef std::pair<int, int> Edge;
+
+const char MAGIC[8] = {'W', 'M', 'E', 'D', 'G', 'Z', '0', '1'};
+const size_t DEFAULT_BLOCK_SIZE = 1 << 16;
+
+struct Header {
+    char magic[8];
+    std::uint64_t edge_count;
+    std::uint64_t block_size;
+    std::uint64_t block_count;
+    // whether edges are sorted by start nodes
+    std::uint64_t sorted;
+};
+
+inline size_t aligned(size_t size) {
+    return (size + 7) / 8 * 8;
+}
+
+inline std::uint64_t zigzag(std::int64_t value) {
+    return ((std::uint64_t)value << 1) ^ (std::uint64_t)(value >> 63);
+}
+
+inline std::int64_t unzigzag(std::uint64_t value) {
+    return (std::int64_t)(value >> 1) ^ -(std::int64_t)(value & 1);
+}
+
+inline void put_varint(std::vector<unsigned char>& out, std::uint64_t value) {
+    while (value >= 0x80) {
+        out.push_back((unsigned char)(value | 0x80));
+        value >>= 7;
+    }
+    out.push_back((unsigned char)value);
+}
+
+inline std::uint64_t get_varint(const unsigned char*& in) {
+    std::uint64_t value = 0;
+    int shift = 0;
+    while (*in & 0x80) {
+        value |= (std::uint64_t)(*in++ & 0x7f) << shift;
+        shift += 7;
+    }
+    value |= (std::uint64_t)(*in++) << shift;
+    return value;
+}
+
+inline void encode_block(const Edge* edges, size_t count, std::vector<unsigned char>& out) {
+    std::int64_t source = 0;
+    std::int64_t target = 0;
+    for (size_t i = 0; i < count; ++i) {
+        std::int64_t source_delta = edges[i].first - source;
+        put_varint(out, zigzag(source_delta));
+        put_varint(out, zigzag(source_delta == 0 ? edges[i].second - target : edges[i].second));
+        source = edges[i].first;
+        target = edges[i].second;
+    }
+}
+
+inline void decode_block(const unsigned char* in, size_t count, Edge* edges) {
+    std::int64_t source = 0;
+    std::int64_t target = 0;
+    for (size_t i = 0; i < count; ++i) {
+        std::int64_t source_delta = unzigzag(get_varint(in));
+        std::int64_t value = unzigzag(get_varint(in));
+        source += source_delta;
+        target = source_delta == 0 ? target + value : value;
+        edges[i] = Edge((int)source, (int)target);
+    }
+}
+
+// Compresses `count` edges in parallel and saves them to `path`.
+inline void save(const Edge* edges, size_t count, const std::string& path,
+                 size_t block_size = DEFAULT_BLOCK_SIZE) {
+    const size_t block_count = (count + block_size - 1) / block_size;
+    std::vector<std::vector<unsigned char>> blocks(block_count);
+    std::vector<int> first_sources(block_count);
+
+    bool sorted = true;
+#pragma omp parallel for schedule(dynamic) reduction(&&: sorted)
+    for (long block = 0; block < (long)block_count; ++block) {
+        size_t begin = block * block_size;
+        size_t end = std::min(begin + block_size, count);
+        encode_block(edges + begin, end - begin, blocks[block]);
+        first_sources[block] = edges[begin].first;
+        for (size_t i = std::max(begin, (size_t)1); i < end; ++i) {
+            sorted = sorted && edges[i - 1].first <= edges[i].first;
+        }
+    }
+
+    Header header;
+    std::memcpy(header.magic, MAGIC, sizeof(MAGIC));
+    header.edge_count = count;
+    header.block_size = block_size;
+    header.block_count = block_count;
+    header.sorted = sorted;
+
+    std::vector<std::uint64_t> offsets(block_count + 1, 0);
+    for (size_t block = 0; block < block_count; ++block) {
+        offsets[block + 1] = offsets[block] + blocks[block].size();
+    }
+
+    std::ofstream outfile(path.c_str(), std::ios::out | std::ios::binary);
+    if (!outfile) {
+        throw std::runtime_error("Cannot open " + path + " for writing.");
+    }
+    outfile.write((const char*)&header, sizeof(header));
+    outfile.write((const char*)offsets.data(), sizeof(std::uint64_t) * offsets.size());
+    outfile.write((const char*)first_sources.data(), sizeof(int) * first_sources.size());
+    outfile.seekp(aligned(sizeof(header))
+                  + sizeof(std::uint64_t) * offsets.size()
+                  + aligned(sizeof(int) * first_sources.size()));
+    for (const auto& block : blocks) {
+        outfile.write((const char*)block.data(), block.size());
+    }
+    if (!outfile) {
+        throw std::runtime_error("Cannot write " + path + ".");
+    }
+}
+
+inline bool is_compressed(const std::string& path) {
+    char magic[sizeof(MAGIC)] = {0};
+    std::ifstream infile(path.c_str(), std::ios::in | std::ios::binary);
+    infile.read(magic, sizeof(magic));
+    return infile && std::memcmp(magic, MAGIC, sizeof(MAGIC)) == 0;
+}
+
+// Compressed edges mapped into memory.
+class MappedEdges {
+public:
+    explicit MappedEdges(const std::string& path);
+
+    size_t size() const { return header_.edge_count; }
+    size_t block_count() const { return header_.block_count; }
+    bool sorted() const { return header_.sorted != 0; }
+
+    // Decodes blocks [first, last) in parallel.
+    Array<Edge> decode(size_t first = 0, size_t last = (size_t)-1) const;
+
+    // Decodes edges with start nodes between `first` and `last` (inclusive),
+    // only blocks that may contain them are decoded.
+    Array<Edge> decode_sources(int first, int last) const;
+
+private:
+    MappedFile file_;
+    Header header_;
+    const std::uint64_t* offsets_;
+    const int* first_sources_;
+    const unsigned char* data_;
+};
+
+inline MappedEdges::MappedEdges(const std::string& path)
+: file_(path), header_(), offsets_(nullptr), first_sources_(nullptr), data_(nullptr)
+{
+    if (file_.size() < sizeof(Header)
+            || std::memcmp(file_.data(), MAGIC, sizeof(MAGIC)) != 0) {
+        throw std::runtime_error(path + " is not a file of compressed edges.");
+    }
+    std::memcpy(&header_, file_.data(), sizeof(Header));
+
+    size_t position = aligned(sizeof(Header));
+    offsets_ = (const std::uint64_t*)(file_.data() + position);
+    position += sizeof(std::uint64_t) * (header_.block_count + 1);
+    first_sources_ = (const int*)(file_.data() + position);
+    position += aligned(sizeof(int) * header_.block_count);
+    if (file_.size() < position
+            || file_.size() < position + offsets_[header_.block_count]) {
+        throw std::runtime_error("File " + path + " is truncated.");
+    }
+    data_ = (const unsigned char*)file_.data() + position;
+}
+
+inline Array<Edge> MappedEdges::decode(size_t first, size_t last) const {
+    last = std::min(last, block_count());
+    first = std::min(first, last);
+    const size_t begin = first * header_.block_size;
+    const size_t end = std::min(last * header_.block_size, size());
+
+    Array<Edge> edges(end - begin);
+#pragma omp parallel for schedule(dynamic)
+    for (long block = first; block < (long)last; ++block) {
+        size_t block_begin = block * header_.block_size;
+        size_t count = std::min(block_begin + header_.block_size, size()) - block_begin;
+        decode_block(data_ + offsets_[block], count, edges.data() + block_begin - begin);
+    }
+    return edges;
+}
+
+inline Array<Edge> MappedEdges::decode_sources(int first, int last) const {
+    size_t first_block = 0;
+    size_t last_block = block_count();
+    if (sorted()) {
+        // the block before the first one starting with `first` or after it
+        // may contain it
+        first_block = std::lower_bound(first_sources_, first_sources_ + block_count(), first) - first_sources_;
+        first_block = first_block > 0 ? first_block - 1 : 0;
+        last_block = std::upper_bound(first_sources_, first_sources_ + block_count(), last) - first_sources_;
+    }
+
+    Array<Edge> edges = decode(first_block, last_block);
+    edges.filter([first, last] (const Edge& e) {
+        return e.first >= first && e.first <= last;
+    });
+    return edges;
+}
+
+// Decompresses edges of `source` block by block into `target` in the format
+// of Array::save.
+inline size_t decompress(const std::string& source, const std::string& target) {
+    MappedEdges edges(source);
+    ArrayWriter<Edge> writer(target);
+    for (size_t block = 0; block < edges.block_count(); ++block) {
+        Array<Edge> decoded = edges.decode(block, block + 1);
+        writer.extend(decoded.data(), decoded.size());
+    }
+    writer.close();
+    return writer.size();
+}
+
+}
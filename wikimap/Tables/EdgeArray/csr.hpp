@@ -0,0 +1,259 @@
+#pragma once
+
+#include <string>
+#include <vector>
+#include <cstdint>
+#include <cstring>
+#include <fstream>
+#include <utility>
+#include <algorithm>
+#include <stdexcept>
+#include <omp.h>
+
+#include "array.hpp"
+
+// Forward and reverse adjacency of a directed graph in compressed sparse row
+// format. Nodes are numbered by increasing id and links of the node number i
+// are the targets between offsets i and i + 1, as sorted node numbers.
+// Duplicate links are kept.
+//
+// Layout of a file, each section starts at a multiple of 8 bytes:
+//   header (magic, node count, edge count)
+//   int32 ids of nodes
+//   uint64 offsets and int32 targets of outbound links
+//   uint64 offsets and int32 targets of inbound links
+namespace csr {
+
+typedef std::pair<int, int> Edge;
+typedef std::uint64_t offset_type;
+
+const char MAGIC[8] = {'W', 'M', 'C', 'S', 'R', '0', '0', '1'};
+
+struct Header {
+    char magic[8];
+    std::uint64_t node_count;
+    std::uint64_t edge_count;
+};
+
+inline size_t aligned(size_t size) {
+    return (size + 7) / 8 * 8;
+}
+
+struct Layout {
+    Layout(size_t node_count, size_t edge_count);
+
+    size_t nodes;
+    size_t out_offsets;
+    size_t out_targets;
+    size_t in_offsets;
+    size_t in_targets;
+    size_t size;
+};
+
+inline Layout::Layout(size_t node_count, size_t edge_count) {
+    size_t offsets_size = aligned(sizeof(offset_type) * (node_count + 1));
+    size_t targets_size = aligned(sizeof(int) * edge_count);
+
+    nodes = aligned(sizeof(Header));
+    out_offsets = nodes + aligned(sizeof(int) * node_count);
+    out_targets = out_offsets + offsets_size;
+    in_offsets = out_targets + targets_size;
+    in_targets = in_offsets + offsets_size;
+    size = in_targets + targets_size;
+}
+
+// Groups `count` edges by their start (or end if `reverse`) node. `index`
+// maps ids to node numbers.
+inline void build_adjacency(
+        const Edge* edges,
+        size_t count,
+        const std::vector<int>& index,
+        size_t node_count,
+        bool reverse,
+        std::vector<offset_type>& offsets,
+        std::vector<int>& targets) {
+
+    std::vector<offset_type> next(node_count + 1, 0);
+
+#pragma omp parallel for schedule(static)
+    for (long i = 0; i < (long)count; ++i) {
+        int from = index[reverse ? edges[i].second : edges[i].first];
+#pragma omp atomic
+        ++next[from + 1];
+    }
+
+    for (size_t node = 0; node < node_count; ++node) {
+        next[node + 1] += next[node];
+    }
+    offsets = next;
+
+    targets.resize(count);
+#pragma omp parallel for schedule(static)
+    for (long i = 0; i < (long)count; ++i) {
+        int from = index[reverse ? edges[i].second : edges[i].first];
+        int to = index[reverse ? edges[i].first : edges[i].second];
+        offset_type position;
+#pragma omp atomic capture
+        position = next[from]++;
+        targets[position] = to;
+    }
+
+    // positions were taken in any order
+#pragma omp parallel for schedule(dynamic, 1024)
+    for (long node = 0; node < (long)node_count; ++node) {
+        std::sort(targets.begin() + offsets[node], targets.begin() + offsets[node + 1]);
+    }
+}
+
+inline void write_section(std::ofstream& outfile, size_t position, const void* data, size_t size) {
+    outfile.seekp(position);
+    if (size > 0) {
+        outfile.write((const char*)data, size);
+    }
+}
+
+// Builds both adjacencies of `count` edges in parallel and saves them to
+// `path`.
+inline void save(const Edge* edges, size_t count, const std::string& path) {
+    int max_id = -1;
+    int min_id = 0;
+#pragma omp parallel for schedule(static) reduction(max: max_id) reduction(min: min_id)
+    for (long i = 0; i < (long)count; ++i) {
+        max_id = std::max(max_id, std::max(edges[i].first, edges[i].second));
+        min_id = std::min(min_id, std::min(edges[i].first, edges[i].second));
+    }
+    if (min_id < 0) {
+        throw std::runtime_error("Ids of nodes must not be negative.");
+    }
+
+    std::vector<int> index(max_id + 1, 0);
+#pragma omp parallel for schedule(static)
+    for (long i = 0; i < (long)count; ++i) {
+#pragma omp atomic write
+        index[edges[i].first] = 1;
+#pragma omp atomic write
+        index[edges[i].second] = 1;
+    }
+
+    std::vector<int> nodes;
+    for (int id = 0; id <= max_id; ++id) {
+        if (index[id]) {
+            index[id] = nodes.size();
+            nodes.push_back(id);
+        } else {
+            index[id] = -1;
+        }
+    }
+
+    std::vector<offset_type> offsets;
+    std::vector<int> targets;
+    Layout layout(nodes.size(), count);
+    Header header;
+    std::memcpy(header.magic, MAGIC, sizeof(MAGIC));
+    header.node_count = nodes.size();
+    header.edge_count = count;
+
+    std::ofstream outfile(path.c_str(), std::ios::out | std::ios::binary);
+    if (!outfile) {
+        throw std::runtime_error("Cannot open " + path + " for writing.");
+    }
+    write_section(outfile, 0, &header, sizeof(header));
+    write_section(outfile, layout.nodes, nodes.data(), sizeof(int) * nodes.size());
+
+    build_adjacency(edges, count, index, nodes.size(), false, offsets, targets);
+    write_section(outfile, layout.out_offsets, offsets.data(), sizeof(offset_type) * offsets.size());
+    write_section(outfile, layout.out_targets, targets.data(), sizeof(int) * targets.size());
+
+    build_adjacency(edges, count, index, nodes.size(), true, offsets, targets);
+    write_section(outfile, layout.in_offsets, offsets.data(), sizeof(offset_type) * offsets.size());
+    write_section(outfile, layout.in_targets, targets.data(), sizeof(int) * targets.size());
+
+    // the padding of the last section
+    outfile.seekp(layout.size - 1);
+    outfile.put(0);
+    if (!outfile) {
+        throw std::runtime_error("Cannot write " + path + ".");
+    }
+}
+
+// Graph saved by csr::save, mapped into memory.
+class MappedGraph {
+public:
+    explicit MappedGraph(const std::string& path);
+
+    size_t node_count() const { return header_.node_count; }
+    size_t edge_count() const { return header_.edge_count; }
+
+    const int* nodes() const { return (const int*)(file_.data() + layout_.nodes); }
+    const offset_type* offsets(bool reverse) const;
+    const int* targets(bool reverse) const;
+
+    // Edges (as ids) between nodes with nonzero `selected` values, indexed
+    // by node numbers, grouped by start nodes.
+    Array<Edge> edges_between(const unsigned char* selected) const;
+
+private:
+    MappedFile file_;
+    Header header_;
+    Layout layout_;
+};
+
+inline MappedGraph::MappedGraph(const std::string& path)
+: file_(path), header_(), layout_(0, 0)
+{
+    if (file_.size() < sizeof(Header)
+            || std::memcmp(file_.data(), MAGIC, sizeof(MAGIC)) != 0) {
+        throw std::runtime_error(path + " is not a CSR graph.");
+    }
+    std::memcpy(&header_, file_.data(), sizeof(Header));
+    layout_ = Layout(header_.node_count, header_.edge_count);
+    if (file_.size() < layout_.size) {
+        throw std::runtime_error("File " + path + " is truncated.");
+    }
+}
+
+inline const offset_type* MappedGraph::offsets(bool reverse) const {
+    return (const offset_type*)(file_.data() + (reverse ? layout_.in_offsets : layout_.out_offsets));
+}
+
+inline const int* MappedGraph::targets(bool reverse) const {
+    return (const int*)(file_.data() + (reverse ? layout_.in_targets : layout_.out_targets));
+}
+
+inline Array<Edge> MappedGraph::edges_between(const unsigned char* selected) const {
+    const long count = node_count();
+    const int* ids = nodes();
+    const offset_type* offsets_ = offsets(false);
+    const int* targets_ = targets(false);
+
+    std::vector<offset_type> positions(count + 1, 0);
+#pragma omp parallel for schedule(dynamic, 1024)
+    for (long node = 0; node < count; ++node) {
+        if (selected[node]) {
+            offset_type links = 0;
+            for (offset_type i = offsets_[node]; i < offsets_[node + 1]; ++i) {
+                links += selected[targets_[i]] != 0;
+            }
+            positions[node + 1] = links;
+        }
+    }
+    for (long node = 0; node < count; ++node) {
+        positions[node + 1] += positions[node];
+    }
+
+    Array<Edge> edges(positions[count]);
+#pragma omp parallel for schedule(dynamic, 1024)
+    for (long node = 0; node < count; ++node) {
+        if (selected[node]) {
+            offset_type position = positions[node];
+            for (offset_type i = offsets_[node]; i < offsets_[node + 1]; ++i) {
+                if (selected[targets_[i]]) {
+                    edges[position++] = Edge(ids[node], ids[targets_[i]]);
+                }
+            }
+        }
+    }
+    return edges;
+}
+
+}
@@ -1,12 +1,19 @@
 #include <array>
-#include <unordered_set>
+#include <memory>
 #include <iterator>
+#include <vector>
 #include <stdexcept>
 
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
+#include <pybind11/numpy.h>
 
 #include "array.hpp"
+#include "bitmap.hpp"
+#include "csr.hpp"
+#include "radix_sort.hpp"
+#include "external.hpp"
+#include "compressed.hpp"
 
 namespace py = pybind11;
 
@@ -77,12 +84,15 @@ Edge PyTupleToEdge(const py::handle& handle) {
 //     return py::make_tuple(edge[0], edge[1]);
 // }
 
+// Array of edges, either in memory or mapped from a file. A mapped array is
+// read-only, operations modifying it copy it into memory first.
 class EdgeArrayExt {
 private:
     Array<Edge> array_;
+    std::shared_ptr<MappedArray<Edge>> mapped_;
 
 public:
-    typedef Array<Edge>::const_iterator const_iterator;
+    typedef const Edge* const_iterator;
 
 public:
     explicit EdgeArrayExt();
@@ -91,13 +101,20 @@ public:
 
     void append(const Edge& edge);
     void extend(py::iterable iterable);
+    void extendFromBuffer(py::array_t<int, py::array::c_style | py::array::forcecast> edges);
 
-    void save(const std::string& path);
+    void save(const std::string& path, bool compress);
     void load(const std::string& path);
+    void loadStartNodeRange(const std::string& path, int first, int last);
+    void map(const std::string& path);
+    bool isMapped() const;
+    void saveCSR(const std::string& path);
 
-    void sortByColumn(int column);
-    void filterByNodes(py::iterable iterable);
-    void filterColumnByNodes(py::iterable iterable, int column);
+    void assign(Array<Edge>&& array);
+
+    void sortByColumn(int column, bool thenByOther);
+    void filterByNodes(py::array_t<int, py::array::c_style | py::array::forcecast> nodes);
+    void filterColumnByNodes(py::array_t<int, py::array::c_style | py::array::forcecast> nodes, int column);
     void inverseEdges();
     void shuffle();
 
@@ -105,6 +122,12 @@ public:
 
     const_iterator begin() const;
     const_iterator end() const;
+
+    py::buffer_info buffer();
+    py::array view(py::object self);
+
+private:
+    void materialize();
 };
 
 EdgeArrayExt::EdgeArrayExt()
@@ -112,122 +135,353 @@ EdgeArrayExt::EdgeArrayExt()
 { }
 
 void EdgeArrayExt::populate(py::iterable iterable) {
+    mapped_.reset();
     py::iterator it = py::iter(iterable);
     auto adapted_it = casting_iterator<py::iterator, Edge>(it, PyTupleToEdge);
     array_.assign(adapted_it, decltype(adapted_it)());
 }
 
 void EdgeArrayExt::append(const Edge& edge) {
+    materialize();
     array_.append(edge);
 }
 
 void EdgeArrayExt::extend(py::iterable iterable) {
+    materialize();
     py::iterator it = py::iter(iterable);
     auto adapted_it = casting_iterator<py::iterator, Edge>(it, PyTupleToEdge);
     array_.extend(adapted_it, decltype(adapted_it)());
 }
 
+// Appends edges given as a (N, 2) array.
+void EdgeArrayExt::extendFromBuffer(py::array_t<int, py::array::c_style | py::array::forcecast> edges) {
+    if (edges.ndim() != 2 || edges.shape(1) != 2) {
+        throw std::runtime_error("Edges must be a (N, 2) array.");
+    }
+    const Edge* first = (const Edge*)edges.data();
+    const Edge* last = first + edges.shape(0);
+    if (first < end() && begin() < last) {
+        // edges of the array itself (e.g. a.extend(a)) are moved by
+        // materializing or growing it, so they are copied first
+        std::vector<Edge> copy(first, last);
+        materialize();
+        array_.extend(copy.begin(), copy.end());
+        return;
+    }
+    materialize();
+    array_.extend(first, last);
+}
+
 EdgeArrayExt::const_iterator EdgeArrayExt::begin() const {
-    return array_.begin();
+    return mapped_ ? mapped_->begin() : array_.data();
 }
 
 EdgeArrayExt::const_iterator EdgeArrayExt::end() const {
-    return array_.end();
+    return mapped_ ? mapped_->end() : array_.data() + array_.size();
 }
 
-void EdgeArrayExt::sortByColumn(int column) {
-    if (column == 0) {
-        array_.sort([] (const Edge& e1, const Edge& e2) {
-            return e1.first < e2.first;
-        });
-    } else if (column == 1) {
-        array_.sort([] (const Edge& e1, const Edge& e2) {
-            return e1.second < e2.second;
+// (N, 2) int32 view of the edges. It is valid until the array is modified.
+py::buffer_info EdgeArrayExt::buffer() {
+    return py::buffer_info(
+        (void*)begin(),
+        sizeof(int),
+        py::format_descriptor<int>::format(),
+        2,
+        {(size_t)size(), (size_t)2},
+        {sizeof(Edge), sizeof(int)});
+}
+
+// (N, 2) int32 array viewing the edges. A view of a mapped array keeps the
+// mapping alive, so it stays valid when the array is copied into memory, a view
+// of edges in memory is valid until the array is modified.
+py::array EdgeArrayExt::view(py::object self) {
+    py::object base = self;
+    if (mapped_) {
+        base = py::capsule(new std::shared_ptr<MappedArray<Edge>>(mapped_), [] (void* mapped) {
+            delete static_cast<std::shared_ptr<MappedArray<Edge>>*>(mapped);
         });
-    } else {
-        throw std::runtime_error("Invalid column number (must 0 or 1).");
     }
+    return py::array(
+        py::dtype::of<int>(),
+        std::vector<size_t>{(size_t)size(), (size_t)2},
+        std::vector<size_t>{sizeof(Edge), sizeof(int)},
+        begin(),
+        base);
 }
 
-void EdgeArrayExt::filterByNodes(py::iterable iterable) {
-    py::iterator it = py::iter(iterable);
-    auto adapted_it = casting_iterator<py::iterator, int>(
-        it,
-        [] (const py::handle& handle) {
-            return handle.cast<int>();
-        });
+void EdgeArrayExt::materialize() {
+    if (mapped_) {
+        array_.assign(mapped_->begin(), mapped_->end());
+        mapped_.reset();
+    }
+}
 
-    std::unordered_set<int> allowed(adapted_it, decltype(adapted_it)());
-    array_.filter([&allowed] (const Edge& e) {
-        return allowed.find(e.first) != allowed.end()
-            && allowed.find(e.second) != allowed.end();
-    });
+// Stable sort by the column, edges with equal nodes in it are sorted by the
+// other column if `thenByOther` is true.
+void EdgeArrayExt::sortByColumn(int column, bool thenByOther) {
+    if (column != 0 && column != 1) {
+        throw std::runtime_error("Invalid column number (must 0 or 1).");
+    }
+    materialize();
+
+    auto first = [] (const Edge& e) { return radix::ordered_key(e.first); };
+    auto second = [] (const Edge& e) { return radix::ordered_key(e.second); };
+    if (column == 0) {
+        if (thenByOther) {
+            radix::sort(array_.data(), array_.size(), second);
+        }
+        radix::sort(array_.data(), array_.size(), first);
+    } else {
+        if (thenByOther) {
+            radix::sort(array_.data(), array_.size(), first);
+        }
+        radix::sort(array_.data(), array_.size(), second);
+    }
 }
 
-void EdgeArrayExt::filterColumnByNodes(py::iterable iterable, int column) {
-    py::iterator it = py::iter(iterable);
-    auto adapted_it = casting_iterator<py::iterator, int>(
-        it,
-        [] (const py::handle& handle) {
-            return handle.cast<int>();
-        });
+void EdgeArrayExt::filterByNodes(py::array_t<int, py::array::c_style | py::array::forcecast> nodes) {
+    Bitmap allowed(nodes.data(), nodes.size());
+    // only the remaining edges of a mapped array are copied
+    array_.assign_filtered(begin(), size(), [&allowed] (const Edge& e) {
+        return allowed.contains(e.first) && allowed.contains(e.second);
+    });
+    mapped_.reset();
+}
 
-    std::unordered_set<int> allowed(adapted_it, decltype(adapted_it)());
+void EdgeArrayExt::filterColumnByNodes(py::array_t<int, py::array::c_style | py::array::forcecast> nodes, int column) {
+    Bitmap allowed(nodes.data(), nodes.size());
 
     if (column == 0) {
-        array_.filter([&allowed] (const Edge& e) {
-            return allowed.find(e.first) != allowed.end();
+        array_.assign_filtered(begin(), size(), [&allowed] (const Edge& e) {
+            return allowed.contains(e.first);
         });
     } else if (column == 1) {
-        array_.filter([&allowed] (const Edge& e) {
-            return allowed.find(e.second) != allowed.end();
+        array_.assign_filtered(begin(), size(), [&allowed] (const Edge& e) {
+            return allowed.contains(e.second);
         });
     } else {
         throw std::runtime_error("Invalid column number (must 0 or 1).");
     }
+    mapped_.reset();
 }
 
 void EdgeArrayExt::inverseEdges() {
+    materialize();
     array_.for_each([] (Edge& e) {
         std::swap(e.first, e.second);
     });
 }
 
 void EdgeArrayExt::shuffle() {
+    materialize();
     array_.shuffle();
 }
 
 int EdgeArrayExt::size() {
-    return array_.size();
+    return mapped_ ? mapped_->size() : array_.size();
 }
 
-void EdgeArrayExt::save(const std::string& path) {
-    array_.save(path);
+void EdgeArrayExt::save(const std::string& path, bool compress) {
+    // the mapped file may be the saved one
+    materialize();
+    if (compress) {
+        compressed::save(array_.data(), array_.size(), path);
+    } else {
+        array_.save(path);
+    }
 }
 
+// Loads edges saved in either format.
 void EdgeArrayExt::load(const std::string& path) {
-    array_.load(path);
+    mapped_.reset();
+    if (compressed::is_compressed(path)) {
+        array_ = compressed::MappedEdges(path).decode();
+    } else {
+        array_.load(path);
+    }
+}
+
+// Loads edges with start nodes between `first` and `last` (inclusive). Only
+// blocks of compressed edges sorted by start nodes that may contain them are
+// decoded.
+void EdgeArrayExt::loadStartNodeRange(const std::string& path, int first, int last) {
+    mapped_.reset();
+    if (compressed::is_compressed(path)) {
+        array_ = compressed::MappedEdges(path).decode_sources(first, last);
+    } else {
+        MappedArray<Edge> edges(path);
+        array_.assign_filtered(edges.data(), edges.size(), [first, last] (const Edge& e) {
+            return e.first >= first && e.first <= last;
+        });
+    }
+}
+
+// Maps edges saved by Array::save, compressed edges are decoded instead.
+void EdgeArrayExt::map(const std::string& path) {
+    if (compressed::is_compressed(path)) {
+        load(path);
+        return;
+    }
+    mapped_ = std::make_shared<MappedArray<Edge>>(path);
+    array_ = Array<Edge>();
+}
+
+bool EdgeArrayExt::isMapped() const {
+    return (bool)mapped_;
+}
+
+void EdgeArrayExt::saveCSR(const std::string& path) {
+    csr::save(begin(), size(), path);
+}
+
+void EdgeArrayExt::assign(Array<Edge>&& array) {
+    mapped_.reset();
+    array_ = std::move(array);
+}
+
+// Writes edges from an iterable to a file in the format of Array::save, or
+// appends them if `append` is true, keeping at most `blockSize` of them in
+// memory. Returns the size of the file.
+size_t externalWrite(const std::string& path, py::iterable iterable, size_t blockSize, bool append) {
+    size_t resumeAt = append ? MappedArray<Edge>(path).size() : 0;
+    ArrayWriter<Edge> writer(path, resumeAt);
+    std::vector<Edge> block;
+    block.reserve(blockSize);
+    for (auto handle : iterable) {
+        block.push_back(PyTupleToEdge(handle));
+        if (block.size() == blockSize) {
+            writer.extend(block);
+            block.clear();
+        }
+    }
+    writer.extend(block);
+    writer.close();
+    return writer.size();
+}
+
+// Appends edges given as a (N, 2) array to a file in the format of
+// Array::save. Returns the size of the file.
+size_t externalAppendBuffer(const std::string& path, py::array_t<int, py::array::c_style | py::array::forcecast> edges) {
+    if (edges.ndim() != 2 || edges.shape(1) != 2) {
+        throw std::runtime_error("Edges must be a (N, 2) array.");
+    }
+    ArrayWriter<Edge> writer(path, MappedArray<Edge>(path).size());
+    writer.extend((const Edge*)edges.data(), edges.shape(0));
+    writer.close();
+    return writer.size();
+}
+
+// Writes edges of `source` with allowed nodes in the column (or in both
+// columns if it is -1) to `target`, returns their number.
+size_t externalFilter(const std::string& source, const std::string& target,
+                      py::array_t<int, py::array::c_style | py::array::forcecast> nodes,
+                      int column, size_t blockSize) {
+    Bitmap allowed(nodes.data(), nodes.size());
+    auto keep = [] (Edge&) { };
+    if (column == -1) {
+        return external::rewrite(source, target, blockSize, false, [&allowed] (const Edge& e) {
+            return allowed.contains(e.first) && allowed.contains(e.second);
+        }, keep);
+    } else if (column == 0) {
+        return external::rewrite(source, target, blockSize, false, [&allowed] (const Edge& e) {
+            return allowed.contains(e.first);
+        }, keep);
+    } else if (column == 1) {
+        return external::rewrite(source, target, blockSize, false, [&allowed] (const Edge& e) {
+            return allowed.contains(e.second);
+        }, keep);
+    } else {
+        throw std::runtime_error("Invalid column number (must -1, 0 or 1).");
+    }
+}
+
+// Writes edges of `source` to `target` inversed, or as they are if `inverse`
+// is false, appending them if `append` is true. Returns the size of `target`.
+size_t externalCopy(const std::string& source, const std::string& target,
+                    bool inverse, bool append, size_t blockSize) {
+    auto all = [] (const Edge&) { return true; };
+    if (inverse) {
+        return external::rewrite(source, target, blockSize, append, all, [] (Edge& e) {
+            std::swap(e.first, e.second);
+        });
+    }
+    return external::rewrite(source, target, blockSize, append, all, [] (Edge&) { });
+}
+
+size_t externalSort(const std::string& source, const std::string& target,
+                    int column, bool thenByOther, size_t blockSize,
+                    const std::string& runPrefix) {
+    if (column != 0 && column != 1) {
+        throw std::runtime_error("Invalid column number (must 0 or 1).");
+    }
+    return external::sort(source, target, column, thenByOther, blockSize, runPrefix);
 }
 
 PYBIND11_PLUGIN(edgearrayext)
 {
     py::module m("edgearrayext");
-    py::class_<EdgeArrayExt>(m, "EdgeArrayExt")
+    py::class_<EdgeArrayExt>(m, "EdgeArrayExt", py::buffer_protocol())
         .def(py::init<>())
+        .def_buffer(&EdgeArrayExt::buffer)
+        .def("view", [] (py::object self) {
+            return self.cast<EdgeArrayExt&>().view(self);
+        })
         .def("populate", &EdgeArrayExt::populate)
         .def("append", &EdgeArrayExt::append)
         .def("extend", &EdgeArrayExt::extend)
+        .def("extendFromBuffer", &EdgeArrayExt::extendFromBuffer)
         .def("__iter__", [] (const EdgeArrayExt& self) {
             return py::make_iterator(self.begin(), self.end());
         }, py::keep_alive<0, 1>())
-        .def("sortByColumn", &EdgeArrayExt::sortByColumn)
+        .def("sortByColumn", &EdgeArrayExt::sortByColumn,
+             py::arg("column"), py::arg("thenByOther") = false)
         .def("filterByNodes", &EdgeArrayExt::filterByNodes)
         .def("filterColumnByNodes", &EdgeArrayExt::filterColumnByNodes)
         .def("inverseEdges", &EdgeArrayExt::inverseEdges)
         .def("shuffle", &EdgeArrayExt::shuffle)
         .def("size", &EdgeArrayExt::size)
-        .def("save", &EdgeArrayExt::save)
-        .def("load", &EdgeArrayExt::load);
+        .def("save", &EdgeArrayExt::save, py::arg("path"), py::arg("compress") = false)
+        .def("load", &EdgeArrayExt::load)
+        .def("loadStartNodeRange", &EdgeArrayExt::loadStartNodeRange)
+        .def("map", &EdgeArrayExt::map)
+        .def("isMapped", &EdgeArrayExt::isMapped)
+        .def("saveCSR", &EdgeArrayExt::saveCSR);
+
+    m.def("externalWrite", &externalWrite);
+    m.def("externalAppendBuffer", &externalAppendBuffer);
+    m.def("externalFilter", &externalFilter);
+    m.def("externalCopy", &externalCopy);
+    m.def("externalSort", &externalSort);
+    m.def("isCompressed", &compressed::is_compressed);
+    m.def("decompress", &compressed::decompress);
+
+    py::class_<csr::MappedGraph>(m, "LinkGraphExt")
+        .def(py::init<std::string>())
+        .def("nodeCount", &csr::MappedGraph::node_count)
+        .def("edgeCount", &csr::MappedGraph::edge_count)
+        // arrays viewing the mapped file keep the graph alive
+        .def("nodes", [] (py::object self) {
+            const auto& graph = self.cast<const csr::MappedGraph&>();
+            return py::array(graph.node_count(), graph.nodes(), self);
+        })
+        .def("offsets", [] (py::object self, bool reverse) {
+            const auto& graph = self.cast<const csr::MappedGraph&>();
+            return py::array(graph.node_count() + 1, graph.offsets(reverse), self);
+        })
+        .def("targets", [] (py::object self, bool reverse) {
+            const auto& graph = self.cast<const csr::MappedGraph&>();
+            return py::array(graph.edge_count(), graph.targets(reverse), self);
+        })
+        .def("edgesBetween", [] (
+                const csr::MappedGraph& self,
+                py::array_t<unsigned char, py::array::c_style | py::array::forcecast> selected,
+                EdgeArrayExt& edges) {
+
+            if ((size_t)selected.size() != self.node_count()) {
+                throw std::runtime_error("Selected nodes must be a mask of all nodes.");
+            }
+            edges.assign(self.edges_between(selected.data()));
+        });
 
     return m.ptr();
 }
\ No newline at end of file
@@ -0,0 +1,130 @@
+#pragma once
+
+#include <string>
+#include <vector>
+#include <queue>
+#include <memory>
+#include <cstdio>
+#include <cstdint>
+#include <utility>
+#include <functional>
+#include <algorithm>
+#include <omp.h>
+
+#include "array.hpp"
+#include "radix_sort.hpp"
+
+// Operations on edges saved by Array<Edge>::save that keep at most a block
+// of edges in memory. Sources are mapped, so they are read through the page
+// cache and do not count towards the memory of the process. A target must
+// not be a source.
+namespace external {
+
+typedef std::pair<int, int> Edge;
+
+// Writes the edges of `source` satisfying `predicate`, modified by
+// `transform`, to `target`, or appends them if `append` is true. Returns the
+// size of `target`.
+template<class Predicate, class Transform>
+size_t rewrite(const std::string& source, const std::string& target,
+               size_t block_size, bool append,
+               Predicate predicate, Transform transform) {
+    MappedArray<Edge> edges(source);
+    size_t resume_at = 0;
+    if (append) {
+        resume_at = MappedArray<Edge>(target).size();
+    }
+    ArrayWriter<Edge> writer(target, resume_at);
+    Array<Edge> block;
+
+    for (size_t begin = 0; begin < edges.size(); begin += block_size) {
+        size_t size = std::min(block_size, edges.size() - begin);
+        block.assign_filtered(edges.data() + begin, size, predicate);
+#pragma omp parallel for schedule(static)
+        for (long i = 0; i < (long)block.size(); ++i) {
+            transform(block[i]);
+        }
+        writer.extend(block.data(), block.size());
+    }
+    writer.close();
+    return writer.size();
+}
+
+// Writes the edges of `source` to `target` sorted by the column, keeping the
+// order of edges with equal nodes in it, or sorting them by the other column
+// if `then_by_other` is true.
+//
+// Blocks of `block_size` edges are sorted in memory and saved as runs to
+// files starting with `run_prefix`, then the runs are merged. A radix sort of
+// a block takes twice its memory.
+inline size_t sort(const std::string& source, const std::string& target,
+                   int column, bool then_by_other, size_t block_size,
+                   const std::string& run_prefix) {
+    auto key = [column, then_by_other] (const Edge& e) {
+        std::uint64_t primary = radix::ordered_key(column == 0 ? e.first : e.second);
+        std::uint64_t secondary = then_by_other ? radix::ordered_key(column == 0 ? e.second : e.first) : 0;
+        return (primary << 32) | secondary;
+    };
+
+    std::vector<std::string> runs;
+    {
+        MappedArray<Edge> edges(source);
+        Array<Edge> block;
+        for (size_t begin = 0; begin < edges.size() || runs.empty(); begin += block_size) {
+            size_t size = std::min(block_size, edges.size() - begin);
+            block.assign(edges.data() + begin, edges.data() + begin + size);
+            if (then_by_other) {
+                radix::sort(block.data(), block.size(), [column] (const Edge& e) {
+                    return radix::ordered_key(column == 0 ? e.second : e.first);
+                });
+            }
+            radix::sort(block.data(), block.size(), [column] (const Edge& e) {
+                return radix::ordered_key(column == 0 ? e.first : e.second);
+            });
+
+            // a single run is the result
+            runs.push_back(edges.size() <= block_size ? target : run_prefix + std::to_string(runs.size()));
+            block.save(runs.back());
+        }
+    }
+    if (runs.size() == 1) {
+        return MappedArray<Edge>(target).size();
+    }
+
+    // runs keep the order of the source, so ties are taken from the earlier
+    // run to keep the sort stable
+    typedef std::pair<std::uint64_t, size_t> Head;
+    std::priority_queue<Head, std::vector<Head>, std::greater<Head>> heads;
+    std::vector<std::unique_ptr<MappedArray<Edge>>> mapped_runs;
+    std::vector<size_t> positions(runs.size(), 0);
+    for (size_t run = 0; run < runs.size(); ++run) {
+        mapped_runs.emplace_back(new MappedArray<Edge>(runs[run]));
+        // the run stays mapped and its pages are freed with the file
+        std::remove(runs[run].c_str());
+        if (mapped_runs[run]->size() > 0) {
+            heads.push(Head(key(*mapped_runs[run]->begin()), run));
+        }
+    }
+
+    ArrayWriter<Edge> writer(target);
+    std::vector<Edge> merged;
+    merged.reserve(std::min(block_size, (size_t)1 << 20));
+    while (!heads.empty()) {
+        size_t run = heads.top().second;
+        heads.pop();
+        const MappedArray<Edge>& edges = *mapped_runs[run];
+        merged.push_back(edges.data()[positions[run]++]);
+        if (positions[run] < edges.size()) {
+            heads.push(Head(key(edges.data()[positions[run]]), run));
+        }
+        if (merged.size() == merged.capacity()) {
+            writer.extend(merged);
+            merged.clear();
+        }
+    }
+    writer.extend(merged);
+    writer.close();
+    return writer.size();
+}
+
+}
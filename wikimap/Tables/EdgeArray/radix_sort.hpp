@@ -0,0 +1,92 @@
+#pragma once
+
+#include <vector>
+#include <cstdint>
+#include <algorithm>
+#include <omp.h>
+
+namespace radix {
+
+const int DIGIT_BITS = 8;
+const int DIGIT_COUNT = 32 / DIGIT_BITS;
+const int BUCKET_COUNT = 1 << DIGIT_BITS;
+
+// Maps an int to an unsigned key with the same order.
+inline std::uint32_t ordered_key(int value) {
+    return (std::uint32_t)value ^ 0x80000000u;
+}
+
+// Sorts `count` values by 32 bit keys returned by `key` (as unsigned ints),
+// keeping the order of values with equal keys.
+//
+// It is an LSD radix sort over 8 bit digits. Digits that are the same in all
+// keys are skipped, so ids smaller than 2^24 take three passes. In each pass
+// values are split into one range per thread. Threads count the digits in
+// their ranges, then move values to positions given by a prefix sum of the
+// counts ordered by digit and then by range, which keeps the sort stable.
+template<class T, class Key>
+void sort(T* values, size_t count, Key key) {
+    std::uint32_t all_ones = ~0u;
+    std::uint32_t any_ones = 0;
+#pragma omp parallel for schedule(static) reduction(&: all_ones) reduction(|: any_ones)
+    for (long i = 0; i < (long)count; ++i) {
+        std::uint32_t k = key(values[i]);
+        all_ones &= k;
+        any_ones |= k;
+    }
+    const std::uint32_t varying = all_ones ^ any_ones;
+
+    const int range_count = omp_get_max_threads();
+    std::vector<size_t> positions(range_count * BUCKET_COUNT);
+    std::vector<T> buffer;
+    T* source = values;
+    T* target = nullptr;
+
+    for (int digit = 0; digit < DIGIT_COUNT; ++digit) {
+        const int shift = digit * DIGIT_BITS;
+        if (((varying >> shift) & (BUCKET_COUNT - 1)) == 0) {
+            continue;
+        }
+        if (buffer.empty()) {
+            buffer.resize(count);
+            target = buffer.data();
+        }
+
+        std::fill(positions.begin(), positions.end(), 0);
+#pragma omp parallel for schedule(static, 1)
+        for (int range = 0; range < range_count; ++range) {
+            size_t* counts = &positions[range * BUCKET_COUNT];
+            for (size_t i = count * range / range_count; i < count * (range + 1) / range_count; ++i) {
+                ++counts[(key(source[i]) >> shift) & (BUCKET_COUNT - 1)];
+            }
+        }
+
+        size_t next = 0;
+        for (int bucket = 0; bucket < BUCKET_COUNT; ++bucket) {
+            for (int range = 0; range < range_count; ++range) {
+                size_t& position = positions[range * BUCKET_COUNT + bucket];
+                size_t bucket_count = position;
+                position = next;
+                next += bucket_count;
+            }
+        }
+
+#pragma omp parallel for schedule(static, 1)
+        for (int range = 0; range < range_count; ++range) {
+            size_t* next_positions = &positions[range * BUCKET_COUNT];
+            for (size_t i = count * range / range_count; i < count * (range + 1) / range_count; ++i) {
+                target[next_positions[(key(source[i]) >> shift) & (BUCKET_COUNT - 1)]++] = source[i];
+            }
+        }
+        std::swap(source, target);
+    }
+
+    if (source != values) {
+#pragma omp parallel for schedule(static)
+        for (long i = 0; i < (long)count; ++i) {
+            values[i] = source[i];
+        }
+    }
+}
+
+}
@@ -1,11 +1,19 @@
 #include "array.hpp"
+#include "radix_sort.hpp"
 #include <chrono>
+#include <random>
+#include <utility>
+#include <cstdlib>
 #include <iostream>
 #include <functional>
 #include <cstdio>
+#include <numeric>
+#include <stdexcept>
 #include <algorithm>
 
 const int bigSize = 409000000;
+// edge arrays take twice as much memory, they are sorted with a copy
+int bigEdgeCount = bigSize / 4;
 
 void check(const std::string& message, bool assertion) {
     if (assertion) {
@@ -133,10 +141,42 @@ void testSaveLoad() {
     tLoad.report();
 }
 
+bool writeFails(const std::vector<int>& values) {
+    try {
+        ArrayWriter<int> writer("/dev/full");
+        writer.extend(values);
+        writer.close();
+    } catch (const std::runtime_error&) {
+        return true;
+    }
+    return false;
+}
+
+void testWriting() {
+    std::string fileName = "/tmp/sjdlajwqkclk";
+    std::vector<int> values(1000000);
+    std::iota(values.begin(), values.end(), 0);
+    {
+        ArrayWriter<int> writer(fileName);
+        writer.extend(values);
+        writer.extend(values.data(), 10);
+        writer.close();
+    }
+    Array<int> a;
+    a.load(fileName);
+    std::remove(fileName.c_str());
+    values.insert(values.end(), values.begin(), values.begin() + 10);
+    check("Writing incrementally", std::equal(values.begin(), values.end(), a.begin()) && a.size() == values.size());
+    std::cerr << "\n";
+    // a full disk fails buffered writes on close and larger ones on extend
+    check("Failed writes throw", writeFails(std::vector<int>(10)) && writeFails(values));
+    std::cerr << "\n";
+}
+
 void testFiltering() {
     Array<int> a1 = getArray(bigSize);
 
-    Timer t;
+    Timer t(true, false);
     a1.filter([] (const int& r) { return r % 2 && r < 1000; });
     t.stop();
     Array<int> a2;
@@ -145,6 +185,22 @@ void testFiltering() {
     }
 
     check("Filtering", a1 == a2);
+    t.report();
+
+    // kept values are spread over the ranges of all threads
+    auto byThree = [] (const int& r) { return r % 3 == 0; };
+    std::vector<int> values(1000001);
+    std::iota(values.begin(), values.end(), 0);
+    Array<int> expected;
+    for (int i = 0; i < (int)values.size(); i += 3) {
+        expected.append(i);
+    }
+    Array<int> a3 = getArray(values.size());
+    a3.filter(byThree);
+    Array<int> a4 = getArray(10);
+    a4.assign_filtered(values.data(), values.size(), byThree);
+    check("Filtering values of the array and of others", a3 == expected && a4 == expected);
+    std::cerr << "\n";
 }
 
 void testShuffling() {
@@ -178,6 +234,44 @@ void testSorting() {
     check("Sorting", std::is_sorted(a.begin(), a.end(), comparator));
 }
 
+void testRadixSorting() {
+    typedef std::pair<int, int> Edge;
+    Array<Edge> a1(bigEdgeCount);
+    std::mt19937 generator(0);
+    std::uniform_int_distribution<int> nodes(0, 50000000);
+    for (int i = 0; i < bigEdgeCount; ++i) {
+        a1[i] = Edge(nodes(generator), nodes(generator));
+    }
+    Array<Edge> a2 = a1;
+
+    auto byFirst = [] (const Edge& e1, const Edge& e2) {
+        return e1.first < e2.first;
+    };
+
+    Timer tComparison(true, false);
+    a1.sort(byFirst);
+    tComparison.stop();
+
+    Timer tRadix(true, false);
+    radix::sort(a2.data(), a2.size(), [] (const Edge& e) {
+        return radix::ordered_key(e.first);
+    });
+    tRadix.stop();
+
+    bool sorted = true;
+    bool sameKeys = true;
+    for (int i = 0; i < bigEdgeCount; ++i) {
+        sameKeys = sameKeys && a1[i].first == a2[i].first;
+    }
+    for (int i = 1; i < bigEdgeCount; ++i) {
+        sorted = sorted && a2[i - 1].first <= a2[i].first;
+    }
+    check("Comparison sorting of edges", std::is_sorted(a1.begin(), a1.end(), byFirst));
+    tComparison.report();
+    check("Radix sorting of edges", sorted && sameKeys);
+    tRadix.report();
+}
+
 void testReversing() {
     Array<int> a1 = getArray(bigSize);
     Array<int> a2 = a1;
@@ -209,13 +303,19 @@ void testForEach() {
     check("For each", zeroed);
 }
 
-int main() {
+// An optional argument sets the number of edges sorted by testRadixSorting.
+int main(int argc, char** argv) {
+    if (argc > 1) {
+        bigEdgeCount = std::atoi(argv[1]);
+    }
     testConstructing();
     testEquality();
     testSaveLoad();
+    testWriting();
     testFiltering();
     testShuffling();
     testSorting();
+    testRadixSorting();
     testReversing();
     testForEach();
     return 0;
@@ -0,0 +1,53 @@
+from EdgeArray import asNodeIds
+import numpy
+
+MAGIC = 'WMRANK01'
+HEADER_SIZE = 24
+
+
+class PagerankArray(object):
+    """
+    Ids of nodes sorted by decreasing ranks and their ranks, mapped from a
+    file saved by a Ranking of Graph.compute_pagerank.
+
+    `ids` and `ranks` are read-only views of the file, shared by all processes
+    mapping it.
+    """
+
+    def __init__(self, path):
+        data = numpy.memmap(path, dtype=numpy.uint8, mode='r')
+        if data[:len(MAGIC)].tostring() != MAGIC:
+            raise ValueError('{} is not a file of ranks.'.format(path))
+        count, indexSize = numpy.frombuffer(data[8:HEADER_SIZE], dtype=numpy.uint64)
+
+        idsEnd = HEADER_SIZE + 4 * int(count)
+        ranksStart = (idsEnd + 7) // 8 * 8
+        ranksEnd = ranksStart + 8 * int(count)
+        self.ids = data[HEADER_SIZE:idsEnd].view(numpy.int32)
+        self.ranks = data[ranksStart:ranksEnd].view(numpy.float64)
+        # position of every id smaller than its size in `ids`, -1 for ids
+        # without ranks
+        self._index = data[ranksEnd:ranksEnd + 4 * int(indexSize)].view(numpy.int32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def topIds(self, count):
+        """Return ids of `count` highest ranked nodes, without copying them."""
+        return self.ids[:count]
+
+    def positionsOf(self, ids):
+        """Return positions of ids in the ranking, -1 for ids without
+        ranks."""
+        ids = asNodeIds(ids)
+        positions = numpy.full(len(ids), -1, dtype=numpy.int32)
+        known = (ids >= 0) & (ids < len(self._index))
+        positions[known] = self._index[ids[known]]
+        return positions
+
+    def ranksOf(self, ids):
+        """Return ranks of ids, NaN for ids without ranks."""
+        positions = self.positionsOf(ids)
+        ranks = numpy.full(len(positions), numpy.nan)
+        ranks[positions >= 0] = self.ranks[positions[positions >= 0]]
+        return ranks
@@ -5,6 +5,7 @@ class PageTable(TableProxy):
         super(PageTable, self).__init__(pageTablePath)
 
     def create(self):
+        self.setPageSize()
         self.execute(Query("""
             CREATE TABLE page (
                 page_id             INTEGER    NOT NULL                PRIMARY KEY,
@@ -12,14 +13,25 @@ class PageTable(TableProxy):
                 page_title          TEXT       NOT NULL  DEFAULT ''
             );"""))
 
-    def populate(self, values):
-        self.executemany(Query("INSERT INTO page VALUES (?,?,?)", "populating page table", logStart=True), values)
+    def openInserter(self):
+        """Return a background writer of rows of the table."""
+        # replacing keeps a resumed import idempotent, since rows written after
+        # the last checkpoint are inserted again
+        return self.openWriter(Query("INSERT OR REPLACE INTO page VALUES (?,?,?)", "inserting pages"))
+
+    def create_index(self):
         self.execute(Query("CREATE UNIQUE INDEX ns_title_idx ON page(page_namespace, page_title)", "creating index ns_title_idx in page table", logStart=True, logProgress=True))
 
     def select_id_title_of_articles(self):
         return self.select(Query("""
             SELECT page_id, page_title
             FROM page
+            WHERE page_namespace=0"""), prefetch=True)
+
+    def select_id_namespace_title_of_articles(self):
+        return self.select(Query("""
+            SELECT page_id, page_namespace, page_title
+            FROM page
             WHERE page_namespace=0"""))
 
     def select_id_title_of_categories(self):
@@ -39,6 +51,7 @@ class CategoryLinksTable(TableProxy):
         super(CategoryLinksTable, self).__init__(categoryLinksTablePath)
 
     def create(self):
+        self.setPageSize()
         self.execute(Query("""
             CREATE TABLE categorylinks (
                 cl_from      INTEGER     NOT NULL    DEFAULT '0',
@@ -46,7 +59,7 @@ class CategoryLinksTable(TableProxy):
             );"""))
 
     def populate(self, values):
-        self.executemany(Query("INSERT INTO categorylinks VALUES (?,?)", "populating categorylinks table", logStart=True), values)
+        self.bulkLoad("categorylinks", values, key=0, background=True, description="populating categorylinks table")
         self.execute(Query('CREATE INDEX from_idx ON categorylinks(cl_from);', "creating index from_idx in categorylinks table", logStart=True, logProgress=True))
 
 class PagePropertiesTable(TableProxy):
@@ -61,7 +74,7 @@ class PagePropertiesTable(TableProxy):
             );"""))
 
     def populate(self, values):
-        self.executemany(Query("INSERT INTO pageprops VALUES (?,?)", "populating pageprops table", logStart=True), values)
+        self.bulkLoad("pageprops", values, key=0, background=True, description="populating pageprops table")
         self.execute(Query('CREATE INDEX page_idx ON pageprops(pp_page);', "creating index page_idx in pageprops table", logStart=True, logProgress=True))
         self.execute(Query('CREATE INDEX propname_idx ON pageprops(pp_propname);', "creating index propname_idx in pageprops table", logStart=True, logProgress=True))
 
@@ -78,7 +91,7 @@ class RedirectsTable(TableProxy):
             );"""))
 
     def populate(self, values):
-        self.executemany(Query("INSERT INTO redirects VALUES (?,?,?)", "populating redirects table", logStart=True), values)
+        self.bulkLoad("redirects", values, key=0, background=True, description="populating redirects table")
 
 class HighDimensionalNeighborsTable(TableProxy):
     def __init__(self, tablePath):
@@ -121,28 +134,47 @@ class PagerankTable(TableProxy):
                 pr_rank             REAL        NOT NULL,
                 pr_order            INTEGER     NOT NULL
             );"""))
+        self.execute(Query("""
+            CREATE TABLE pagerank_iterations (
+                pi_iterations       INTEGER     NOT NULL,
+                pi_cold_iterations  INTEGER     NOT NULL
+            );"""))
 
     def populate(self, values):
         self.executemany(Query("INSERT INTO pagerank VALUES (?,?,?)", "populating pagerank table", logStart=True), values)
         self.execute(Query('CREATE INDEX rank_idx ON pagerank(pr_rank);', "creating index rank_idx in pagerank table", logStart=True, logProgress=True))
         self.execute(Query('CREATE UNIQUE INDEX order_idx ON pagerank(pr_order);', "creating index order_idx in pagerank table", logStart=True, logProgress=True))
 
-    def select_ids_by_descending_rank(self, idsNo):
-        query = Query("""
-            SELECT
-                pr_id
-            FROM
-                pagerank
-            ORDER BY
-                pr_order ASC
-            LIMIT
-                {}""".format(idsNo), 'selecting ids by descending rank', logProgress=True)
-
-        return self.select(query)
+    def set_iterations(self, iterations, coldIterations):
+        """Save the number of iterations of computing the ranks, and of
+        computing them from uniform ranks (an estimate for ranks computed
+        from other ranks)."""
+        self.execute(Query("INSERT INTO pagerank_iterations VALUES (?,?)"), (iterations, coldIterations))
+
+    def select_iterations(self):
+        """Return the numbers of iterations saved by set_iterations, or None
+        if they are not saved."""
+        tables = list(self.select(Query("""
+            SELECT name FROM sqlite_master
+            WHERE type = 'table' AND name = 'pagerank_iterations'""")))
+        if not tables:
+            return None
+        rows = list(self.select(Query("SELECT pi_iterations, pi_cold_iterations FROM pagerank_iterations")))
+        return rows[0] if rows else None
+
+    def select_id_rank_of_all(self):
+        return self.select(Query("SELECT pr_id, pr_rank FROM pagerank", "selecting all ranks"))
 
     def select_id_rank(self, ids):
-        ids = '(' + ','.join(map(str, ids)) + ')'
-        return self.select(Query("""SELECT pr_id, pr_rank FROM pagerank WHERE pr_id IN {}""".format(ids), logProgress=True))
+        """Return a generator of (id, rank) of `ids`, in no particular order
+        and once per id. Unlike a cursor it has no fetch methods, closing it
+        stops the lookup."""
+        return self.selectByKeys(Query("""
+            SELECT
+                pr_id, pr_rank
+            FROM
+                temp.lookup_keys
+                CROSS JOIN pagerank ON pr_id = key""", "selecting ranks of ids"), ids)
 
 class TSNETable(TableProxy):
     def __init__(self, tsnePath):
@@ -194,7 +226,7 @@ class Join(TableProxy):
             AND page_namespace = 0
             AND rd_title = page_title""", "selecting redirect edges", logProgress=True)
 
-        return self.select(query)
+        return self.select(query, prefetch=True)
 
     def selectWikimapPoints(self):
         query = Query("""
@@ -263,7 +295,7 @@ class Join(TableProxy):
             WHERE
                 tsne_id = cl_from""", "selecting nodes for wikicategories")
 
-        return self.select(query)
+        return self.select(query, prefetch=True)
 
     # ONLY LINKS BETWEEN CATEGORIES, NOT BETWEEN A PAGE AND A CATEGORY
     def select_links_between_categories(self):
@@ -278,7 +310,7 @@ class Join(TableProxy):
                 cl_from = page_id
             AND page_namespace = 14""", "selecting links for wikicategories")
 
-        return self.select(query)
+        return self.select(query, prefetch=True)
 
     def select_links_between_articles_and_categories(self):
         query = Query("""
@@ -309,23 +341,6 @@ class Join(TableProxy):
 
         return self.select(query)
 
-    def select_id_x_y_byRank(self):
-        query = Query("""
-            SELECT
-                wp_id,
-                wp_x,
-                wp_y
-            FROM
-                wikipoints,
-                pagerank
-            WHERE
-                wp_id = pr_id
-            ORDER BY
-                pr_rank DESC
-            """, logProgress=True)
-
-        return self.select(query)
-
     def select_disambiguation_pages(self):
         query = Query("""
             SELECT
@@ -338,4 +353,4 @@ class Join(TableProxy):
             AND page_title = 'Category:Disambiguation_pages'
             """, logProgress=True)
 
-        return self.select(query)
+        return self.select(query, prefetch=True)
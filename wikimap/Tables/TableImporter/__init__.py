@@ -1,31 +1,187 @@
 from sqltools import *
+from ...Utils import BackgroundIterator, open_download
 import gzip
+import contextlib
+import logging
+
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024 # bytes of INSERT statements parsed at once
+DEFAULT_QUEUED_CHUNKS = 2
+
+ARTICLE_NAMESPACE = 0
+CATEGORY_NAMESPACE = 14
 
 class TableImporter(object):
-    def __init__(self, path, parser, tableName):
+    def __init__(self, path, parser, columnsParser, tableName, fields,
+            parallel=True, chunkSize=DEFAULT_CHUNK_SIZE,
+            namespaces=None, fromNamespaces=None, columns=None):
+        """
+        Prepare importing a table from a compressed dump.
+
+        Records are filtered and projected by the native parser, before their
+        texts are unescaped or decoded, so skipped records and columns cost
+        little.
+
+        `fields` - names of the fields of the parsed records
+
+        `namespaces` - if given, only records whose `namespace` field is one
+        of these are imported
+
+        `fromNamespaces` - if given, only records whose `from_namespace` field
+        is one of these are imported
+
+        `columns` - if given, names of the fields that are imported, records
+        are returned with the fields in their original order
+        """
         self._path = path
         self._parser = parser
+        self._columnsParser = columnsParser
         self._tableName = tableName
+        self._fields = fields
+        self._parallel = parallel
+        self._chunkSize = chunkSize
+        self._namespaces = namespaces
+        self._fromNamespaces = fromNamespaces
+        self._filter = self._makeFilter(namespaces, fromNamespaces, columns)
 
     def read(self):
-        with gzip.GzipFile(self._path, 'r') as input:
+        if self._parallel:
+            return self._readParallel()
+        else:
+            return self._readSequential()
+
+    def readChunks(self, start=0):
+        """
+        Yield lists of records, one list per chunk of INSERT statements.
+
+        The dump is decompressed on a background thread, while the statements
+        of the previous chunk are parsed on all cores. Records are yielded in
+        the order of the dump. The first `start` chunks are skipped without
+        being parsed, which allows resuming an import.
+        """
+        for chunk in self._backgroundChunks(start):
+            yield self._parser(chunk, self._filter)
+
+    def readColumns(self, start=0):
+        """
+        Yield tuples of columns, one tuple per chunk of INSERT statements.
+
+        Works like readChunks, but instead of a list of record tuples, each
+        chunk is returned as a tuple of columns (one per field of the record).
+        Integer columns and text columns expose their data through the buffer
+        protocol (as int64 values and utf8 bytes respectively), so they can be
+        viewed with numpy.asarray without copying. Text columns also have
+        `offsets` that delimit consecutive texts in the buffer.
+        """
+        for chunk in self._backgroundChunks(start):
+            yield self._columnsParser(chunk, self._filter)
+
+    def _readSequential(self):
+        for values in self._values():
+            for r in self._parser(values, self._filter):
+                yield r
+
+    def _readParallel(self):
+        for records in self.readChunks():
+            for r in records:
+                yield r
+
+    def _values(self):
+        pattern = 'INSERT INTO `{}` VALUES '.format(self._tableName)
+        # the dump may still be downloading, open_download waits for its data
+        with contextlib.closing(open_download(self._path)) as dump, \
+                gzip.GzipFile(fileobj=dump, mode='rb') as input:
             for line in input:
-                pattern = 'INSERT INTO `{}` VALUES '.format(self._tableName)
                 if line.startswith(pattern):
-                    for r in self._parser(line.rstrip()[len(pattern):-1]): # line ends with ;
-                        yield r
+                    yield line.rstrip()[len(pattern):-1] # line ends with ;
+
+    def _chunks(self, start=0):
+        chunk, chunkSize, index = [], 0, 0
+        for values in self._values():
+            if index >= start:
+                chunk.append(values)
+            chunkSize += len(values)
+            if chunkSize >= self._chunkSize:
+                if index >= start:
+                    yield chunk
+                chunk, chunkSize, index = [], 0, index + 1
+        if chunk:
+            yield chunk
+
+    def _makeFilter(self, namespaces, fromNamespaces, columns):
+        filter_ = Filter()
+        if namespaces is not None:
+            self._checkField('namespace')
+            filter_.restrictNamespaces(list(namespaces))
+        if fromNamespaces is not None:
+            self._checkField('from_namespace')
+            filter_.restrictFromNamespaces(list(fromNamespaces))
+        if columns is not None:
+            for column in columns:
+                self._checkField(column)
+            filter_.project([self._fields.index(column) for column in columns])
+        return filter_
+
+    def _checkField(self, field):
+        if field not in self._fields:
+            raise ValueError('Table {} has no {} field'.format(self._tableName, field))
+
+    def _backgroundChunks(self, start=0):
+        return BackgroundIterator(self._chunks(start), DEFAULT_QUEUED_CHUNKS)
+
+class LinksImporter(TableImporter):
+    def __init__(self, path, **kwargs):
+        super(LinksImporter, self).__init__(path, getLinksRecords, getLinksColumns, "pagelinks",
+            ("from", "namespace", "title", "from_namespace"), **kwargs)
+
+    def writeEdges(self, pages, edgesPath, checkpoint=None):
+        """
+        Resolve links between articles to (from, to) edges and save them to
+        `edgesPath` in the EdgeArray format.
+
+        Titles are looked up in a native hash table and edges are written
+        straight to the file, so no Python objects are created per link.
+        Links rejected by the namespace filters or to pages missing from
+        `pages` are skipped, projected columns are ignored. Returns the number
+        of edges written.
+
+        `pages` - iterable of (id, namespace, title) of pages that can be linked
+
+        `checkpoint` - if given, writing continues after the chunks and edges
+        it holds and progress is recorded in it after every chunk
+        """
+        logger = logging.getLogger(__name__)
+
+        start, resumeAt = (checkpoint.chunks, checkpoint.rows) if checkpoint else (0, 0)
+
+        filter_ = self._makeFilter(self._namespaces, self._fromNamespaces, None)
+        writer = LinkEdgesWriter(edgesPath, filter_, resumeAt)
+        writer.addPages(pages)
+        logger.info('Resolving links to {} pages'.format(writer.pageCount()))
+
+        for (index, chunk) in enumerate(self._backgroundChunks(start), start + 1):
+            writer.write(chunk)
+            logger.info('Written {} edges'.format(writer.size()))
+            if checkpoint:
+                checkpoint.update(index, writer.size(), writer.flush)
+
+        writer.close()
+        return writer.size()
 
-def PageTable(path):
-    return TableImporter(path, getPageRecords, "page")
+def PageTable(path, **kwargs):
+    return TableImporter(path, getPageRecords, getPageColumns, "page",
+        ("id", "namespace", "title"), **kwargs)
 
-def LinksTable(path):
-    return TableImporter(path, getLinksRecords, "pagelinks")
+def LinksTable(path, **kwargs):
+    return LinksImporter(path, **kwargs)
 
-def PagePropertiesTable(path):
-    return TableImporter(path, getPagePropertiesRecords, "page_props")
+def PagePropertiesTable(path, **kwargs):
+    return TableImporter(path, getPagePropertiesRecords, getPagePropertiesColumns, "page_props",
+        ("page", "property"), **kwargs)
 
-def CategoryLinksTable(path):
-    return TableImporter(path, getCategoryLinksRecords, "categorylinks")
+def CategoryLinksTable(path, **kwargs):
+    return TableImporter(path, getCategoryLinksRecords, getCategoryLinksColumns, "categorylinks",
+        ("from", "to"), **kwargs)
 
-def RedirectsTable(path):
-    return TableImporter(path, getRedirectsRecords, "redirect")
+def RedirectsTable(path, **kwargs):
+    return TableImporter(path, getRedirectsRecords, getRedirectsColumns, "redirect",
+        ("from", "namespace", "title"), **kwargs)
@@ -0,0 +1,221 @@
+#include "columns.hpp"
+
+#include <algorithm>
+
+namespace {
+
+// code points of cp1252 characters 0x80 - 0x9F, 0 marks undefined ones
+const unsigned CP1252_HIGH_CONTROLS[32] = {
+    0x20AC, 0, 0x201A, 0x0192, 0x201E, 0x2026, 0x2020, 0x2021,
+    0x02C6, 0x2030, 0x0160, 0x2039, 0x0152, 0, 0x017D, 0,
+    0, 0x2018, 0x2019, 0x201C, 0x201D, 0x2022, 0x2013, 0x2014,
+    0x02DC, 0x2122, 0x0161, 0x203A, 0x0153, 0, 0x017E, 0x0178
+};
+
+// Returns the length of a valid utf8 sequence starting at pos or 0 if there
+// is none. In the latter case validPrefix is set to the length of the longest
+// prefix that could start a valid sequence.
+size_t utf8SequenceLength(const TEXT& text, size_t pos, size_t& validPrefix) {
+    unsigned char c = text[pos];
+    unsigned char low = 0x80, high = 0xBF;
+    size_t length;
+
+    validPrefix = 0;
+    if (c < 0x80) {
+        return 1;
+    } else if (c >= 0xC2 && c <= 0xDF) {
+        length = 2;
+    } else if (c >= 0xE0 && c <= 0xEF) {
+        length = 3;
+        if (c == 0xE0) low = 0xA0; // no overlong encodings
+    } else if (c >= 0xF0 && c <= 0xF4) {
+        length = 4;
+        if (c == 0xF0) low = 0x90; // no overlong encodings
+        if (c == 0xF4) high = 0x8F; // no code points above U+10FFFF
+    } else {
+        return 0;
+    }
+
+    validPrefix = 1;
+    for (size_t i = 1; i < length; ++i) {
+        if (pos + i >= text.size()) {
+            return 0;
+        }
+
+        unsigned char cc = text[pos + i];
+        if (cc < low || cc > high) {
+            return 0;
+        }
+
+        low = 0x80;
+        high = 0xBF;
+        ++validPrefix;
+    }
+
+    return length;
+}
+
+bool isUtf8(const TEXT& text) {
+    size_t validPrefix;
+    for (size_t pos = 0; pos < text.size(); ) {
+        size_t length = utf8SequenceLength(text, pos, validPrefix);
+        if (length == 0) {
+            return false;
+        }
+        pos += length;
+    }
+    return true;
+}
+
+bool isCp1252(const TEXT& text) {
+    for (unsigned char c : text) {
+        if (c >= 0x80 && c < 0xA0 && CP1252_HIGH_CONTROLS[c - 0x80] == 0) {
+            return false;
+        }
+    }
+    return true;
+}
+
+void appendCodePoint(unsigned codePoint, std::string& res) {
+    if (codePoint < 0x80) {
+        res.push_back(codePoint);
+    } else if (codePoint < 0x800) {
+        res.push_back(0xC0 | (codePoint >> 6));
+        res.push_back(0x80 | (codePoint & 0x3F));
+    } else {
+        res.push_back(0xE0 | (codePoint >> 12));
+        res.push_back(0x80 | ((codePoint >> 6) & 0x3F));
+        res.push_back(0x80 | (codePoint & 0x3F));
+    }
+}
+
+std::string cp1252ToUtf8(const TEXT& text) {
+    std::string res;
+    res.reserve(2 * text.size());
+    for (unsigned char c : text) {
+        if (c >= 0x80 && c < 0xA0) {
+            appendCodePoint(CP1252_HIGH_CONTROLS[c - 0x80], res);
+        } else {
+            appendCodePoint(c, res);
+        }
+    }
+    return res;
+}
+
+std::string dropInvalidUtf8(const TEXT& text) {
+    std::string res;
+    res.reserve(text.size());
+
+    size_t validPrefix;
+    for (size_t pos = 0; pos < text.size(); ) {
+        size_t length = utf8SequenceLength(text, pos, validPrefix);
+        if (length > 0) {
+            res.append(text, pos, length);
+            pos += length;
+        } else {
+            pos += std::max(validPrefix, static_cast<size_t>(1));
+        }
+    }
+    return res;
+}
+
+} // namespace
+
+std::string toUtf8(const TEXT& text) {
+    if (isUtf8(text)) {
+        return text;
+    } else if (isCp1252(text)) {
+        return cp1252ToUtf8(text);
+    } else {
+        return dropInvalidUtf8(text);
+    }
+}
+
+void IntegerColumn::extend(const IntegerColumn& other) {
+    values.insert(values.end(), other.values.begin(), other.values.end());
+}
+
+TextColumn::TextColumn() {
+    offsets.push_back(0);
+}
+
+void TextColumn::push_back(const TEXT& text) {
+    data.append(toUtf8(text));
+    offsets.push_back(data.size());
+}
+
+void TextColumn::extend(const TextColumn& other) {
+    INTEGER shift = data.size();
+    data.append(other.data);
+    for (size_t i = 1; i < other.offsets.size(); ++i) {
+        offsets.push_back(other.offsets.values[i] + shift);
+    }
+}
+
+void Columns<PageRecord>::push_back(const PageRecord& r, const Filter& filter) {
+    if (filter.projects(0)) {
+        id.push_back(r.id);
+    }
+    if (filter.projects(1)) {
+        ns.push_back(r.ns);
+    }
+    if (filter.projects(2)) {
+        title.push_back(r.title);
+    }
+}
+
+void Columns<PageRecord>::extend(const Columns& other) {
+    id.extend(other.id);
+    ns.extend(other.ns);
+    title.extend(other.title);
+}
+
+void Columns<LinksRecord>::push_back(const LinksRecord& r, const Filter& filter) {
+    if (filter.projects(0)) {
+        from.push_back(r.from);
+    }
+    if (filter.projects(1)) {
+        ns.push_back(r.ns);
+    }
+    if (filter.projects(2)) {
+        title.push_back(r.title);
+    }
+    if (filter.projects(3)) {
+        from_ns.push_back(r.from_ns);
+    }
+}
+
+void Columns<LinksRecord>::extend(const Columns& other) {
+    from.extend(other.from);
+    ns.extend(other.ns);
+    title.extend(other.title);
+    from_ns.extend(other.from_ns);
+}
+
+void Columns<CategoryRecord>::push_back(const CategoryRecord& r, const Filter& filter) {
+    if (filter.projects(0)) {
+        id.push_back(r.id);
+    }
+    if (filter.projects(1)) {
+        title.push_back(r.title);
+    }
+}
+
+void Columns<CategoryRecord>::extend(const Columns& other) {
+    id.extend(other.id);
+    title.extend(other.title);
+}
+
+void Columns<CategoryLinksRecord>::push_back(const CategoryLinksRecord& r, const Filter& filter) {
+    if (filter.projects(0)) {
+        from.push_back(r.from);
+    }
+    if (filter.projects(1)) {
+        to.push_back(r.to);
+    }
+}
+
+void Columns<CategoryLinksRecord>::extend(const Columns& other) {
+    from.extend(other.from);
+    to.extend(other.to);
+}
@@ -0,0 +1,84 @@
+#pragma once
+
+#include <string>
+#include <vector>
+
+#include "parser.hpp"
+#include "records.hpp"
+#include "filter.hpp"
+
+// Returns a valid utf8 version of text. If the text is not valid utf8, it is
+// decoded as cp1252 and if that fails too, invalid bytes are dropped. This
+// mirrors decoding titles one by one in Python with the same fallbacks.
+std::string toUtf8(const TEXT& text);
+
+class IntegerColumn {
+public:
+    void push_back(INTEGER value) { values.push_back(value); }
+    void extend(const IntegerColumn& other);
+
+    size_t size() const { return values.size(); }
+
+    std::vector<INTEGER> values;
+};
+
+// Texts stored in a single utf8 buffer. The i-th text spans bytes from
+// offsets[i] to offsets[i+1].
+class TextColumn {
+public:
+    TextColumn();
+
+    void push_back(const TEXT& text);
+    void extend(const TextColumn& other);
+
+    size_t size() const { return offsets.size() - 1; }
+
+    const char* begin(size_t i) const { return data.data() + offsets.values[i]; }
+    size_t length(size_t i) const { return offsets.values[i + 1] - offsets.values[i]; }
+
+    std::string data;
+    IntegerColumn offsets;
+};
+
+// Columns of records, only the columns projected by the filter are filled.
+template<class Record>
+struct Columns;
+
+template<>
+struct Columns<PageRecord> {
+    void push_back(const PageRecord& r, const Filter& filter);
+    void extend(const Columns& other);
+
+    IntegerColumn id;
+    IntegerColumn ns;
+    TextColumn title;
+};
+
+template<>
+struct Columns<LinksRecord> {
+    void push_back(const LinksRecord& r, const Filter& filter);
+    void extend(const Columns& other);
+
+    IntegerColumn from;
+    IntegerColumn ns;
+    TextColumn title;
+    IntegerColumn from_ns;
+};
+
+template<>
+struct Columns<CategoryRecord> {
+    void push_back(const CategoryRecord& r, const Filter& filter);
+    void extend(const Columns& other);
+
+    IntegerColumn id;
+    TextColumn title;
+};
+
+template<>
+struct Columns<CategoryLinksRecord> {
+    void push_back(const CategoryLinksRecord& r, const Filter& filter);
+    void extend(const Columns& other);
+
+    IntegerColumn from;
+    TextColumn to;
+};
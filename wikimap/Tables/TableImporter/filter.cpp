@@ -0,0 +1,39 @@
+#include "filter.hpp"
+
+Filter::Filter()
+: anyNamespace_(true), namespaces_(),
+  anyFromNamespace_(true), fromNamespaces_(),
+  allColumns_(true), columns_()
+{ }
+
+void Filter::restrictNamespaces(const std::vector<INTEGER>& namespaces) {
+    anyNamespace_ = false;
+    namespaces_.insert(namespaces.begin(), namespaces.end());
+}
+
+void Filter::restrictFromNamespaces(const std::vector<INTEGER>& namespaces) {
+    anyFromNamespace_ = false;
+    fromNamespaces_.insert(namespaces.begin(), namespaces.end());
+}
+
+void Filter::project(const std::vector<size_t>& columns) {
+    allColumns_ = false;
+    for (auto column : columns) {
+        if (column >= columns_.size()) {
+            columns_.resize(column + 1, false);
+        }
+        columns_[column] = true;
+    }
+}
+
+bool Filter::acceptsNamespace(INTEGER ns) const {
+    return anyNamespace_ || namespaces_.count(ns) > 0;
+}
+
+bool Filter::acceptsFromNamespace(INTEGER ns) const {
+    return anyFromNamespace_ || fromNamespaces_.count(ns) > 0;
+}
+
+bool Filter::projects(size_t column) const {
+    return allColumns_ || (column < columns_.size() && columns_[column]);
+}
@@ -0,0 +1,31 @@
+#pragma once
+
+#include <vector>
+#include <unordered_set>
+
+#include "parser.hpp"
+
+// Declarative filter applied by records while they are parsed, so that texts
+// of rejected records and of columns that are not projected are skipped
+// without being unescaped. By default all records pass and all columns are
+// projected.
+class Filter {
+public:
+    Filter();
+
+    void restrictNamespaces(const std::vector<INTEGER>& namespaces);
+    void restrictFromNamespaces(const std::vector<INTEGER>& namespaces);
+    void project(const std::vector<size_t>& columns);
+
+    bool acceptsNamespace(INTEGER ns) const;
+    bool acceptsFromNamespace(INTEGER ns) const;
+    bool projects(size_t column) const;
+
+private:
+    bool anyNamespace_;
+    std::unordered_set<INTEGER> namespaces_;
+    bool anyFromNamespace_;
+    std::unordered_set<INTEGER> fromNamespaces_;
+    bool allColumns_;
+    std::vector<bool> columns_;
+};
@@ -0,0 +1,49 @@
+#include "linkedges.hpp"
+
+#include <functional>
+
+#include "records.hpp"
+#include "columns.hpp"
+
+size_t PageKeyHash::operator () (const PageKey& key) const {
+    return std::hash<std::string>()(key.second) ^ std::hash<INTEGER>()(key.first);
+}
+
+LinkEdgesWriter::LinkEdgesWriter(const std::string& path, const Filter& filter, size_t resumeAt)
+: filter_(filter), pages_(), edges_(path, resumeAt)
+{ }
+
+void LinkEdgesWriter::addPage(INTEGER id, INTEGER ns, const std::string& title) {
+    pages_[PageKey(ns, title)] = static_cast<int>(id);
+}
+
+void LinkEdgesWriter::write(const std::vector<std::string>& values) {
+    auto records = parse<LinksRecord>(values, filter_);
+
+    std::vector<std::vector<Edge>> edges(records.size());
+    LoopErrors errors;
+#pragma omp parallel for schedule(dynamic)
+    for (int i = 0; i < static_cast<int>(records.size()); ++i) {
+        errors.run([&] {
+            for (const auto& r : records[i]) {
+                auto page = pages_.find(PageKey(r.ns, toUtf8(r.title)));
+                if (page != pages_.end()) {
+                    edges[i].push_back(Edge(static_cast<int>(r.from), page->second));
+                }
+            }
+        });
+    }
+    errors.rethrow();
+
+    for (const auto& statementEdges : edges) {
+        edges_.extend(statementEdges);
+    }
+}
+
+void LinkEdgesWriter::flush() {
+    edges_.flush();
+}
+
+void LinkEdgesWriter::close() {
+    edges_.close();
+}
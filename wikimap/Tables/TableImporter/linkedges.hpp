@@ -0,0 +1,45 @@
+#pragma once
+
+#include <string>
+#include <vector>
+#include <utility>
+#include <unordered_map>
+
+#include "../EdgeArray/array.hpp"
+#include "parser.hpp"
+#include "filter.hpp"
+
+typedef std::pair<int, int> Edge;
+
+// namespace and utf8 encoded title of a page
+typedef std::pair<INTEGER, std::string> PageKey;
+
+struct PageKeyHash {
+    size_t operator () (const PageKey& key) const;
+};
+
+// Resolves titles of linked pages to ids and writes (from, to) edges to a file
+// readable by EdgeArray, so that links never have to become Python objects.
+class LinkEdgesWriter {
+public:
+    // resumes writing after the first `resumeAt` edges of an existing file
+    LinkEdgesWriter(const std::string& path, const Filter& filter, size_t resumeAt = 0);
+
+    void addPage(INTEGER id, INTEGER ns, const std::string& title);
+
+    // parses VALUES of a list of INSERT statements of the pagelinks table
+    // using all cores, edges are written in the same order as in the dump,
+    // links rejected by the filter or to unknown pages are skipped
+    void write(const std::vector<std::string>& values);
+
+    void flush();
+    void close();
+
+    size_t pageCount() const { return pages_.size(); }
+    size_t size() const { return edges_.size(); }
+
+private:
+    Filter filter_;
+    std::unordered_map<PageKey, int, PageKeyHash> pages_;
+    ArrayWriter<Edge> edges_;
+};
@@ -23,10 +23,14 @@ long long Parser::consumeIntegerField() {
 }
 
 std::string Parser::consumeTextField() {
+    return unescape(skipTextField());
+}
+
+TextSpan Parser::skipTextField() {
     auto end = findNextUnescapedQuote(position_ + 1); // skip opening '
-    std::string res = unescapeString(text_.substr(position_ + 1, end - position_ - 1)); // skip opening and enclosing '
+    TextSpan span = {position_ + 1, end}; // skip opening and enclosing '
     checkedMove(end, 2); // move to next after ',
-    return res;
+    return span;
 }
 
 void Parser::moveToNextRecord() {
@@ -47,16 +51,16 @@ size_t Parser::findNextUnescapedQuote(size_t pos) const {
 }
 
 // only handles MySQL special characters (with the exception of \% and \_ which should not have a special meaning in the dumps)
-std::string Parser::unescapeString(const std::string& str) const {
+std::string Parser::unescape(const TextSpan& span) const {
     std::string res;
-    res.reserve(str.size());
+    res.reserve(span.end - span.begin);
 
     char c;
-    for (size_t i = 0; i < str.size(); ++i) {
-        c = str[i];
-        if (c == '\\' && i + 1 < str.size()) {
+    for (size_t i = span.begin; i < span.end; ++i) {
+        c = text_[i];
+        if (c == '\\' && i + 1 < span.end) {
             ++i;
-            c = str[i];
+            c = text_[i];
 
             switch (c) {
                 case '0': c = '\0'; break;
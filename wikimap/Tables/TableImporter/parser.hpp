@@ -1,11 +1,20 @@
 #pragma once
 
+#include <exception>
 #include <string>
 #include <vector>
 
 typedef long long INTEGER;
 typedef std::string TEXT;
 
+class Filter;
+
+// position of an escaped text field, between its quotes
+struct TextSpan {
+    size_t begin;
+    size_t end;
+};
+
 class Parser {
 public:
     Parser(const std::string& text)  // expected text format: (field, ..., field),(field, ..., field),...,(field, ..., field)
@@ -15,30 +24,82 @@ public:
     INTEGER consumeIntegerField();
     TEXT consumeTextField();
 
+    // moves past a text field without unescaping it, so that it can be
+    // unescaped later only if needed
+    TextSpan skipTextField();
+    TEXT unescape(const TextSpan& span) const;
+
     void moveToNextRecord();
 
     bool done() const { return position_ >= text_.size(); }
 
 private:
     size_t findNextUnescapedQuote(size_t pos) const;
-    std::string unescapeString(const std::string& str) const;
-
     void checkedMove(size_t position_, int offset);
 
-    std::string text_;
+    const std::string& text_;
     size_t position_;
 };
 
 
+// keeps the first exception thrown in the body of an OpenMP loop, which must
+// not leave it, to be rethrown after the loop
+class LoopErrors {
+public:
+    template<class Body>
+    void run(Body body) {
+        try {
+            body();
+        } catch (...) {
+#pragma omp critical(loop_errors)
+            if (!error_) {
+                error_ = std::current_exception();
+            }
+        }
+    }
+
+    void rethrow() const {
+        if (error_) {
+            std::rethrow_exception(error_);
+        }
+    }
+
+private:
+    std::exception_ptr error_;
+};
+
+// parses VALUES of a single INSERT statement, records rejected by the filter
+// are skipped
 template<class Record>
-std::vector<Record> parse(const std::string& values) {
+std::vector<Record> parse(const std::string& values, const Filter& filter) {
     Parser parser(values);
 
     std::vector<Record> records;
     while (!parser.done()) {
-        records.push_back(Record(parser));
+        Record r;
+        if (r.read(parser, filter)) {
+            records.push_back(std::move(r));
+        }
         parser.moveToNextRecord();
     }
 
+    return records;
+}
+
+// parses many VALUES strings (each from a separate INSERT statement) in
+// parallel, the records of i-th statement are returned in i-th vector
+template<class Record>
+std::vector<std::vector<Record>> parse(const std::vector<std::string>& values, const Filter& filter) {
+    std::vector<std::vector<Record>> records(values.size());
+
+    LoopErrors errors;
+#pragma omp parallel for schedule(dynamic)
+    for (int i = 0; i < static_cast<int>(values.size()); ++i) {
+        errors.run([&] {
+            records[i] = parse<Record>(values[i], filter);
+        });
+    }
+    errors.rethrow();
+
     return records;
 }
\ No newline at end of file
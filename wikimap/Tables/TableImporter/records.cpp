@@ -1,18 +1,53 @@
 #include "records.hpp"
 #include "parser.hpp"
 
-PageRecord::PageRecord(Parser& parser)
-: id(parser.consumeIntegerField()), ns(parser.consumeIntegerField()), title(parser.consumeTextField())
-{ }
+bool PageRecord::read(Parser& parser, const Filter& filter) {
+    id = parser.consumeIntegerField();
+    ns = parser.consumeIntegerField();
+    auto titleSpan = parser.skipTextField();
 
-LinksRecord::LinksRecord(Parser& parser)
-: from(parser.consumeIntegerField()), ns(parser.consumeIntegerField()), title(parser.consumeTextField()), from_ns(parser.consumeIntegerField())
-{ }
+    if (!filter.acceptsNamespace(ns)) {
+        return false;
+    }
 
-CategoryRecord::CategoryRecord(Parser& parser)
-: id(parser.consumeIntegerField()), title(parser.consumeTextField())
-{ }
+    if (filter.projects(2)) {
+        title = parser.unescape(titleSpan);
+    }
+    return true;
+}
 
-CategoryLinksRecord::CategoryLinksRecord(Parser& parser)
-: from(parser.consumeIntegerField()), to(parser.consumeTextField())
-{ }
\ No newline at end of file
+bool LinksRecord::read(Parser& parser, const Filter& filter) {
+    from = parser.consumeIntegerField();
+    ns = parser.consumeIntegerField();
+    auto titleSpan = parser.skipTextField();
+    from_ns = parser.consumeIntegerField();
+
+    if (!filter.acceptsNamespace(ns) || !filter.acceptsFromNamespace(from_ns)) {
+        return false;
+    }
+
+    if (filter.projects(2)) {
+        title = parser.unescape(titleSpan);
+    }
+    return true;
+}
+
+bool CategoryRecord::read(Parser& parser, const Filter& filter) {
+    id = parser.consumeIntegerField();
+    auto titleSpan = parser.skipTextField();
+
+    if (filter.projects(1)) {
+        title = parser.unescape(titleSpan);
+    }
+    return true;
+}
+
+bool CategoryLinksRecord::read(Parser& parser, const Filter& filter) {
+    from = parser.consumeIntegerField();
+    auto toSpan = parser.skipTextField();
+
+    if (filter.projects(1)) {
+        to = parser.unescape(toSpan);
+    }
+    return true;
+}
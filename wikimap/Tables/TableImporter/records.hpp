@@ -2,10 +2,15 @@
 
 #include <string>
 #include "parser.hpp"
+#include "filter.hpp"
+
+// Every record reads its fields from the parser and returns false if it is
+// rejected by the filter. Texts of rejected records and texts that are not
+// projected are left empty.
 
 struct PageRecord {
 public:
-    PageRecord(Parser& parser);
+    bool read(Parser& parser, const Filter& filter);
 
     INTEGER id;
     INTEGER ns;
@@ -14,7 +19,7 @@ public:
 
 struct LinksRecord {
 public:
-    LinksRecord(Parser& parser);
+    bool read(Parser& parser, const Filter& filter);
 
     INTEGER from;
     INTEGER ns;
@@ -24,7 +29,7 @@ public:
 
 struct CategoryRecord {
 public:
-    CategoryRecord(Parser& parser);
+    bool read(Parser& parser, const Filter& filter);
 
     INTEGER id;
     TEXT title;
@@ -32,7 +37,7 @@ public:
 
 struct CategoryLinksRecord {
 public:
-    CategoryLinksRecord(Parser& parser);
+    bool read(Parser& parser, const Filter& filter);
 
     INTEGER from;
     TEXT to;
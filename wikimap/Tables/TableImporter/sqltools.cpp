@@ -4,6 +4,7 @@
 #include <stdexcept>
 #include <algorithm>
 #include <iterator>
+#include <array>
 #include <python2.7/Python.h>
 
 #include <pybind11/pybind11.h>
@@ -11,6 +12,9 @@
 
 #include "records.hpp"
 #include "parser.hpp"
+#include "filter.hpp"
+#include "columns.hpp"
+#include "linkedges.hpp"
 
 namespace py = pybind11;
 
@@ -41,79 +45,278 @@ py::str toPython(const std::string& s) {
     return py::reinterpret_steal<py::str>(converted);
 }
 
-py::tuple toPython(const PageRecord& r) {
-    return py::make_tuple(r.id, r.ns, toPython(r.title));
+// builds a tuple of the fields projected by the filter
+template<size_t N>
+py::tuple project(const Filter& filter, std::array<py::object, N>&& fields) {
+    size_t size = 0;
+    for (size_t i = 0; i < N; ++i) {
+        if (filter.projects(i)) {
+            ++size;
+        }
+    }
+
+    py::tuple res(size);
+    for (size_t i = 0, j = 0; i < N; ++i) {
+        if (filter.projects(i)) {
+            PyTuple_SET_ITEM(res.ptr(), j++, fields[i].release().ptr());
+        }
+    }
+    return res;
 }
 
-py::tuple toPython(const LinksRecord& r) {
-    return py::make_tuple(r.from, r.ns, toPython(r.title), r.from_ns);
+py::tuple toPython(const PageRecord& r, const Filter& f) {
+    return project<3>(f, {{py::cast(r.id), py::cast(r.ns), toPython(r.title)}});
 }
 
-py::tuple toPython(const CategoryRecord& r) {
-    return py::make_tuple(r.id, toPython(r.title));
+py::tuple toPython(const LinksRecord& r, const Filter& f) {
+    return project<4>(f, {{py::cast(r.from), py::cast(r.ns), toPython(r.title), py::cast(r.from_ns)}});
 }
 
-py::tuple toPython(const CategoryLinksRecord& r) {
-    return py::make_tuple(r.from, toPython(r.to));
+py::tuple toPython(const CategoryRecord& r, const Filter& f) {
+    return project<2>(f, {{py::cast(r.id), toPython(r.title)}});
 }
 
-template<class T>
-py::list toPython(const std::vector<T>& values) {
-    py::list res;
+py::tuple toPython(const CategoryLinksRecord& r, const Filter& f) {
+    return project<2>(f, {{py::cast(r.from), toPython(r.to)}});
+}
+
+py::tuple toPython(Columns<PageRecord>&& c, const Filter& f) {
+    return project<3>(f, {{
+        py::cast(std::move(c.id)),
+        py::cast(std::move(c.ns)),
+        py::cast(std::move(c.title))}});
+}
+
+py::tuple toPython(Columns<LinksRecord>&& c, const Filter& f) {
+    return project<4>(f, {{
+        py::cast(std::move(c.from)),
+        py::cast(std::move(c.ns)),
+        py::cast(std::move(c.title)),
+        py::cast(std::move(c.from_ns))}});
+}
+
+py::tuple toPython(Columns<CategoryRecord>&& c, const Filter& f) {
+    return project<2>(f, {{
+        py::cast(std::move(c.id)),
+        py::cast(std::move(c.title))}});
+}
 
-    for (const auto& v : values) {
-        res.append(toPython(v));
+py::tuple toPython(Columns<CategoryLinksRecord>&& c, const Filter& f) {
+    return project<2>(f, {{
+        py::cast(std::move(c.from)),
+        py::cast(std::move(c.to))}});
+}
+
+py::object decode(const TextColumn& c, size_t i) {
+    auto decoded = PyUnicode_DecodeUTF8(c.begin(i), c.length(i), "strict");
+    if (!decoded) {
+        throw py::error_already_set();
     }
+    return py::reinterpret_steal<py::object>(decoded);
+}
 
+py::list decode(const TextColumn& c) {
+    py::list res;
+    for (size_t i = 0; i < c.size(); ++i) {
+        res.append(decode(c, i));
+    }
     return res;
 }
 
-py::list getPageRecords(py::bytes bytes) {
-    auto s = static_cast<std::string>(bytes);
-    auto records = parse<PageRecord>(s);
-    decltype(records) filtered;
-    std::copy_if(records.begin(), records.end(), std::back_inserter(filtered),
-        [] (const decltype(records)::value_type& r) {
-            return r.ns == 0 || r.ns == 14;
-        });
+py::list encoded(const TextColumn& c) {
+    py::list res;
+    for (size_t i = 0; i < c.size(); ++i) {
+        res.append(py::bytes(c.begin(i), c.length(i)));
+    }
+    return res;
+}
 
-    return toPython(filtered);
+template<class Record>
+void appendRecords(const std::vector<Record>& records, const Filter& filter, py::list& res) {
+    for (const auto& r : records) {
+        res.append(toPython(r, filter));
+    }
 }
 
-py::list getLinksRecords(py::bytes bytes) {
+// parses VALUES of a single INSERT statement
+template<class Record>
+py::list getRecords(py::bytes bytes, const Filter& filter) {
     auto s = static_cast<std::string>(bytes);
-    auto records = parse<LinksRecord>(s);
-    decltype(records) filtered;
-    std::copy_if(records.begin(), records.end(), std::back_inserter(filtered),
-        [] (const decltype(records)::value_type& r) {
-            return r.ns == 0 && r.from_ns == 0;
-        });
+    auto records = parse<Record>(s, filter);
 
-    return toPython(filtered);
+    py::list res;
+    appendRecords(records, filter, res);
+    return res;
 }
 
-py::list getCategoryRecords(py::bytes bytes) {
-    auto s = static_cast<std::string>(bytes);
-    return toPython(parse<CategoryRecord>(s));
+std::vector<std::string> toStrings(py::list chunk) {
+    std::vector<std::string> values;
+    values.reserve(chunk.size());
+    for (const auto& handle : chunk) {
+        values.push_back(handle.cast<std::string>());
+    }
+    return values;
 }
 
-py::list getCategoryLinksRecords(py::bytes bytes) {
-    auto s = static_cast<std::string>(bytes);
-    return toPython(parse<CategoryLinksRecord>(s));
+// parses VALUES of a list of INSERT statements using all cores, records are
+// returned in the same order as in the sequential version
+template<class Record>
+py::list getRecordsInParallel(py::list chunk, const Filter& filter) {
+    auto values = toStrings(chunk);
+
+    std::vector<std::vector<Record>> records;
+    {
+        py::gil_scoped_release release;
+        records = parse<Record>(values, filter);
+    }
+
+    py::list res;
+    for (const auto& statementRecords : records) {
+        appendRecords(statementRecords, filter, res);
+    }
+    return res;
 }
 
-const auto& getPagePropertiesRecords = getCategoryLinksRecords;
-const auto& getRedirectsRecords = getPageRecords;
+// like getRecordsInParallel, but returns a tuple of columns instead of a list
+// of tuples
+template<class Record>
+py::tuple getColumnsInParallel(py::list chunk, const Filter& filter) {
+    auto values = toStrings(chunk);
+
+    Columns<Record> columns;
+    {
+        py::gil_scoped_release release;
+        auto records = parse<Record>(values, filter);
+
+        std::vector<Columns<Record>> parts(records.size());
+        LoopErrors errors;
+#pragma omp parallel for schedule(dynamic)
+        for (int i = 0; i < static_cast<int>(records.size()); ++i) {
+            errors.run([&] {
+                for (const auto& r : records[i]) {
+                    parts[i].push_back(r, filter);
+                }
+            });
+        }
+        errors.rethrow();
+
+        for (const auto& part : parts) {
+            columns.extend(part);
+        }
+    }
+
+    return toPython(std::move(columns), filter);
+}
 
 PYBIND11_PLUGIN(sqltools)
 {
     py::module m("sqltools");
-    m.def("getPageRecords", getPageRecords);
-    m.def("getLinksRecords", getLinksRecords);
-    m.def("getCategoryRecords", getCategoryRecords);
-    m.def("getCategoryLinksRecords", getCategoryLinksRecords);
-    m.def("getPagePropertiesRecords", getPagePropertiesRecords);
-    m.def("getRedirectsRecords", getRedirectsRecords);
+
+    py::class_<IntegerColumn>(m, "IntegerColumn", py::buffer_protocol())
+        .def_buffer([] (IntegerColumn& c) {
+            return py::buffer_info(
+                c.values.data(),
+                sizeof(INTEGER),
+                py::format_descriptor<INTEGER>::format(),
+                1,
+                { c.size() },
+                { sizeof(INTEGER) });
+        })
+        .def("__len__", &IntegerColumn::size)
+        .def("__getitem__", [] (const IntegerColumn& c, size_t i) {
+            if (i >= c.size()) {
+                throw py::index_error();
+            }
+            return c.values[i];
+        })
+        .def("__iter__", [] (const IntegerColumn& c) {
+            return py::make_iterator(c.values.begin(), c.values.end());
+        }, py::keep_alive<0, 1>())
+        .def("tolist", [] (const IntegerColumn& c) {
+            return c.values;
+        });
+
+    // the buffer of a text column holds utf8 encoded texts, the i-th text
+    // spans bytes from offsets[i] to offsets[i+1]
+    py::class_<TextColumn>(m, "TextColumn", py::buffer_protocol())
+        .def_buffer([] (TextColumn& c) {
+            return py::buffer_info(
+                const_cast<char*>(c.data.data()),
+                sizeof(char),
+                py::format_descriptor<unsigned char>::format(),
+                1,
+                { c.data.size() },
+                { sizeof(char) });
+        })
+        .def_readonly("offsets", &TextColumn::offsets)
+        .def("__len__", &TextColumn::size)
+        .def("__getitem__", [] (const TextColumn& c, size_t i) {
+            if (i >= c.size()) {
+                throw py::index_error();
+            }
+            return decode(c, i);
+        })
+        .def("__iter__", [] (const TextColumn& c) {
+            return py::iter(decode(c));
+        })
+        .def("decode", [] (const TextColumn& c) {
+            return decode(c);
+        })
+        .def("encoded", [] (const TextColumn& c) {
+            return encoded(c);
+        });
+
+    // columns are given by their positions in the records
+    py::class_<Filter>(m, "Filter")
+        .def(py::init<>())
+        .def("restrictNamespaces", &Filter::restrictNamespaces)
+        .def("restrictFromNamespaces", &Filter::restrictFromNamespaces)
+        .def("project", &Filter::project)
+        .def("acceptsNamespace", &Filter::acceptsNamespace)
+        .def("acceptsFromNamespace", &Filter::acceptsFromNamespace)
+        .def("projects", &Filter::projects);
+
+    py::class_<LinkEdgesWriter>(m, "LinkEdgesWriter")
+        .def(py::init<const std::string&, const Filter&, size_t>(),
+             py::arg("path"), py::arg("filter"), py::arg("resumeAt") = 0)
+        .def("addPages", [] (LinkEdgesWriter& w, py::iterable pages) {
+            for (const auto& handle : pages) {
+                auto page = handle.cast<std::tuple<INTEGER, INTEGER, std::string>>();
+                w.addPage(std::get<0>(page), std::get<1>(page), std::get<2>(page));
+            }
+        })
+        .def("write", [] (LinkEdgesWriter& w, py::list chunk) {
+            auto values = toStrings(chunk);
+            py::gil_scoped_release release;
+            w.write(values);
+        })
+        .def("flush", &LinkEdgesWriter::flush)
+        .def("close", &LinkEdgesWriter::close)
+        .def("pageCount", &LinkEdgesWriter::pageCount)
+        .def("size", &LinkEdgesWriter::size);
+
+    // every function accepts either VALUES of a single statement or a list of
+    // them, the latter is parsed in parallel
+    m.def("getPageRecords", getRecords<PageRecord>, py::arg("values"), py::arg("filter") = Filter());
+    m.def("getPageRecords", getRecordsInParallel<PageRecord>, py::arg("values"), py::arg("filter") = Filter());
+    m.def("getLinksRecords", getRecords<LinksRecord>, py::arg("values"), py::arg("filter") = Filter());
+    m.def("getLinksRecords", getRecordsInParallel<LinksRecord>, py::arg("values"), py::arg("filter") = Filter());
+    m.def("getCategoryRecords", getRecords<CategoryRecord>, py::arg("values"), py::arg("filter") = Filter());
+    m.def("getCategoryRecords", getRecordsInParallel<CategoryRecord>, py::arg("values"), py::arg("filter") = Filter());
+    m.def("getCategoryLinksRecords", getRecords<CategoryLinksRecord>, py::arg("values"), py::arg("filter") = Filter());
+    m.def("getCategoryLinksRecords", getRecordsInParallel<CategoryLinksRecord>, py::arg("values"), py::arg("filter") = Filter());
+    m.def("getPagePropertiesRecords", getRecords<CategoryLinksRecord>, py::arg("values"), py::arg("filter") = Filter());
+    m.def("getPagePropertiesRecords", getRecordsInParallel<CategoryLinksRecord>, py::arg("values"), py::arg("filter") = Filter());
+    m.def("getRedirectsRecords", getRecords<PageRecord>, py::arg("values"), py::arg("filter") = Filter());
+    m.def("getRedirectsRecords", getRecordsInParallel<PageRecord>, py::arg("values"), py::arg("filter") = Filter());
+
+    // column versions only accept lists of statements
+    m.def("getPageColumns", getColumnsInParallel<PageRecord>, py::arg("values"), py::arg("filter") = Filter());
+    m.def("getLinksColumns", getColumnsInParallel<LinksRecord>, py::arg("values"), py::arg("filter") = Filter());
+    m.def("getCategoryColumns", getColumnsInParallel<CategoryRecord>, py::arg("values"), py::arg("filter") = Filter());
+    m.def("getCategoryLinksColumns", getColumnsInParallel<CategoryLinksRecord>, py::arg("values"), py::arg("filter") = Filter());
+    m.def("getPagePropertiesColumns", getColumnsInParallel<CategoryLinksRecord>, py::arg("values"), py::arg("filter") = Filter());
+    m.def("getRedirectsColumns", getColumnsInParallel<PageRecord>, py::arg("values"), py::arg("filter") = Filter());
 
     return m.ptr();
 }
\ No newline at end of file
@@ -3,7 +3,9 @@ from SQLTables import PageTable, CategoryLinksTable, PagePropertiesTable, \
     TSNETable, Join, RedirectsTable
 from ..common.SQLTables import WikimapPointsTable, WikimapCategoriesTable
 from ..common.OtherTables import AggregatedLinksTable
-from EdgeArray import EdgeArray as EdgeTable
+from ..common.SQLBase import closeConnections, migrateLists, startRecording, stopRecording
+from EdgeArray import EdgeArray as EdgeTable, LinkGraph
+from PagerankArray import PagerankArray
 from EvaluationTables import SimilarityDataset, TripletDataset, EvaluationReport
 from OtherTables import IndexedEmbeddingsTable, TitleIndex
 from ..Embeddings import Embeddings as EmbeddingsTable
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import shutil
+import tempfile
+from itertools import permutations
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from wikimap import Jobs, Tables
+from wikimap.Paths import AbstractPaths
+from wikimap.Builder.Job import Job
+
+
+class TestBuild(object):
+    """Build directory with a link graph of `nodes` linking to each other."""
+
+    def __init__(self, nodes):
+        self._nodes = nodes
+
+    def __enter__(self):
+        self.base = tempfile.mkdtemp(prefix='testbuild-')
+        edges = Tables.EdgeTable(log=False)
+        edges.populate(permutations(self._nodes, 2))
+        edges.extend([(node, self._nodes[0]) for node in self._nodes[1::2]])
+        edges.saveCSR(AbstractPaths.link_graph(self.base))
+        return self
+
+    def __exit__(self, *args):
+        shutil.rmtree(self.base)
+
+
+def check(message, condition):
+    if condition:
+        print "[PASS] ", message
+    else:
+        print "[FAIL] ", message
+
+
+def computePagerank(build, prevBuild=None, **config):
+    job = Jobs.ComputePagerank()
+    job.config.update(config)
+    # outputs of a previous run are replaced, like in a new build
+    for path in job.outputs(build.base):
+        if os.path.exists(path):
+            os.remove(path)
+    job.run(build.base, prevBuild)
+    table = Tables.PagerankTable(AbstractPaths.pagerank(build.base))
+    return job, table.select_iterations()
+
+
+def testWarmStart():
+    with TestBuild(range(12)) as old, TestBuild(range(14)) as new:
+        job, coldIterations = computePagerank(old, warm_start=True)
+        check(
+            "Pagerank without a base build",
+            job.outcome == Job.SUCCESS
+            and coldIterations[0] == coldIterations[1] > 1
+        )
+
+        missing = os.path.join(old.base, 'missing')
+        job, iterations = computePagerank(new, missing, warm_start=True)
+        check(
+            "Pagerank with a missing base build starts from uniform ranks",
+            job.outcome == Job.SUCCESS
+            and iterations[0] == iterations[1]
+            and not job.logs
+        )
+
+        job, iterations = computePagerank(new, old.base, warm_start=True)
+        check(
+            "Pagerank started from ranks of the base build",
+            job.outcome == Job.SUCCESS
+            and iterations[1] == coldIterations[1]
+            and len(job.logs) == 1
+        )
+
+        job, iterations = computePagerank(new, old.base, tolerance=0, max_iterations=3)
+        check("Maximum iterations of pagerank job", iterations == (3, 3))
+
+
+def main():
+    print "Testing jobs:"
+    testWarmStart()
+
+
+if __name__ == "__main__":
+    main()
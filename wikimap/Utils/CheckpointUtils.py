@@ -0,0 +1,116 @@
+import os
+import ast
+import logging
+from pprint import pformat
+from Utils import SimpleTimer
+
+
+class Checkpoint(object):
+    """
+    Progress of an import, saved next to its output.
+
+    If an import fails, its output is kept together with the checkpoint, so
+    that the next build can continue after the last checkpointed chunk of the
+    dump instead of starting over. Progress consists of the number of chunks
+    of the dump that are fully written to the output and the number of rows
+    written so far.
+    """
+
+    SUFFIX = '.checkpoint'
+
+    def __init__(self, output, interval, **signature):
+        """
+        Load the checkpoint of `output` if there is one.
+
+        `output` - path of the output the progress refers to
+
+        `interval` - number of chunks between saved checkpoints, 0 disables
+        checkpoints
+
+        `signature` - parameters of the import that have to be the same for a
+        checkpoint to be valid (e.g. the chunk size). An invalid checkpoint is
+        discarded together with the output.
+        """
+        self._output = output
+        self._path = Checkpoint.path_of(output)
+        self._interval = interval
+        self._signature = signature
+        self._saved = 0
+        self._overhead = 0.0
+        self._resumed_chunks = 0
+        self.chunks = 0
+        self.rows = 0
+        self._load()
+
+    @staticmethod
+    def path_of(output):
+        return output + Checkpoint.SUFFIX
+
+    @staticmethod
+    def exists(output):
+        return os.path.isfile(Checkpoint.path_of(output))
+
+    def update(self, chunks, rows, flush=None):
+        """
+        Record progress and save a checkpoint every `interval` chunks.
+
+        `flush` - if given, called before saving a checkpoint to write out
+        buffered rows of the output
+        """
+        self.chunks = chunks
+        self.rows = rows
+
+        if self._interval > 0 and chunks % self._interval == 0:
+            timer = SimpleTimer()
+            if flush is not None:
+                flush()
+            self._save()
+            self._overhead += timer()
+            self._saved += 1
+
+    def remove(self):
+        """Remove the checkpoint once the output is complete."""
+        if os.path.isfile(self._path):
+            os.remove(self._path)
+
+    def get_summary(self):
+        return 'Checkpoints of {}: resumed after {} chunks, saved {} in {:.2f}s'.format(
+            os.path.basename(self._output),
+            self._resumed_chunks,
+            self._saved,
+            self._overhead)
+
+    def _load(self):
+        if not os.path.isfile(self._path):
+            return
+
+        logger = logging.getLogger(__name__)
+        with open(self._path, 'r') as checkpoint_file:
+            state = ast.literal_eval(checkpoint_file.read())
+
+        if state['signature'] != self._signature:
+            logger.info('Discarding checkpoint of {} made with {}'.format(
+                self._output, state['signature']))
+            self.remove()
+            if os.path.isfile(self._output):
+                os.remove(self._output)
+            return
+
+        self.chunks = self._resumed_chunks = state['chunks']
+        self.rows = state['rows']
+        logger.info('Resuming {} after {} chunks ({} rows)'.format(
+            self._output, self.chunks, self.rows))
+
+    def _save(self):
+        state = {
+            'chunks': self.chunks,
+            'rows': self.rows,
+            'signature': self._signature
+        }
+
+        # the checkpoint is replaced atomically, so that a failure while
+        # saving leaves the previous one intact
+        tmp_path = self._path + '.tmp'
+        with open(tmp_path, 'w') as checkpoint_file:
+            checkpoint_file.write(pformat(state))
+        os.rename(tmp_path, self._path)
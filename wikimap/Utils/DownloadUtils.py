@@ -0,0 +1,261 @@
+import os
+import sys
+import urllib2
+import logging
+import threading
+import LogUtils
+from CheckpointUtils import Checkpoint
+
+BLOCK_SIZE = 1024 * 1024
+DEFAULT_CHECKPOINT_INTERVAL = 64 # blocks
+MAX_RETRIES = 3
+
+_downloads = {}
+_downloads_lock = threading.Lock()
+
+
+def download(url, output_path, background=False):
+    """
+    Download `url` to `output_path`.
+
+    An interrupted download is resumed with HTTP range requests, both within
+    a single call and across builds (through a checkpoint of the output).
+
+    `background` - if True, return immediately and download on a separate
+    thread. The file can be read with `open_download` while it is being
+    downloaded. `wait_for_downloads` waits for all background downloads.
+    """
+    download_ = Download(url, output_path)
+    if background:
+        with _downloads_lock:
+            _downloads[os.path.abspath(output_path)] = download_
+        download_.start()
+    else:
+        download_.run()
+
+
+def open_download(path):
+    """Open a file for reading in binary mode. If the file is being downloaded
+    in the background, reads block until the requested data arrives."""
+    with _downloads_lock:
+        download_ = _downloads.get(os.path.abspath(path))
+
+    if download_ is not None:
+        return download_.open()
+    else:
+        return open(path, 'rb')
+
+
+def wait_for_downloads():
+    """Wait for all background downloads, re-raising the first error."""
+    with _downloads_lock:
+        downloads = _downloads.values()
+        _downloads.clear()
+
+    for download_ in downloads:
+        download_.wait()
+
+
+class Download(object):
+    """
+    Download of a url to a file that can be read while it is downloaded.
+
+    Until the download completes, its output has a checkpoint holding the
+    number of bytes safely written, so a failed download is kept and resumed
+    with a range request instead of being started over.
+    """
+
+    def __init__(self, url, path, checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL):
+        self.url = url
+        self.path = path
+        self._checkpoint = Checkpoint(path, max(checkpoint_interval, 1), url=url)
+        self._blocks = 0
+        self._size = 0
+        self._done = False
+        self._error = None
+        self._condition = threading.Condition()
+
+    def run(self):
+        """Download on the current thread."""
+        self._prepare()
+        try:
+            self._download(LogUtils.ProgressBar(self.url))
+        except:
+            self._finish(sys.exc_info())
+            raise
+        self._finish(None)
+
+    def start(self):
+        """Start downloading on a background thread."""
+        self._prepare()
+        thread = threading.Thread(target=self._run_in_background)
+        thread.daemon = True
+        thread.start()
+
+    def wait(self):
+        """Wait until the download is done, re-raising its error."""
+        with self._condition:
+            while not self._done:
+                # waiting with a timeout keeps the thread interruptible
+                self._condition.wait(1.0)
+
+        if self._error is not None:
+            raise self._error[0], self._error[1], self._error[2]
+
+    def wait_for(self, position):
+        """
+        Wait until data after `position` is downloaded or the download is done
+        and return the number of downloaded bytes after `position`.
+        """
+        with self._condition:
+            while self._size <= position and not self._done:
+                self._condition.wait(1.0)
+
+            if self._size <= position and self._error is not None:
+                raise self._error[0], self._error[1], self._error[2]
+
+            return self._size - position
+
+    def open(self):
+        return DownloadReader(self)
+
+    def _prepare(self):
+        # bytes after the checkpoint may be incomplete, so they are discarded
+        with open(self.path, 'ab') as output:
+            output.truncate(self._checkpoint.rows)
+        self._blocks = self._checkpoint.chunks
+        self._size = self._checkpoint.rows
+        self._checkpoint.update(self._blocks, self._size)
+
+    def _run_in_background(self):
+        logger = logging.getLogger(__name__)
+        logger.info('Downloading {} in the background'.format(self.url))
+        try:
+            self._download(None)
+        except:
+            logger.exception('Failed to download {}'.format(self.url))
+            self._finish(sys.exc_info())
+        else:
+            logger.info('Downloaded {}'.format(self.url))
+            self._finish(None)
+
+    def _download(self, progress):
+        logger = logging.getLogger(__name__)
+
+        for retry in range(MAX_RETRIES + 1):
+            try:
+                self._fetch(progress)
+                break
+            except urllib2.HTTPError:
+                raise
+            except IOError as e:
+                if retry == MAX_RETRIES:
+                    raise
+                logger.info('Download of {} interrupted ({}), resuming from byte {}'.format(
+                    self.url, e, self._size))
+
+        self._checkpoint.remove()
+
+    def _fetch(self, progress):
+        request = urllib2.Request(self.url)
+        if self._size > 0:
+            request.add_header('Range', 'bytes={}-'.format(self._size))
+        response = urllib2.urlopen(request)
+
+        try:
+            length = response.info().getheader('Content-Length')
+            total = int(length) if length is not None else None
+
+            if response.getcode() == 206:
+                total = self._size + total if total is not None else None
+            elif self._size > 0:
+                # the server ignored the range, so the part that is already
+                # downloaded is skipped
+                self._skip(response, self._size)
+
+            with open(self.path, 'r+b') as output:
+                output.seek(self._size)
+                while True:
+                    block = response.read(BLOCK_SIZE)
+                    if not block:
+                        break
+
+                    output.write(block)
+                    output.flush()
+                    self._append(len(block))
+                    if progress is not None and total:
+                        progress.report(self._blocks, BLOCK_SIZE, total)
+
+            if total is not None and self._size < total:
+                raise IOError('Connection closed after {} of {} bytes'.format(self._size, total))
+        finally:
+            response.close()
+
+    def _skip(self, response, size):
+        while size > 0:
+            block = response.read(min(size, BLOCK_SIZE))
+            if not block:
+                raise IOError('Connection closed while skipping downloaded data')
+            size -= len(block)
+
+    def _append(self, size):
+        with self._condition:
+            self._size += size
+            self._condition.notify_all()
+
+        self._blocks += 1
+        self._checkpoint.update(self._blocks, self._size)
+
+    def _finish(self, error):
+        with self._condition:
+            self._done = True
+            self._error = error
+            self._condition.notify_all()
+
+
+class DownloadReader(object):
+    """
+    File-like object reading a file while it is being downloaded.
+
+    Reads block until the requested data is downloaded. It supports the
+    operations needed by gzip.GzipFile.
+    """
+
+    mode = 'rb'
+
+    def __init__(self, download_):
+        self._download = download_
+        self._file = open(download_.path, 'rb')
+
+    def read(self, size=-1):
+        if size < 0:
+            self._download.wait()
+            return self._file.read()
+
+        # like a file, only a read at the end returns less than `size` bytes,
+        # readers such as gzip.GzipFile rely on it (e.g. for headers spanning
+        # downloaded blocks)
+        parts = []
+        while size > 0:
+            available = self._download.wait_for(self._file.tell())
+            if available == 0:
+                break
+            part = self._file.read(min(size, available))
+            parts.append(part)
+            size -= len(part)
+        return ''.join(parts)
+
+    def tell(self):
+        return self._file.tell()
+
+    def seek(self, offset, whence=0):
+        if whence == 2:
+            # the end of a file is only known once it is downloaded, until
+            # then it is some position after the current one
+            position = self._file.tell()
+            self._file.seek(position + self._download.wait_for(position) + offset)
+        else:
+            self._file.seek(offset, whence)
+
+    def close(self):
+        self._file.close()
@@ -45,6 +45,10 @@ def format_duration(secs):
     minutes, seconds = divmod(rem, 60)
     return "{:0>2}:{:0>2}:{:06.3f}".format(int(hours), int(minutes), seconds)
 
+def format_rate(name, count, secs):
+    return "Imported {} {} in {:.2f}s ({:.0f} rows/s)".format(
+        count, name, secs, count / max(secs, 1e-6))
+
 def get_number_width(number):
     return int(math.ceil(math.log10(number + 1)))
 
@@ -26,6 +26,11 @@ def make_links(path_pairs):
     for src, dst in path_pairs:
         make_link(src, dst)
 
+def move_files(path_pairs):
+    for src, dst in path_pairs:
+        make_dir_if_not_exists(os.path.dirname(dst))
+        shutil.move(src, dst)
+
 def make_dir_if_not_exists(path):
     if not os.path.exists(path):
         os.makedirs(path)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+
+from DownloadUtils import Download
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from CheckpointUtils import Checkpoint
+import os
+import gzip
+import time
+import random
+import StringIO
+import threading
+
+
+def compress(data):
+    buf = StringIO.StringIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb') as f:
+        f.write(data)
+    return buf.getvalue()
+
+
+class TestServer(object):
+    """
+    Local HTTP server of a gzipped file supporting range requests.
+
+    `cut` - numbers of bytes after which the responses to successive requests
+    are interrupted, None for a complete response
+
+    `delay` - seconds to wait before each response
+    """
+
+    data = compress(''.join(chr(random.randint(0, 255)) for _ in range(50000)))
+
+    storage = 'tmptestdownload.gz'
+
+    def __init__(self, cut=(), delay=0):
+        self.cut = list(cut)
+        self.delay = delay
+        self.ranges = []
+
+    def __enter__(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(server.delay)
+                start = 0
+                header = self.headers.getheader('Range')
+                server.ranges.append(header)
+                if header is not None:
+                    start = int(header.split('=')[1].rstrip('-'))
+                    self.send_response(206)
+                else:
+                    self.send_response(200)
+                self.send_header('Content-Length', str(len(server.data) - start))
+                self.end_headers()
+
+                end = len(server.data)
+                if server.cut:
+                    cut = server.cut.pop(0)
+                    if cut is not None:
+                        end = min(end, start + cut)
+                self.wfile.write(server.data[start:end])
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = HTTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=self._httpd.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.url = 'http://127.0.0.1:{}/dump.gz'.format(self._httpd.server_port)
+        return self
+
+    def __exit__(self, *args):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        for path in (TestServer.storage, Checkpoint.path_of(TestServer.storage)):
+            if os.path.isfile(path):
+                os.unlink(path)
+
+
+def check(message, condition):
+    if condition:
+        print "[PASS] ", message
+    else:
+        print "[FAIL] ", message
+
+
+def readDownload():
+    with open(TestServer.storage, 'rb') as f:
+        return f.read()
+
+
+def testDownload():
+    with TestServer() as server:
+        Download(server.url, TestServer.storage).run()
+        check("Download", readDownload() == TestServer.data)
+        check(
+            "Checkpoint removed after download",
+            not Checkpoint.exists(TestServer.storage)
+        )
+
+
+def testInterrupted():
+    with TestServer(cut=[1000, 5000]) as server:
+        Download(server.url, TestServer.storage).run()
+        check("Interrupted download", readDownload() == TestServer.data)
+        check(
+            "Interrupted download resumed with ranges",
+            server.ranges == [None, 'bytes=1000-', 'bytes=6000-']
+        )
+
+
+def testResumed():
+    with TestServer(cut=[2000] * 4) as server:
+        try:
+            Download(server.url, TestServer.storage, checkpoint_interval=1).run()
+            failed = False
+        except IOError:
+            failed = True
+        check(
+            "Failed download keeps checkpoint",
+            failed and Checkpoint.exists(TestServer.storage)
+        )
+
+        server.ranges = []
+        Download(server.url, TestServer.storage, checkpoint_interval=1).run()
+        check("Resumed download", readDownload() == TestServer.data)
+        check("Download resumed with a range", server.ranges == ['bytes=8000-'])
+
+
+def testReadWhileDownloading():
+    # the file arrives in small blocks, so reads span several of them
+    with TestServer(cut=[5, 50], delay=0.1) as server:
+        download = Download(server.url, TestServer.storage)
+        download.start()
+        reader = download.open()
+        check("Read blocks for all requested bytes", reader.read(100) == TestServer.data[:100])
+        reader.seek(0)
+        with gzip.GzipFile(fileobj=reader, mode='rb') as f:
+            data = f.read()
+        download.wait()
+        check(
+            "Gzip read while downloading",
+            data == gzip.GzipFile(fileobj=StringIO.StringIO(TestServer.data)).read()
+        )
+        check("Read at the end returns nothing", reader.read(100) == '')
+        reader.close()
+
+
+def main():
+    print "Testing downloads:"
+    testDownload()
+    testInterrupted()
+    testResumed()
+    testReadWhileDownloading()
+
+
+if __name__ == "__main__":
+    main()
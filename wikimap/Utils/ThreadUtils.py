@@ -0,0 +1,74 @@
+import sys
+import threading
+import Queue
+
+
+class BackgroundIterator(object):
+    """
+    Iterate over an iterable on a separate thread.
+
+    Items are produced ahead of the consumer into a bounded queue, so that
+    producing them (e.g. decompressing a dump) overlaps with consuming them.
+    The order of items is preserved. An exception raised by the producer is
+    re-raised in the consumer.
+    """
+
+    _END = object()
+
+    def __init__(self, iterable, maxsize=2):
+        """
+        Prepare the iterator. The background thread starts on iteration.
+
+        `iterable` is the iterable to consume in the background.
+
+        `maxsize` is the maximum number of items produced ahead.
+        """
+        self._iterable = iterable
+        self._maxsize = maxsize
+
+    def __iter__(self):
+        queue = Queue.Queue(self._maxsize)
+        stopped = threading.Event()
+
+        thread = threading.Thread(target=self._produce, args=(queue, stopped))
+        thread.daemon = True
+        thread.start()
+
+        try:
+            while True:
+                item = queue.get()
+                if item is BackgroundIterator._END:
+                    break
+                elif isinstance(item, _Failure):
+                    raise item.type, item.value, item.traceback
+                else:
+                    yield item
+        finally:
+            stopped.set()
+
+    def _produce(self, queue, stopped):
+        try:
+            for item in self._iterable:
+                if not self._put(queue, stopped, item):
+                    return
+            self._put(queue, stopped, BackgroundIterator._END)
+        except:
+            self._put(queue, stopped, _Failure(*sys.exc_info()))
+
+    def _put(self, queue, stopped, item):
+        # Give up when the consumer stops iterating, so that the thread does
+        # not block forever on a full queue.
+        while not stopped.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Queue.Full:
+                pass
+        return False
+
+
+class _Failure(object):
+    def __init__(self, type_, value, traceback):
+        self.type = type_
+        self.value = value
+        self.traceback = traceback
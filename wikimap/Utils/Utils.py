@@ -5,9 +5,6 @@ import tempfile
 from time import time
 import LogUtils
 
-def download(url, output_path):
-    urllib.urlretrieve(url, output_path, reporthook=LogUtils.ProgressBar(url).report)
-
 def download_and_extract(url, output_path):
     logger = logging.getLogger(__name__)
 
@@ -1,5 +1,8 @@
-from LogUtils import config_logging, get_logger, thick_line_separator, thin_line_separator, format_duration, get_number_width, make_table, Colors, color_text, ProgressBar
-from OsUtils import clear_directory, link_directory, pack, make_links, make_link, get_subdirs, make_dir_if_not_exists
+from LogUtils import config_logging, get_logger, thick_line_separator, thin_line_separator, format_duration, format_rate, get_number_width, make_table, Colors, color_text, ProgressBar
+from OsUtils import clear_directory, link_directory, pack, make_links, make_link, move_files, get_subdirs, make_dir_if_not_exists
 from CastUtils import any2unicode, any2array
 from ScriptUtils import parse_comma_separated_ints, parse_comma_separated_floats, parse_comma_separated_strings, ParseException
 from Utils import *
+from ThreadUtils import BackgroundIterator
+from CheckpointUtils import Checkpoint
+from DownloadUtils import download, open_download, wait_for_downloads
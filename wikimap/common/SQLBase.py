@@ -1,25 +1,111 @@
+import os
+import sys
+import ast
+import time
+import array
+import Queue
+import numbers
 import sqlite3
 import logging
+import threading
 import Utils
 import contextlib
+from itertools import islice, izip, imap, chain, count
+from operator import itemgetter
 
-def list2string(lst):
-    return repr(lst)
+CACHED_STATEMENTS = 256
+# page cache of a connection in KiB, set in bytes since pages of bulk loaded
+# databases are larger
+CACHE_SIZE_KIB = 1024 * 1024
+MAX_IDLE_CONNECTIONS = 4 # per thread and set of attached databases
 
-def string2list(string):
-    return eval(string)
+DEFAULT_DESCRIPTION = "query"
+PLANNED_STATEMENTS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'WITH')
+# tables read in whole by design, not reported as full scans
+EXPECTED_SCANS = ('lookup_keys', 'temp.lookup_keys')
 
-sqlite3.register_adapter(list, list2string)
-sqlite3.register_converter("LIST", string2list)
+LOOKUP_BATCH_SIZE = 10000 # keys joined with a query at once
+
+PREFETCH_BLOCK_SIZE = 10000 # rows fetched at once by a prefetching cursor
+PREFETCH_BLOCKS = 4 # blocks fetched ahead of the consumer
+
+WRITE_BATCH_SIZE = 10000 # rows handed to a background writer at once
+WRITE_QUEUE_BATCHES = 4 # batches waiting for a background writer
+DEFAULT_TRANSACTION_SIZE = 1000000 # rows written between commits
+
+BULK_LOAD_PAGE_SIZE = 16384
+# pragmas set for the time of a bulk load, with their values
+BULK_LOAD_PRAGMAS = [
+    ("temp_store", "FILE"), # staged rows and sorts of indexes may not fit in memory
+    ("mmap_size", 1073741824)
+]
+
+# type tags of binary encoded lists, older versions stored lists as text made
+# by repr, which always starts with '['
+INT_LIST = 'i' # int32 values
+FLOAT_LIST = 'd' # float64 values
+TEXT_LIST = 's' # utf8 encoded unicode values separated by \0
+LITERAL_LIST = 'r' # any other list as a python literal
+LEGACY_LIST = '['
+
+def packArray(typecode, values):
+    packed = array.array(typecode, values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return typecode + packed.tostring()
+
+def unpackArray(typecode, bytes_):
+    packed = array.array(typecode)
+    packed.fromstring(bytes_)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tolist()
+
+def encodeList(lst):
+    """
+    Encode a list as a BLOB holding a type tag and packed values.
+
+    The type is chosen by the first value, so encoding is lossy: integers
+    after a float come back as floats ([1.5, 2] as [1.5, 2.0]) and bools as
+    ints. Lists that can't be packed, e.g. of mixed types after an integer,
+    are stored as python literals.
+    """
+    try:
+        if not lst or isinstance(lst[0], numbers.Integral):
+            return buffer(packArray(INT_LIST, lst))
+        elif isinstance(lst[0], numbers.Real):
+            return buffer(packArray(FLOAT_LIST, lst))
+        elif isinstance(lst[0], unicode) and all(isinstance(v, unicode) and u'\0' not in v for v in lst):
+            return buffer(TEXT_LIST + u'\0'.join(lst).encode('utf-8'))
+    except (TypeError, OverflowError):
+        pass # values of mixed or unsupported types
+    return buffer(LITERAL_LIST + repr(lst))
+
+def decodeList(bytes_):
+    tag, payload = bytes_[:1], bytes_[1:]
+    if tag == INT_LIST or tag == FLOAT_LIST:
+        return unpackArray(tag, payload)
+    elif tag == TEXT_LIST:
+        return payload.decode('utf-8').split(u'\0')
+    elif tag == LITERAL_LIST:
+        return ast.literal_eval(payload)
+    elif tag == LEGACY_LIST:
+        return ast.literal_eval(bytes_)
+    else:
+        raise ValueError("Unknown type tag of a list: {!r}".format(tag))
+
+sqlite3.register_adapter(list, encodeList)
+sqlite3.register_converter("LIST", decodeList)
 
 def connect(*tables, **kwargs):
     tables = list(tables)
 
+    kwargs.setdefault('cached_statements', CACHED_STATEMENTS)
     con = sqlite3.connect(tables[0], **kwargs)
 
     con.execute("PRAGMA synchronous = OFF")
     con.execute("PRAGMA journal_mode = OFF")
-    con.execute("PRAGMA cache_size = 2000000")
+    con.execute("PRAGMA cache_size = -{}".format(CACHE_SIZE_KIB))
 
     con.commit()
 
@@ -37,18 +123,574 @@ def connect(*tables, **kwargs):
 
     return con
 
+def migrateLists(path, batchSize=10000):
+    """
+    Rewrite LIST columns stored as text by older versions of the database at
+    `path` in the binary format and return the number of rewritten values.
+    Old databases can be read without it, but migrated ones are smaller and
+    faster to read.
+    """
+    con = connect(path)
+    migrated = 0
+    tables = [t for (t,) in con.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+    for table in tables:
+        for column in con.execute("PRAGMA table_info({})".format(table)).fetchall():
+            name, type_ = column[1], column[2]
+            if type_.upper() != 'LIST':
+                continue
+
+            lastRowid = -2**63
+            while True:
+                # rows are updated in batches, never while they are selected
+                rows = con.execute("""
+                    SELECT rowid, {0} FROM {1}
+                    WHERE rowid > ? AND typeof({0}) = 'text'
+                    ORDER BY rowid LIMIT ?""".format(name, table),
+                    (lastRowid, batchSize)).fetchall()
+                if not rows:
+                    break
+                con.executemany("UPDATE {} SET {} = ? WHERE rowid = ?".format(table, name),
+                    ((encodeList(decodeList(value.encode('utf-8'))), rowid) for rowid, value in rows))
+                con.commit()
+                lastRowid = rows[-1][0]
+                migrated += len(rows)
+
+    if migrated:
+        con.execute("VACUUM")
+    con.close()
+    return migrated
+
+def fileIds(tables):
+    """Identify files of databases, to notice when they are removed or replaced."""
+    ids = []
+    for elem in tables:
+        path = elem[0] if isinstance(elem, tuple) else elem
+        try:
+            stat = os.stat(path)
+            ids.append((stat.st_dev, stat.st_ino))
+        except OSError:
+            ids.append(None)
+    return tuple(ids)
+
+class PooledConnection(object):
+    def __init__(self, tables, detectTypes):
+        self.connection = connect(*tables, detect_types=detectTypes)
+        self.fileIds = fileIds(tables)
+        self.owner = (os.getpid(), threading.current_thread().ident)
+
+class ConnectionPool(threading.local):
+    """
+    Idle connections of a thread, grouped by the attached databases.
+
+    Reusing connections saves opening files, running PRAGMAs and ATTACHing
+    databases for every query and keeps statements prepared by sqlite in the
+    cache of a connection. sqlite connections can't be shared between threads
+    and processes, so every thread of a process has its own pool.
+    """
+
+    def __init__(self):
+        self._pid = os.getpid()
+        self._idle = {}
+
+    def acquire(self, tables, detectTypes):
+        self._checkProcess()
+        key = (tables, detectTypes)
+        idle = self._idle.get(key, [])
+        while idle:
+            pooled = idle.pop()
+            # a connection to a removed or replaced file would use its old
+            # version, so it is reopened
+            if pooled.fileIds == fileIds(tables) and None not in pooled.fileIds:
+                return key, pooled
+            pooled.connection.close()
+        return key, PooledConnection(tables, detectTypes)
+
+    def release(self, key, pooled):
+        if pooled.owner != (os.getpid(), threading.current_thread().ident):
+            # cursors may be released by other threads, but connections can
+            # only be used by their owner
+            return
+        pooled.connection.set_progress_handler(None, 0)
+        idle = self._idle.setdefault(key, [])
+        if len(idle) < MAX_IDLE_CONNECTIONS:
+            idle.append(pooled)
+        else:
+            pooled.connection.close()
+
+    def close(self, tables=None):
+        """Close idle connections to `tables` or all of them."""
+        self._checkProcess()
+        for key in self._idle.keys():
+            if tables is None or key[0] == tables:
+                for pooled in self._idle.pop(key):
+                    pooled.connection.close()
+
+    def _checkProcess(self):
+        if self._pid != os.getpid():
+            # connections inherited from the parent process can't be used nor
+            # closed safely, so they are abandoned
+            _abandoned.append(self._idle)
+            self._pid = os.getpid()
+            self._idle = {}
+
+_abandoned = []
+_pool = ConnectionPool()
+
+def closeConnections():
+    """Close idle pooled connections of the current thread."""
+    _pool.close()
+
+class PooledCursor(object):
+    """Cursor that returns its connection to the pool once it is exhausted
+    or no longer referenced."""
+
+    def __init__(self, cursor, finish):
+        self._cursor = cursor
+        self._finish = finish
+        self._rows = count()
+
+    def __iter__(self):
+        # rows are counted and passed on by itertools, without a Python frame
+        # per row, the cursor is closed once they are exhausted
+        rows = imap(itemgetter(0), izip(self._cursor, self._rows))
+        return chain(rows, self._exhausted())
+
+    def _exhausted(self):
+        self.close()
+        return
+        yield
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def close(self):
+        if self._finish is not None:
+            self._cursor.close()
+            self._finish(next(self._rows))
+            self._finish = None
+
+    def __del__(self):
+        self.close()
+
+class PrefetchingCursor(object):
+    """
+    Cursor stepping through a select on a background thread.
+
+    Rows are fetched in blocks of `blockSize` into a queue of at most
+    `maxBlocks` blocks, so sqlite steps through the query while the consumer
+    processes earlier rows. sqlite connections can't be shared between
+    threads, so the thread opens its own connection. Rows can be iterated one
+    by one or in blocks (lists of rows) with `blocks`. An error of the query
+    is raised by the iteration. Like a sqlite cursor, a closed or exhausted
+    cursor yields no rows.
+    """
+
+    _END = object()
+
+    def __init__(self, proxy, query, params=(), blockSize=PREFETCH_BLOCK_SIZE, maxBlocks=PREFETCH_BLOCKS):
+        self._queue = Queue.Queue(maxBlocks)
+        self._stopped = threading.Event()
+        # nothing more arrives in the queue once the cursor is finished
+        self._finished = False
+        # the thread doesn't reference the cursor, so an abandoned cursor is
+        # collected and stops it
+        thread = threading.Thread(target=PrefetchingCursor._fetch,
+            args=(proxy, query, params, blockSize, self._queue, self._stopped))
+        thread.daemon = True
+        thread.start()
+
+    def blocks(self):
+        if self._finished:
+            return
+        try:
+            while True:
+                block = self._queue.get()
+                if block is PrefetchingCursor._END:
+                    break
+                elif isinstance(block, _FetchError):
+                    raise block.type, block.value, block.traceback
+                else:
+                    yield block
+        finally:
+            self.close()
+
+    def __iter__(self):
+        for block in self.blocks():
+            for row in block:
+                yield row
+
+    def fetchall(self):
+        return list(self)
+
+    def close(self):
+        """Stop fetching rows, the connection is closed by the thread."""
+        self._finished = True
+        self._stopped.set()
+
+    def __del__(self):
+        self.close()
+
+    @staticmethod
+    def _fetch(proxy, query, params, blockSize, queue, stopped):
+        def put(item):
+            # give up when the consumer stops reading, instead of blocking
+            # forever on a full queue
+            while not stopped.is_set():
+                try:
+                    queue.put(item, timeout=0.1)
+                    return True
+                except Queue.Full:
+                    pass
+            return False
+
+        try:
+            with proxy._setup(query, keep=True, usePool=False, params=params) as (con, finish):
+                cursor = con.cursor()
+                cursor.execute(query._query, params)
+                rows = 0
+                while True:
+                    block = cursor.fetchmany(blockSize)
+                    if not block or not put(block):
+                        break
+                    rows += len(block)
+                cursor.close()
+                finish(rows)
+            put(PrefetchingCursor._END)
+        except:
+            put(_FetchError(*sys.exc_info()))
+
+class _FetchError(object):
+    def __init__(self, type_, value, traceback):
+        self.type = type_
+        self.value = value
+        self.traceback = traceback
+
+def queryPlan(connection, statement, params=None):
+    """
+    Return details of the steps of the query plan of `statement`, or None if
+    it can't be made yet, e.g. the statement refers to tables created later.
+
+    `params` - parameters of the statement, NULLs are bound to its
+    placeholders if they are not known (values don't change the plan much)
+    """
+    if not statement.lstrip().upper().startswith(PLANNED_STATEMENTS):
+        return []
+    if params is None:
+        params = (None,) * statement.count('?')
+    try:
+        return [row[-1] for row in connection.execute("EXPLAIN QUERY PLAN "+statement, params)]
+    except sqlite3.OperationalError:
+        return None
+    except sqlite3.Error:
+        return [] # retrying would fail the same way
+
+def fullScans(plan):
+    """Return tables (or their indexes) read in whole according to `plan`."""
+    scans = []
+    for detail in plan:
+        words = detail.split()
+        if len(words) > 1 and words[0] == 'SCAN':
+            table = words[2] if words[1] == 'TABLE' and len(words) > 2 else words[1]
+            if table not in EXPECTED_SCANS:
+                scans.append(table)
+    return scans
+
 def explain(connection, statement):
     logger = logging.getLogger(__name__)
 
-    cursor = connection.cursor()
-
     logger.info('Query plan:')
-    cursor.execute("EXPLAIN QUERY PLAN "+statement)
-    for row in cursor:
-        print row
+    for detail in queryPlan(connection, statement) or []:
+        print detail
+
+class QueryMetrics(object):
+    """Metrics of all executions of a statement."""
+
+    def __init__(self, description, statement, plan):
+        self.description = description
+        self.statement = statement
+        # whether the plan was made, it may be empty for other statements
+        self.planned = plan is not None
+        self.plan = plan or []
+        self.fullScans = fullScans(self.plan)
+        self.executions = 0
+        self.seconds = 0.0
+        self.rows = 0
+
+    def name(self):
+        if self.description != DEFAULT_DESCRIPTION:
+            return self.description
+        return ' '.join(self.statement.split())
+
+    def asDict(self):
+        return {
+            'description': self.description,
+            'statement': ' '.join(self.statement.split()),
+            'plan': self.plan,
+            'fullScans': self.fullScans,
+            'executions': self.executions,
+            'seconds': self.seconds,
+            'rows': self.rows
+        }
+
+class QueryRecorder(object):
+    """
+    Collects metrics of queries executed by table proxies of all threads,
+    from startRecording until stopRecording. Rows are the ones returned by
+    selects and changed by other statements.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def knows(self, statement):
+        metrics = self._metrics.get(statement)
+        return metrics is not None and metrics.planned
+
+    def record(self, query, plan, seconds, rows):
+        with self._lock:
+            metrics = self._metrics.get(query._query)
+            if metrics is None:
+                metrics = self._metrics[query._query] = QueryMetrics(query._description, query._query, plan)
+            elif plan is not None and not metrics.planned:
+                # the plan can't be made before the tables of a query exist
+                metrics.planned = True
+                metrics.plan, metrics.fullScans = plan, fullScans(plan)
+            metrics.executions += 1
+            metrics.seconds += seconds
+            metrics.rows += rows
+
+    def getMetrics(self):
+        """Return metrics of recorded queries, starting with the slowest."""
+        with self._lock:
+            return sorted(self._metrics.values(), key=lambda m: -m.seconds)
+
+_recorders = []
+_recordersLock = threading.Lock()
+
+def startRecording():
+    recorder = QueryRecorder()
+    with _recordersLock:
+        _recorders.append(recorder)
+    return recorder
+
+def stopRecording(recorder):
+    with _recordersLock:
+        _recorders.remove(recorder)
+    return recorder.getMetrics()
+
+def batched(values, batchSize):
+    """Split `values` into lists of at most `batchSize` items."""
+    values = iter(values)
+    while True:
+        batch = list(islice(values, batchSize))
+        if not batch:
+            return
+        yield batch
+
+def writeBatches(con, writer, batches, transactionSize):
+    """
+    Write `batches` of rows with `writer` (an Inserter or a BulkLoader),
+    committing every `transactionSize` rows, and return the number of rows.
+    `batches` are pairs of a list of rows and a function called once they are
+    committed (or None).
+    """
+    rows = uncommitted = 0
+    callbacks = []
+
+    def commit():
+        con.commit()
+        for callback in callbacks:
+            callback()
+        del callbacks[:]
+
+    writer.prepare(con)
+    for batch, committed in batches:
+        writer.write(con, batch)
+        rows += len(batch)
+        uncommitted += len(batch)
+        if committed is not None:
+            callbacks.append(committed)
+        if uncommitted >= transactionSize:
+            commit()
+            uncommitted = 0
+    writer.end(con)
+    commit()
+    return rows
+
+class Inserter(object):
+    """Writer of rows with a single statement."""
+
+    def __init__(self, statement):
+        self._statement = statement
+
+    def prepare(self, con):
+        pass
+
+    def write(self, con, batch):
+        con.executemany(self._statement, batch)
+
+    def end(self, con):
+        pass
+
+class BulkLoader(object):
+    """Writer of rows of an empty table, see TableProxy.bulkLoad."""
+
+    def __init__(self, table, columns=None, key=None):
+        self._table = table
+        self._columns = columns
+        self._key = key
+        self._last = None
+        self._staging = None
+        self._pragmas = []
+        self.staged = False
+
+    def prepare(self, con):
+        # previous values are restored at the end, so that a pooled connection
+        # doesn't keep them
+        for name, value in BULK_LOAD_PRAGMAS:
+            self._pragmas.append((name, con.execute("PRAGMA {}".format(name)).fetchone()[0]))
+            con.execute("PRAGMA {} = {}".format(name, value))
+
+        if self._columns is None:
+            self._columns = [c[0] for c in con.execute("SELECT * FROM {} LIMIT 0".format(self._table)).description]
+        self._target = "{}({})".format(self._table, ','.join(self._columns))
+        self._placeholders = ','.join(['?'] * len(self._columns))
+
+    def write(self, con, batch):
+        if not self.staged:
+            inOrder = self._countInOrder(batch)
+            con.executemany("INSERT INTO {} VALUES ({})".format(self._target, self._placeholders),
+                batch[:inOrder] if inOrder < len(batch) else batch)
+            if inOrder == len(batch):
+                return
+
+            self._staging = "temp.{}_staging".format(self._table)
+            con.execute("CREATE TABLE {} AS SELECT {} FROM main.{} WHERE 0".format(
+                self._staging, ','.join(self._columns), self._table))
+            self.staged = True
+            batch = batch[inOrder:]
+
+        con.executemany("INSERT INTO {} VALUES ({})".format(self._staging, self._placeholders), batch)
+
+    def end(self, con):
+        if self.staged:
+            con.execute("INSERT INTO main.{} SELECT * FROM {} ORDER BY {}".format(
+                self._target, self._staging, self._columns[self._key]))
+            con.execute("DROP TABLE {}".format(self._staging))
+        for name, value in self._pragmas:
+            con.execute("PRAGMA {} = {}".format(name, value))
+
+    def _countInOrder(self, batch):
+        """Return the number of leading rows of `batch` with increasing keys."""
+        if self._key is None:
+            return len(batch)
+        for (i, row) in enumerate(batch):
+            if self._last is not None and row[self._key] < self._last:
+                return i
+            self._last = row[self._key]
+        return len(batch)
+
+class BackgroundWriter(object):
+    """
+    Writer of batches of rows on a dedicated thread.
+
+    Rows are handed to the thread in batches of `batchSize` rows through a
+    queue of at most `maxBatches` batches, so producing rows overlaps with writing them. The thread writes
+    with its own connection and `writer` (an Inserter or a BulkLoader),
+    committing every `transactionSize` rows. How long the producer waited
+    for the writer (backpressure) and the writer waited for rows is logged at
+    the end. It is used as a context manager, rows handed to it are written
+    even if the producer fails. An error of the writer is raised by `write`
+    or at the end.
+    """
+
+    _END = object()
+
+    def __init__(self, proxy, query, writer, transactionSize=DEFAULT_TRANSACTION_SIZE,
+                 batchSize=WRITE_BATCH_SIZE, maxBatches=WRITE_QUEUE_BATCHES):
+        self.rows = 0
+        self.producerWait = 0.0 # seconds
+        self.writerWait = 0.0 # seconds
+        self._query = query
+        self._batchSize = batchSize
+        self._queue = Queue.Queue(maxBatches)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, args=(proxy, writer, transactionSize))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def write(self, rows, committed=None):
+        """Hand `rows` to the writer in batches. `committed` is called on the
+        writer thread once all of them are committed."""
+        for batch in batched(rows, self._batchSize):
+            self._put((batch, None))
+        if committed is not None:
+            self._put(([], committed))
+
+    def close(self):
+        """Wait until all rows are written and return their number."""
+        if self._thread.is_alive():
+            self._put(BackgroundWriter._END)
+            while self._thread.is_alive():
+                # joining with a timeout keeps the thread interruptible
+                self._thread.join(1.0)
+        if self._error is not None:
+            raise self._error[0], self._error[1], self._error[2]
+
+        logger = logging.getLogger(__name__)
+        logger.info("Finished {}: the producer waited {:.2f}s for the writer, the writer waited {:.2f}s for rows".format(
+            self._query._description, self.producerWait, self.writerWait))
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type_, value, traceback):
+        if type_ is None:
+            self.close()
+        elif self._error is None:
+            # rows handed over before the error of the producer are written,
+            # but it is the error that is raised
+            try:
+                self.close()
+            except Exception:
+                logging.getLogger(__name__).exception("Failed {}".format(self._query._description))
+        return False
+
+    def _put(self, item):
+        start = time.time()
+        while True:
+            if not self._thread.is_alive():
+                if self._error is not None:
+                    raise self._error[0], self._error[1], self._error[2]
+                raise RuntimeError("The writer of {} has stopped".format(self._query._description))
+            try:
+                self._queue.put(item, timeout=0.1)
+                break
+            except Queue.Full:
+                pass
+        self.producerWait += time.time() - start
+
+    def _batches(self):
+        while True:
+            start = time.time()
+            item = self._queue.get()
+            self.writerWait += time.time() - start
+            if item is BackgroundWriter._END:
+                return
+            yield item
+
+    def _run(self, proxy, writer, transactionSize):
+        try:
+            with proxy._setup(self._query, keep=True, usePool=False) as (con, finish):
+                self.rows = writeBatches(con, writer, self._batches(), transactionSize)
+                finish(self.rows)
+        except:
+            self._error = sys.exc_info()
 
 class Query(object):
-    def __init__(self, query, description="query", logStart=False, logExplain=False, logProgress=False, logEnd=False):
+    def __init__(self, query, description=DEFAULT_DESCRIPTION, logStart=False, logExplain=False, logProgress=False, logEnd=False):
         self._query = query
         self._description = description
         self._logStart = logStart
@@ -62,9 +704,10 @@ class TableProxy(object):
 
         useCustomTypes = kwargs.pop('useCustomTypes', False)
         self._detect_types = sqlite3.PARSE_DECLTYPES if useCustomTypes else 0
+        self._pooled = kwargs.pop('pooled', True)
 
     def execute(self, query, params=()):
-        with self._setup(query) as con:
+        with self._setup(query, params=params) as con:
             con.execute(query._query, params)
             con.commit()
 
@@ -73,32 +716,187 @@ class TableProxy(object):
             con.executemany(query._query, values)
             con.commit()
 
-    def select(self, query, params=()):
-        with self._setup(query) as con:
+    def select(self, query, params=(), prefetch=False):
+        """
+        Return a cursor with rows of `query`. If `prefetch` is True, rows are
+        fetched ahead of the consumer on a background thread, which suits
+        long selects read by slow Python loops (see PrefetchingCursor).
+        """
+        if prefetch:
+            return PrefetchingCursor(self, query, params)
+
+        with self._setup(query, keep=True, params=params) as (con, finish):
             cursor = con.cursor()
             cursor.execute(query._query, params)
-            return cursor
+            return PooledCursor(cursor, finish)
+
+    def selectByKeys(self, query, keys, batchSize=LOOKUP_BATCH_SIZE):
+        """
+        Yield rows of `query` for any number of integer `keys`.
+
+        Keys are inserted in batches into the temporary table `lookup_keys`,
+        with its `key` column being an INTEGER PRIMARY KEY. `query` should
+        join with it as the outer table (`lookup_keys CROSS JOIN ...`), since
+        the planner has no statistics of it. Each batch is inserted with the
+        same short statement and its rows are streamed before the next batch
+        is loaded, so this works for any number of keys with a bounded cost
+        per key. Duplicate keys are looked up once, missing keys yield no
+        rows.
+
+        This is a generator, not a cursor. Closing it before the last row
+        clears `lookup_keys` and returns the connection.
+        """
+        def batches():
+            seen = set()
+            batch = []
+            for key in keys:
+                if key not in seen:
+                    seen.add(key)
+                    batch.append((key,))
+                    if len(batch) == batchSize:
+                        yield batch
+                        batch = []
+            if batch:
+                yield batch
+
+        with self._setup(query, keep=True) as (con, finish):
+            rows = 0
+            try:
+                con.execute("CREATE TEMP TABLE IF NOT EXISTS lookup_keys (key INTEGER PRIMARY KEY)")
+                # the query can only be planned once the table exists
+                plan = queryPlan(con, query._query) if _recorders else None
+                for batch in batches():
+                    con.execute("DELETE FROM temp.lookup_keys")
+                    con.executemany("INSERT INTO temp.lookup_keys VALUES (?)", batch)
+                    for row in con.execute(query._query):
+                        rows += 1
+                        yield row
+            except GeneratorExit:
+                pass # the caller stopped reading rows
+            con.execute("DELETE FROM temp.lookup_keys")
+            con.commit()
+            finish(rows, plan)
+
+    def setPageSize(self, pageSize=BULK_LOAD_PAGE_SIZE):
+        """Set the page size of the database, it should be done before any
+        table is created. Large pages make bulk loads and scans faster."""
+        with self._setup(Query("PRAGMA page_size = {}".format(int(pageSize)))) as con:
+            con.execute("PRAGMA page_size = {}".format(int(pageSize)))
+            # the page size of a new database is only written by its first
+            # change, VACUUM writes it before the connection is closed
+            con.execute("VACUUM")
+
+    def bulkLoad(self, table, values, columns=None, key=None, description=None,
+                 background=False, transactionSize=DEFAULT_TRANSACTION_SIZE):
+        """
+        Insert `values` into `columns` (by default all) of the empty `table`
+        and return the number of rows.
+
+        Rows are appended while the values of their `key` column (an index)
+        increase. The ones after the first row out of order are staged in a
+        temporary table without constraints and copied sorted by the key at
+        the end, so that the b-tree of `table` is built by appending instead of
+        random inserts. Indexes of `table` should be created afterwards.
+
+        `background` - if True, rows are written by a BackgroundWriter while
+        `values` are produced
+
+        `transactionSize` - number of rows written between commits
+        """
+        logger = logging.getLogger(__name__)
+        query = Query("BULK LOAD {}".format(table), description or "loading {} table".format(table), logStart=True)
+        loader = BulkLoader(table, columns, key)
+        start = time.time()
+
+        if background:
+            with BackgroundWriter(self, query, loader, transactionSize) as writer:
+                writer.write(values)
+            rows = writer.rows
+        else:
+            with self._setup(query, keep=True) as (con, finish):
+                rows = writeBatches(con, loader, ((batch, None) for batch in batched(values, WRITE_BATCH_SIZE)), transactionSize)
+                finish(rows)
+
+        seconds = time.time() - start
+        logger.info("Loaded {} rows into {} table in {:.2f}s ({:.0f} rows/s{})".format(
+            rows, table, seconds, rows / max(seconds, 1e-6),
+            ", sorted" if loader.staged else ""))
+        return rows
+
+    def openWriter(self, query, transactionSize=DEFAULT_TRANSACTION_SIZE):
+        """Return a BackgroundWriter executing `query` for every written
+        row."""
+        return BackgroundWriter(self, query, Inserter(query._query), transactionSize)
+
+    def close(self):
+        """Close idle pooled connections of the current thread to the tables
+        of this proxy."""
+        _pool.close(self._paths)
 
     @contextlib.contextmanager
-    def _setup(self, query):
+    def _setup(self, query, keep=False, usePool=None, params=None):
+        """
+        Yield a connection for `query`. It is returned to the pool at the end,
+        unless `keep` is True, then a function returning it is yielded too.
+        The function takes the number of rows the query returned, and
+        optionally its plan made after the connection was prepared for it.
+
+        `usePool` - overrides whether the connection comes from the pool,
+        connections outside of it are closed at the end
+
+        `params` - parameters of `query`, used for its query plan
+        """
         logger = logging.getLogger(__name__)
 
         if query._logStart:
             logger.info("Starting {}".format(query._description))
 
-        con = connect(*self._paths, detect_types=self._detect_types)
+        if usePool is None:
+            usePool = self._pooled
+        key, pooled = self._acquire(usePool)
+        con = pooled.connection
+        recorders = list(_recorders)
+        start, changes = time.time(), con.total_changes
 
-        if query._logExplain:
-            explain(con, query._query)
+        def finish(rows, madePlan=None):
+            if recorders:
+                seconds = time.time() - start
+                for recorder in recorders:
+                    recorder.record(query, plan if madePlan is None else madePlan, seconds, rows)
+            if usePool:
+                _pool.release(key, pooled)
+            else:
+                con.close()
 
-        progressHandler = Utils.DumbProgressBar()
-        if query._logProgress:
-            con.set_progress_handler(progressHandler.report, 100000)
+        try:
+            plan = None
+            if query._logExplain:
+                explain(con, query._query)
+            if any(not recorder.knows(query._query) for recorder in recorders):
+                plan = queryPlan(con, query._query, params)
 
-        yield con #execute specific code
+            progressHandler = Utils.DumbProgressBar()
+            if query._logProgress:
+                con.set_progress_handler(progressHandler.report, 100000)
+
+            if keep:
+                yield con, finish
+            else:
+                yield con #execute specific code
+                finish(con.total_changes - changes)
+        except:
+            # the state of the connection is unknown, so it is not reused
+            con.close()
+            raise
 
         if query._logProgress:
             progressHandler.cleanup()
 
         if query._logEnd:
             logger.info("Finished {}.".format(query._description))
+
+    def _acquire(self, usePool):
+        if usePool:
+            return _pool.acquire(self._paths, self._detect_types)
+        else:
+            return None, PooledConnection(self._paths, self._detect_types)
@@ -1,10 +1,11 @@
 from SQLBase import TableProxy, Query
 
 class WikimapPointsTable(TableProxy):
-    def __init__(self, tablePath):
-        super(WikimapPointsTable, self).__init__(tablePath, useCustomTypes=True)
+    def __init__(self, tablePath, pooled=True):
+        super(WikimapPointsTable, self).__init__(tablePath, useCustomTypes=True, pooled=pooled)
 
     def create(self):
+        self.setPageSize()
         self.execute(Query(u"""
             CREATE TABLE wikipoints (
                 wp_id                   INTEGER     NOT NULL    PRIMARY KEY,
@@ -20,19 +21,13 @@ class WikimapPointsTable(TableProxy):
             );"""))
 
     def populate(self, values):
-        self.executemany(Query(u"""
-            INSERT INTO wikipoints(
-                wp_id,
-                wp_title,
-                wp_x,
-                wp_y,
-                wp_rank,
-                wp_high_dim_neighs,
-                wp_high_dim_dists,
-                wp_low_dim_neighs,
-                wp_low_dim_dists)
-            VALUES (?,?,?,?,?,?,?,?,?)
-        """, "populating wikipoints table", logStart=True), values)
+        self.bulkLoad("wikipoints", values,
+            columns=["wp_id", "wp_title", "wp_x", "wp_y", "wp_rank",
+                     "wp_high_dim_neighs", "wp_high_dim_dists",
+                     "wp_low_dim_neighs", "wp_low_dim_dists"],
+            key=0,
+            description="populating wikipoints table",
+            background=True)
 
         self.execute(Query(u"CREATE UNIQUE INDEX title_idx ON wikipoints(wp_title);", "creating index title_idx in wikipoints table", logStart=True, logProgress=True))
 
@@ -57,9 +52,10 @@ class WikimapPointsTable(TableProxy):
         return self.select(Query(u"SELECT * FROM wikipoints WHERE wp_title=?"), (title,))
 
     def selectByIds(self, ids):
-        ids = list(ids)
-        placeholders = '(' + ','.join(['?']*len(ids)) + ')'
-        return self.select(Query(u"SELECT * FROM wikipoints WHERE wp_id IN " + placeholders), ids)
+        """Return a generator of rows of `ids`, in no particular order and
+        once per id. Unlike a cursor it has no fetch methods, closing it
+        stops the lookup."""
+        return self.selectByKeys(Query(u"SELECT wikipoints.* FROM temp.lookup_keys CROSS JOIN wikipoints ON wp_id = key"), ids)
 
     def selectTitles(self):
         return self.select(Query(u"SELECT wp_title FROM wikipoints"))
@@ -68,8 +64,8 @@ class WikimapPointsTable(TableProxy):
         return self.select(Query(u"SELECT wp_title, wp_rank FROM wikipoints"))
 
 class WikimapCategoriesTable(TableProxy):
-    def __init__(self, tablePath):
-        super(WikimapCategoriesTable, self).__init__(tablePath, useCustomTypes=True)
+    def __init__(self, tablePath, pooled=True):
+        super(WikimapCategoriesTable, self).__init__(tablePath, useCustomTypes=True, pooled=pooled)
 
     def create(self):
         self.execute(Query(u"""
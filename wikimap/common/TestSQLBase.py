@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+
+from SQLBase import TableProxy, Query, BackgroundWriter, Inserter, \
+    closeConnections, encodeList, decodeList, migrateLists
+import os
+import time
+import sqlite3
+import threading
+
+
+class TestTable(object):
+    storage = 'tmptestdb.sqlite'
+
+    def __init__(self, rows=100, **kwargs):
+        self._rows = rows
+        self._kwargs = kwargs
+
+    def __enter__(self):
+        table = TableProxy(TestTable.storage, **self._kwargs)
+        table.execute(Query("CREATE TABLE a (id INTEGER PRIMARY KEY, v INTEGER)"))
+        table.executemany(Query("INSERT INTO a VALUES (?, ?)"),
+                          ((i, i * i) for i in range(self._rows)))
+        return table
+
+    def __exit__(self, *args):
+        closeConnections()
+        os.unlink(TestTable.storage)
+
+
+def check(message, condition):
+    if condition:
+        print "[PASS] ", message
+    else:
+        print "[FAIL] ", message
+
+
+def finishes(function, timeout=5.0):
+    """Return the result of `function` or None if it doesn't finish within
+    `timeout` seconds."""
+    result = []
+    thread = threading.Thread(target=lambda: result.append(function()))
+    thread.daemon = True
+    thread.start()
+    thread.join(timeout)
+    return result[0] if result else None
+
+
+def testPrefetching():
+    with TestTable() as table:
+        cursor = table.select(Query("SELECT id FROM a ORDER BY id"), prefetch=True)
+        check("Prefetching cursor", list(cursor) == [(i,) for i in range(100)])
+        check("Iterate exhausted prefetching cursor", finishes(lambda: list(cursor)) == [])
+
+        cursor = table.select(Query("SELECT id FROM a"), prefetch=True)
+        cursor.close()
+        check("Iterate closed prefetching cursor", finishes(lambda: list(cursor)) == [])
+
+        cursor = table.select(Query("SELECT id FROM a"), prefetch=True)
+        for block in cursor.blocks():
+            break
+        check("Iterate prefetching cursor after a break", finishes(lambda: list(cursor)) == [])
+
+        cursor = table.select(Query("SELECT id FROM missing"), prefetch=True)
+        try:
+            list(cursor)
+            raised = False
+        except Exception as e:
+            raised = 'missing' in str(e)
+        check("Error of prefetching query", raised)
+
+
+def testBackgroundWriter():
+    with TestTable(rows=0) as table:
+        query = Query("INSERT INTO a VALUES (?, ?)")
+
+        def count():
+            # committed rows, read by another connection
+            con = sqlite3.connect(TestTable.storage)
+            rows = con.execute("SELECT count(*) FROM a").fetchone()[0]
+            con.close()
+            return rows
+
+        committed = []
+        with BackgroundWriter(table, query, Inserter(query._query), transactionSize=25,
+                              batchSize=10, maxBatches=2) as writer:
+            writer.write(((i, i) for i in range(30)), lambda: committed.append(('first', count())))
+            writer.write(((i, i) for i in range(30, 60)), lambda: committed.append(('second', count())))
+        check(
+            "Background writer",
+            writer.rows == 60
+            and count() == 60
+            and writer._queue.maxsize == 2
+        )
+        check(
+            "Background writer calls back after commits",
+            [name for (name, _) in committed] == ['first', 'second']
+            and committed[0][1] >= 30
+            and committed[1][1] == 60
+        )
+
+        class SlowInserter(Inserter):
+            def write(self, con, batch):
+                time.sleep(0.01)
+                Inserter.write(self, con, batch)
+
+        with BackgroundWriter(table, query, SlowInserter("INSERT OR REPLACE INTO a VALUES (?, ?)"),
+                              batchSize=1, maxBatches=2) as writer:
+            writer.write((i, i) for i in range(20))
+        check("Background writer makes the producer wait", writer.producerWait > 0.05)
+
+        with table.openWriter(Query("INSERT INTO a VALUES (?, ?)"), transactionSize=7) as writer:
+            writer.write((i, i) for i in range(100, 150))
+        check("Writer of a table", writer.rows == 50 and count() == 110)
+
+        try:
+            with table.openWriter(Query("INSERT INTO missing VALUES (?)")) as writer:
+                writer.write((i,) for i in range(100))
+            raised = False
+        except sqlite3.OperationalError as e:
+            raised = 'missing' in str(e)
+        check("Error of background writer", raised)
+
+
+def testSelectByKeys():
+    with TestTable() as table:
+        query = Query("SELECT a.* FROM temp.lookup_keys CROSS JOIN a ON id = key")
+        rows = table.selectByKeys(query, [5, 3, 5, 1000, 3, -1, 99], batchSize=2)
+        check("Select by keys", sorted(rows) == [(3, 9), (5, 25), (99, 99 * 99)])
+
+        rows = table.selectByKeys(query, range(50), batchSize=10)
+        first = [next(rows) for _ in range(15)]
+        rows.close()
+        check(
+            "Select by keys closed early",
+            len(set(first)) == 15
+            # the temporary table is on the pooled connection
+            and list(table.select(Query("SELECT count(*) FROM temp.lookup_keys"))) == [(0,)]
+        )
+        check("Select by keys after closing", len(list(table.selectByKeys(query, range(50)))) == 50)
+
+
+def roundTrip(lst):
+    encoded = str(encodeList(lst))
+    return encoded[:1], decodeList(encoded)
+
+
+def testLists():
+    check("Int list", roundTrip([1, -2, 2**31 - 1]) == ('i', [1, -2, 2**31 - 1]))
+    check("Empty list", roundTrip([]) == ('i', []))
+    check("Float list", roundTrip([1.5, -0.25]) == ('d', [1.5, -0.25]))
+    check("Text list", roundTrip([u'a', u'\u0105', u'']) == ('s', [u'a', u'\u0105', u'']))
+    check(
+        "Mixed lists as literals",
+        roundTrip([1, 2.5]) == ('r', [1, 2.5])
+        and roundTrip([u'a', 1]) == ('r', [u'a', 1])
+        and roundTrip([2**40]) == ('r', [2**40])
+        and roundTrip([u'a\0b']) == ('r', [u'a\0b'])
+    )
+    check(
+        "Lossy lists",
+        roundTrip([1.5, 2]) == ('d', [1.5, 2.0])
+        and roundTrip([True, False]) == ('i', [1, 0])
+    )
+    check("Legacy list", decodeList(repr([1, u'a', 2.5])) == [1, u'a', 2.5])
+
+
+def testMigrateLists():
+    lists = [[1, 2], [u'a', u'b'], [0.5]]
+    con = sqlite3.connect(TestTable.storage)
+    con.execute("CREATE TABLE l (id INTEGER PRIMARY KEY, v LIST)")
+    # lists stored as text by older versions
+    con.executemany("INSERT INTO l VALUES (?, ?)", ((i, repr(lst)) for (i, lst) in enumerate(lists)))
+    con.execute("INSERT INTO l VALUES (?, ?)", (len(lists), encodeList([3])))
+    con.commit()
+    con.close()
+
+    migrated = migrateLists(TestTable.storage, batchSize=2)
+    table = TableProxy(TestTable.storage, useCustomTypes=True)
+    check(
+        "Migrate lists",
+        migrated == len(lists)
+        and [v for (v,) in table.select(Query("SELECT v FROM l ORDER BY id"))] == lists + [[3]]
+        and list(table.select(Query("SELECT count(*) FROM l WHERE typeof(v) = 'text'"))) == [(0,)]
+    )
+    closeConnections()
+    check("Migrate lists again", migrateLists(TestTable.storage) == 0)
+    os.unlink(TestTable.storage)
+
+
+def main():
+    print "Testing sqlite tables:"
+    testPrefetching()
+    testBackgroundWriter()
+    testSelectByKeys()
+    testLists()
+    testMigrateLists()
+
+
+if __name__ == "__main__":
+    main()